@@ -1,607 +1,95 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
-import json
-import os
-import io
 from datetime import datetime
-from pathlib import Path
-
-# =============================================================================
-# 設定
-# =============================================================================
-DB_PATH = "database.db"
-METADATA_PATH = "metadata.json"
-
-# Metadata 要追蹤的欄位
-METADATA_COLUMNS = {
-    "EE_BOM": [
-        "Project_Name",
-        "PARENT_DPN",
-        "COMMODITY_CODE",
-        "SUB_COMMODITY",
-        "DPN",
-        "ODM_PN",
-        "MANUFACTURER",
-        "MPN",
-        "EM_DM",
-        "Quarter",
-    ],
-    "Cost_Adder_Logistic": [
-        "Project_Name",
-        "Parent_DPN",
-        "Sub_Cost_Category",
-        "Region",
-        "Quarter",
-    ],
-}
-
-# Quarter 對照表
-QUARTER_TABLE = [
-    ("FY24Q1", "2023-02-04", "2023-05-05"),
-    ("FY24Q2", "2023-05-06", "2023-08-04"),
-    ("FY24Q3", "2023-08-05", "2023-11-03"),
-    ("FY24Q4", "2023-11-04", "2024-02-02"),
-    ("FY25Q1", "2024-02-03", "2024-05-03"),
-    ("FY25Q2", "2024-05-04", "2024-08-02"),
-    ("FY25Q3", "2024-08-03", "2024-11-01"),
-    ("FY25Q4", "2024-11-02", "2025-01-31"),
-    ("FY26Q1", "2025-02-01", "2025-05-02"),
-    ("FY26Q2", "2025-05-03", "2025-08-01"),
-    ("FY26Q3", "2025-08-02", "2025-10-31"),
-    ("FY26Q4", "2025-11-01", "2026-01-30"),
-    ("FY27Q1", "2026-01-31", "2026-05-01"),
-    ("FY27Q2", "2026-05-02", "2026-07-31"),
-    ("FY27Q3", "2026-08-01", "2026-10-30"),
-    ("FY27Q4", "2026-10-31", "2027-01-29"),
-    ("FY28Q1", "2027-01-30", "2027-04-30"),
-    ("FY28Q2", "2027-05-01", "2027-07-30"),
-    ("FY28Q3", "2027-07-31", "2027-10-29"),
-    ("FY28Q4", "2027-10-30", "2028-01-28"),
-    ("FY29Q1", "2028-01-29", "2028-04-28"),
-    ("FY29Q2", "2028-04-29", "2028-07-28"),
-    ("FY29Q3", "2028-07-29", "2028-10-27"),
-    ("FY29Q4", "2028-10-28", "2029-02-02"),
-    ("FY30Q1", "2029-02-03", "2029-05-04"),
-    ("FY30Q2", "2029-05-05", "2029-08-03"),
-    ("FY30Q3", "2029-08-04", "2029-11-02"),
-    ("FY30Q4", "2029-11-03", "2030-02-01"),
-    ("FY31Q1", "2030-02-02", "2030-05-03"),
-    ("FY31Q2", "2030-05-04", "2030-08-02"),
-    ("FY31Q3", "2030-08-03", "2030-11-01"),
-    ("FY31Q4", "2030-11-02", "2031-01-31"),
-    ("FY32Q1", "2031-02-01", "2031-05-02"),
-    ("FY32Q2", "2031-05-03", "2031-08-01"),
-    ("FY32Q3", "2031-08-02", "2031-10-31"),
-    ("FY32Q4", "2031-11-01", "2032-01-30"),
-    ("FY33Q1", "2032-01-31", "2032-04-30"),
-    ("FY33Q2", "2032-05-01", "2032-07-30"),
-    ("FY33Q3", "2032-07-31", "2032-10-29"),
-    ("FY33Q4", "2032-10-30", "2033-01-28"),
-    ("FY34Q1", "2033-01-29", "2033-04-29"),
-    ("FY34Q2", "2033-04-30", "2033-07-29"),
-    ("FY34Q3", "2033-07-30", "2033-10-28"),
-    ("FY34Q4", "2033-10-29", "2034-02-03"),
-    ("FY35Q1", "2034-02-04", "2034-05-05"),
-    ("FY35Q2", "2034-05-06", "2034-08-04"),
-    ("FY35Q3", "2034-08-05", "2034-11-03"),
-    ("FY35Q4", "2034-11-04", "2035-02-02"),
-]
-
-# 建立 Quarter 列表（用於下拉選單）
-QUARTER_LIST = [q[0] for q in QUARTER_TABLE]
 
+from bom_core import (
+    ESTIMATE_SOURCE_TABLES,
+    QUARTER_LIST,
+    SEARCH_COLUMNS,
+    MissingSheetsError,
+    acquire_result,
+    calculate_bom_diff,
+    cached_export,
+    calculate_em_mva,
+    checkpoint_wal,
+    clear_slow_queries,
+    config,
+    count_rows,
+    database_summary,
+    enable_incremental_vacuum,
+    get_all_project_names,
+    get_current_quarter,
+    get_data_versions,
+    get_bom_rollup,
+    get_facet_counts,
+    get_interrupted_uploads,
+    get_next_quarter,
+    get_plant_generation,
+    get_project_mva_info,
+    get_result,
+    get_slow_queries,
+    get_upload_batches,
+    incremental_vacuum,
+    ingest_workbook,
+    init_database,
+    is_wildcard,
+    load_metadata,
+    optimize_database,
+    parse_project_name,
+    prepare_workbook,
+    query_cost_cube,
+    query_data,
+    read_sheet,
+    read_workbook,
+    release_result,
+    result_entry_id,
+    result_store_stats,
+    search_part_numbers,
+    start_maintenance_scheduler,
+    storage_stats,
+    store_result,
+    summarize_bom_diff,
+    to_excel_bytes,
+    upsert_plant_generation,
+    upsert_project_mva_info,
+)
 
 # =============================================================================
-# Quarter 工具函數
+# 設定
 # =============================================================================
-def date_to_quarter(date_value) -> str:
-    """將日期轉換為 Quarter"""
-    if pd.isna(date_value):
-        return None
-    
-    # 轉換為 datetime
-    if isinstance(date_value, str):
-        try:
-            date_value = pd.to_datetime(date_value)
-        except:
-            return None
-    elif not isinstance(date_value, (datetime, pd.Timestamp)):
-        try:
-            date_value = pd.to_datetime(date_value)
-        except:
-            return None
-    
-    # 查找對應的 Quarter
-    for quarter, start_str, end_str in QUARTER_TABLE:
-        start_date = pd.to_datetime(start_str)
-        end_date = pd.to_datetime(end_str)
-        if start_date <= date_value <= end_date:
-            return quarter
-    
-    return None
-
+# 報表篩選選項：每次載入的選項數量上限（點「載入更多」再往下加）
+FACET_OPTION_LIMIT = 200
 
-def get_next_quarter(quarter: str) -> str:
-    """取得下一個 Quarter"""
-    if quarter not in QUARTER_LIST:
-        return None
-    
-    idx = QUARTER_LIST.index(quarter)
-    if idx + 1 < len(QUARTER_LIST):
-        return QUARTER_LIST[idx + 1]
-    return None
+# 成本儀表板：下鑽順序，以及 Quarter 趨勢圖顯示的項目數
+CUBE_DRILL_LEVELS = ["COMMODITY_CODE", "SUB_COMMODITY", "MANUFACTURER"]
+CUBE_TREND_TOP = 10
 
 
-def get_quarter_distance(q1: str, q2: str) -> int:
+@st.cache_resource(show_spinner=False)
+def init_database_once(db_path: str):
     """
-    計算兩個 Quarter 之間的距離（季數）
-    q1: 起始 Quarter
-    q2: 結束 Quarter
-    回傳：q2 - q1 的季數
+    每個 process 只初始化一次資料庫（建立 table、索引、搜尋索引），並啟動背景維護排程
+    以 db_path 作為 cache key，DB_PATH 改變時會重新初始化
     """
-    if q1 not in QUARTER_LIST or q2 not in QUARTER_LIST:
-        return None
-    
-    idx1 = QUARTER_LIST.index(q1)
-    idx2 = QUARTER_LIST.index(q2)
-    return idx2 - idx1
-
-
-def get_current_quarter() -> str:
-    """取得當前日期對應的 Quarter"""
-    return date_to_quarter(datetime.now())
-
-
-# =============================================================================
-# 資料庫操作
-# =============================================================================
-def get_db_connection():
-    """取得資料庫連線"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def init_database():
-    """初始化資料庫"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 建立 Plant_Generation table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Plant_Generation (
-            Project_Name TEXT,
-            Parent_DPN TEXT,
-            Plant TEXT,
-            Generation TEXT,
-            PRIMARY KEY (Project_Name, Parent_DPN)
-        )
-    """)
-    
-    # 建立 Project_MVA_Info table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS Project_MVA_Info (
-            Project_Name TEXT PRIMARY KEY,
-            Initial_MVA REAL,
-            Initial_Quarter TEXT,
-            Adder REAL
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
-
-
-def table_exists(table_name: str) -> bool:
-    """檢查 table 是否存在"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
-        (table_name,)
-    )
-    result = cursor.fetchone()
-    conn.close()
-    return result is not None
-
-
-def insert_data(table_name: str, df: pd.DataFrame) -> int:
-    """
-    插入資料到 table，跳過重複資料
-    回傳實際新增的筆數
-    """
-    if df.empty:
-        return 0
-    
-    conn = get_db_connection()
-    
-    # 加入 created_at 欄位
-    df_to_insert = df.copy()
-    df_to_insert["created_at"] = datetime.now().isoformat()
-    
-    # 如果 table 不存在，先建立
-    if not table_exists(table_name):
-        df_to_insert.to_sql(table_name, conn, if_exists="replace", index=False)
-        conn.close()
-        return len(df_to_insert)
-    
-    # 取得現有資料（不含 created_at）
-    existing_df = pd.read_sql(f"SELECT * FROM {table_name}", conn)
-    
-    # 比較用的欄位（排除 created_at）
-    compare_cols = [col for col in df.columns if col != "created_at"]
-    
-    # 找出不重複的資料
-    if not existing_df.empty:
-        # 確保只比較兩邊都有的欄位
-        common_cols = [col for col in compare_cols if col in existing_df.columns]
-        
-        # 將所有欄位轉換為字串以避免資料類型不一致的問題
-        df_compare = df[common_cols].astype(str)
-        existing_compare = existing_df[common_cols].astype(str).drop_duplicates()
-        
-        # 將 df 與 existing 合併，找出新資料
-        merged = df_compare.merge(
-            existing_compare,
-            how="left",
-            indicator=True
-        )
-        new_mask = merged["_merge"] == "left_only"
-        new_df = df_to_insert[new_mask.values]
-    else:
-        new_df = df_to_insert
-    
-    # 插入新資料
-    if not new_df.empty:
-        new_df.to_sql(table_name, conn, if_exists="append", index=False)
-    
-    conn.close()
-    return len(new_df)
-
-
-def query_data(table_name: str, filters: dict) -> pd.DataFrame:
-    """
-    根據篩選條件查詢資料
-    filters: {column_name: [value1, value2, ...], ...}
-    """
-    if not table_exists(table_name):
-        return pd.DataFrame()
-    
-    conn = get_db_connection()
-    
-    # 建立 SQL 查詢
-    query = f"SELECT * FROM {table_name}"
-    conditions = []
-    params = []
-    
-    for col, values in filters.items():
-        if values:  # 只處理有選擇值的欄位
-            placeholders = ", ".join(["?" for _ in values])
-            conditions.append(f"{col} IN ({placeholders})")
-            params.extend(values)
-    
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-    
-    df = pd.read_sql(query, conn, params=params)
-    conn.close()
-    
-    # 移除 created_at 欄位（不需要在報表中顯示）
-    if "created_at" in df.columns:
-        df = df.drop(columns=["created_at"])
-    
-    return df
-
-
-def get_all_data(table_name: str) -> pd.DataFrame:
-    """取得 table 中所有資料"""
-    if not table_exists(table_name):
-        return pd.DataFrame()
-    
-    conn = get_db_connection()
-    df = pd.read_sql(f"SELECT * FROM {table_name}", conn)
-    conn.close()
-    return df
-
-
-# =============================================================================
-# Plant_Generation 操作
-# =============================================================================
-def upsert_plant_generation(df: pd.DataFrame) -> int:
-    """插入或更新 Plant_Generation 資料"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    count = 0
-    for _, row in df.iterrows():
-        cursor.execute("""
-            INSERT OR REPLACE INTO Plant_Generation 
-            (Project_Name, Parent_DPN, Plant, Generation)
-            VALUES (?, ?, ?, ?)
-        """, (row["Project_Name"], row["Parent_DPN"], row["Plant"], row["Generation"]))
-        count += 1
-    
-    conn.commit()
-    conn.close()
-    return count
-
-
-def get_plant_generation() -> pd.DataFrame:
-    """取得所有 Plant_Generation 資料"""
-    conn = get_db_connection()
-    try:
-        df = pd.read_sql("SELECT * FROM Plant_Generation", conn)
-    except:
-        df = pd.DataFrame()
-    conn.close()
-    return df
-
-
-# =============================================================================
-# Project_MVA_Info 操作
-# =============================================================================
-def upsert_project_mva_info(project_name: str, initial_mva: float, 
-                            initial_quarter: str, adder: float):
-    """插入或更新 Project_MVA_Info"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        INSERT OR REPLACE INTO Project_MVA_Info 
-        (Project_Name, Initial_MVA, Initial_Quarter, Adder)
-        VALUES (?, ?, ?, ?)
-    """, (project_name, initial_mva, initial_quarter, adder))
-    
-    conn.commit()
-    conn.close()
-
-
-def get_project_mva_info(project_name: str = None) -> pd.DataFrame:
-    """取得 Project_MVA_Info 資料"""
-    conn = get_db_connection()
-    try:
-        if project_name:
-            df = pd.read_sql(
-                "SELECT * FROM Project_MVA_Info WHERE Project_Name = ?",
-                conn, params=[project_name]
-            )
-        else:
-            df = pd.read_sql("SELECT * FROM Project_MVA_Info", conn)
-    except:
-        df = pd.DataFrame()
-    conn.close()
-    return df
-
-
-def get_all_project_names() -> list:
-    """取得所有不重複的 Project_Name"""
-    projects = set()
-    
-    # 從 EE_BOM 取得
-    if table_exists("EE_BOM"):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT Project_Name FROM EE_BOM")
-        for row in cursor.fetchall():
-            if row[0]:
-                projects.add(row[0])
-        conn.close()
-    
-    # 從 Project_MVA_Info 取得
-    if table_exists("Project_MVA_Info"):
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT Project_Name FROM Project_MVA_Info")
-        for row in cursor.fetchall():
-            if row[0]:
-                projects.add(row[0])
-        conn.close()
-    
-    return sorted(list(projects))
-
-
-# =============================================================================
-# Metadata 操作
-# =============================================================================
-def load_metadata() -> dict:
-    """載入 metadata.json"""
-    if os.path.exists(METADATA_PATH):
-        with open(METADATA_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"EE_BOM": {}, "Cost_Adder_Logistic": {}}
-
-
-def save_metadata(metadata: dict):
-    """儲存 metadata.json"""
-    with open(METADATA_PATH, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-
-def refresh_metadata():
-    """重新掃描資料庫，更新 metadata"""
-    metadata = {"EE_BOM": {}, "Cost_Adder_Logistic": {}}
-    
-    conn = get_db_connection()
-    
-    for table_name, columns in METADATA_COLUMNS.items():
-        if not table_exists(table_name):
-            continue
-        
-        metadata[table_name] = {}
-        
-        for col in columns:
-            # 檢查欄位是否存在
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            table_columns = [row[1] for row in cursor.fetchall()]
-            
-            if col not in table_columns:
-                continue
-            
-            # 取得 unique values，按 created_at 由新到舊排序
-            query = f"""
-                SELECT DISTINCT {col}, MAX(created_at) as last_seen
-                FROM {table_name}
-                WHERE {col} IS NOT NULL AND {col} != ''
-                GROUP BY {col}
-                ORDER BY last_seen DESC
-            """
-            cursor.execute(query)
-            results = cursor.fetchall()
-            
-            # 只保留值，不保留 timestamp
-            unique_values = [str(row[0]) for row in results]
-            metadata[table_name][col] = unique_values
-    
-    conn.close()
-    save_metadata(metadata)
-    return metadata
+    init_database()
+    start_maintenance_scheduler()
 
 
-# =============================================================================
-# 檔名解析
-# =============================================================================
-def parse_project_name(filename: str) -> str:
+def hold_result(slot: str, key: str):
     """
-    從檔名解析 Project_Name
-    規則：以底線分隔，取第 3 個欄位（index 2）
+    session 改為持有 key 的共用結果，並釋放先前持有的結果
+    st.session_state 只保存 key 與持有的 entry id，DataFrame 由整個 process 共用（store_result / get_result）
+    同一個 key 的結果被移除後重新計算時是新的 entry，需重新持有
     """
-    name_without_ext = Path(filename).stem
-    parts = name_without_ext.split("_")
-    
-    if len(parts) >= 3:
-        return parts[2]
-    else:
-        return name_without_ext
-
-
-# =============================================================================
-# 預估 EM/MVA 計算
-# =============================================================================
-def is_empty_value(value) -> bool:
-    """判斷值是否為空（NULL、空字串、純空白）"""
-    if pd.isna(value):
-        return True
-    if isinstance(value, str) and value.strip() == "":
-        return True
-    return False
-
-
-def calculate_em_mva(cur_quarter: str) -> pd.DataFrame:
-    """計算 EM/MVA 預估報表"""
-    next_quarter = get_next_quarter(cur_quarter)
-    
-    if not next_quarter:
-        return pd.DataFrame()
-    
-    # 取得資料
-    ee_bom_df = query_data("EE_BOM", {"Quarter": [cur_quarter]})
-    cost_adder_df = get_all_data("Cost_Adder_Logistic")
-    plant_gen_df = get_plant_generation()
-    mva_info_df = get_project_mva_info()
-    
-    if ee_bom_df.empty:
-        return pd.DataFrame()
-    
-    # 取得所有 PARENT_DPN
-    parent_dpns = ee_bom_df["PARENT_DPN"].unique()
-    
-    results = []
-    
-    for parent_dpn in parent_dpns:
-        # 篩選該 PARENT_DPN 的資料
-        dpn_ee_bom = ee_bom_df[ee_bom_df["PARENT_DPN"] == parent_dpn]
-        
-        # 取得 Project_Name
-        project_name = dpn_ee_bom["Project_Name"].iloc[0] if not dpn_ee_bom.empty else None
-        
-        # 取得 Plant 和 Generation
-        plant = None
-        generation = None
-        if not plant_gen_df.empty and project_name:
-            pg_match = plant_gen_df[
-                (plant_gen_df["Project_Name"] == project_name) & 
-                (plant_gen_df["Parent_DPN"] == parent_dpn)
-            ]
-            if not pg_match.empty:
-                plant = pg_match["Plant"].iloc[0]
-                generation = pg_match["Generation"].iloc[0]
-        
-        # 取得 MVA Info
-        initial_mva = None
-        initial_quarter = None
-        adder = None
-        if not mva_info_df.empty and project_name:
-            mva_match = mva_info_df[mva_info_df["Project_Name"] == project_name]
-            if not mva_match.empty:
-                initial_mva = mva_match["Initial_MVA"].iloc[0]
-                initial_quarter = mva_match["Initial_Quarter"].iloc[0]
-                adder = mva_match["Adder"].iloc[0]
-        
-        # 計算 EM cost incl. QoQ & concession (cur_quarter)
-        cur_em_cost_total = dpn_ee_bom["EXT_COST"].sum() if "EXT_COST" in dpn_ee_bom.columns else 0
-        
-        # 計算 EM (w/ QoQ part) - BOM_COMMENT 為空的
-        if "BOM_COMMENT" in dpn_ee_bom.columns:
-            empty_comment_mask = dpn_ee_bom["BOM_COMMENT"].apply(is_empty_value)
-            cur_em_w_qoq = dpn_ee_bom.loc[empty_comment_mask, "EXT_COST"].sum() if "EXT_COST" in dpn_ee_bom.columns else 0
-            # 計算 EM (w/o QoQ part) - BOM_COMMENT 不為空的
-            next_em_wo_qoq = dpn_ee_bom.loc[~empty_comment_mask, "EXT_COST"].sum() if "EXT_COST" in dpn_ee_bom.columns else 0
-        else:
-            cur_em_w_qoq = cur_em_cost_total
-            next_em_wo_qoq = 0
-        
-        # 計算衰減率
-        decay_rate = 0
-        if initial_quarter:
-            quarter_distance = get_quarter_distance(initial_quarter, cur_quarter)
-            if quarter_distance is not None and quarter_distance < 8:
-                decay_rate = 0.02
-        
-        # 計算 next_quarter EM (w/ QoQ part)
-        next_em_w_qoq = cur_em_w_qoq * (1 - decay_rate)
-        
-        # 計算 next_quarter EM cost incl. QoQ & concession
-        next_em_cost_total = next_em_w_qoq + next_em_wo_qoq
-        
-        # 取得 cur_quarter MVA incl. QoQ
-        cur_mva = None
-        if not cost_adder_df.empty:
-            mva_match = cost_adder_df[
-                (cost_adder_df["Parent_DPN"] == parent_dpn) & 
-                (cost_adder_df["Sub_Cost_Category"] == "MVA")
-            ]
-            if not mva_match.empty:
-                cur_mva = mva_match["Unit_Cost"].iloc[0]
-        
-        # 計算 next_quarter MVA incl. QoQ
-        next_mva = None
-        if initial_mva is not None and initial_quarter and adder is not None:
-            delta_q = get_quarter_distance(initial_quarter, cur_quarter)
-            if delta_q is not None:
-                delta_q += 1  # (cur_quarter - Initial_Quarter) + 1
-                if delta_q > 8:
-                    next_mva = cur_mva
-                else:
-                    next_mva = round(initial_mva * (0.98 ** delta_q)) + adder
-        
-        # 組合結果
-        results.append({
-            "Plant": plant,
-            "Generation": generation,
-            "Project_Name": project_name,
-            "PARENT_DPN": parent_dpn,
-            f"{cur_quarter} EM cost incl. QoQ & concession": cur_em_cost_total,
-            f"{next_quarter} EM cost incl. QoQ & concession": next_em_cost_total,
-            f"{cur_quarter} EM (w/ QoQ part)": cur_em_w_qoq,
-            f"{next_quarter} EM (w/ QoQ part)": next_em_w_qoq,
-            f"{next_quarter} EM (w/o QoQ part)": next_em_wo_qoq,
-            f"{cur_quarter} MVA incl. QoQ": cur_mva,
-            f"{next_quarter} MVA incl. QoQ": next_mva,
-        })
-    
-    return pd.DataFrame(results)
+    previous = st.session_state.get(slot)
+    held = st.session_state.get(f"{slot}_entry")
+    if previous == key and held is not None and held == result_entry_id(key):
+        return
+    entry_id = acquire_result(key)
+    if previous:
+        release_result(previous, held)
+    st.session_state[slot] = key
+    st.session_state[f"{slot}_entry"] = entry_id
 
 
 # =============================================================================
@@ -616,13 +104,14 @@ def main():
     
     st.title("📊 BOM 資料管理系統")
     
-    # 初始化資料庫
-    init_database()
+    # 初始化資料庫（每個 process 只執行一次，之後的 rerun 直接略過）
+    init_database_once(config.DB_PATH)
     
     # 側邊欄選單
     page = st.sidebar.radio(
         "功能選擇",
-        ["維護 Project/Parent_DPN", "預估 EM/MVA", "上傳資料", "產生報表"],
+        ["維護 Project/Parent_DPN", "預估 EM/MVA", "上傳資料", "產生報表", "BOM 差異比較",
+         "成本儀表板", "資料庫管理"],
         index=0
     )
     
@@ -632,6 +121,12 @@ def main():
         estimate_page()
     elif page == "上傳資料":
         upload_page()
+    elif page == "BOM 差異比較":
+        diff_page()
+    elif page == "成本儀表板":
+        cube_page()
+    elif page == "資料庫管理":
+        database_page()
     else:
         report_page()
 
@@ -662,7 +157,7 @@ def maintenance_page():
         
         if uploaded_file:
             try:
-                df = pd.read_excel(uploaded_file)
+                df = read_sheet(uploaded_file)
                 
                 # 檢查必要欄位
                 required_cols = ["Project_Name", "Parent_DPN", "Plant", "Generation"]
@@ -798,18 +293,31 @@ def estimate_page():
     # 計算按鈕
     if st.button("🔄 計算預估", type="primary", use_container_width=True):
         with st.spinner("正在計算..."):
-            result_df = calculate_em_mva(cur_quarter)
+            # 先記錄資料版本，下載時以此對應匯出快取；同一 Quarter、資料未變更時直接共用其他 session 的結果
+            versions = get_data_versions(ESTIMATE_SOURCE_TABLES)
+            key = store_result(
+                "EM_MVA_Estimate", ESTIMATE_SOURCE_TABLES, {"Quarter": [cur_quarter]},
+                lambda: calculate_em_mva(cur_quarter), versions=versions
+            )
+            result_df = get_result(key)
         
-        if result_df.empty:
+        if result_df is None:
+            st.info("ℹ️ 計算結果已被清除，請重新計算")
+        elif result_df.empty:
             st.warning(f"⚠️ 在 {cur_quarter} 沒有找到任何 EE_BOM 資料")
         else:
-            st.session_state["estimate_result"] = result_df
+            hold_result("estimate_result", key)
             st.session_state["estimate_cur_quarter"] = cur_quarter
             st.session_state["estimate_next_quarter"] = next_quarter
+            st.session_state["estimate_versions"] = versions
     
     # 顯示結果
     if "estimate_result" in st.session_state:
-        result_df = st.session_state["estimate_result"]
+        result_df = get_result(st.session_state["estimate_result"])
+        if result_df is None:
+            del st.session_state["estimate_result"]
+            st.info("ℹ️ 計算結果已閒置過久而清除，請重新計算")
+            return
         cur_q = st.session_state["estimate_cur_quarter"]
         next_q = st.session_state["estimate_next_quarter"]
         
@@ -818,11 +326,12 @@ def estimate_page():
         st.write(f"共 {len(result_df)} 筆資料")
         st.dataframe(result_df, use_container_width=True)
         
-        # 下載按鈕
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            result_df.to_excel(writer, sheet_name="EM_MVA_Estimate", index=False)
-        excel_data = output.getvalue()
+        # 下載按鈕（同一 Quarter、資料未變更時直接使用快取的檔案）
+        excel_data = cached_export(
+            "EM_MVA_Estimate", ESTIMATE_SOURCE_TABLES, {"Quarter": [cur_q]}, "xlsx",
+            lambda: to_excel_bytes(result_df, "EM_MVA_Estimate"),
+            versions=st.session_state.get("estimate_versions"),
+        )
         
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"EM_MVA_Estimate_{cur_q}_{timestamp}.xlsx"
@@ -849,6 +358,10 @@ def upload_page():
     4. `Effective_Start_Date` 會自動轉換為 `Quarter`
     """)
     
+    interrupted = get_interrupted_uploads()
+    if not interrupted.empty:
+        st.warning(f"⚠️ 有 {len(interrupted)} 份上傳未完成，重新上傳同一份 Excel 會從中斷處繼續")
+    
     uploaded_file = st.file_uploader(
         "選擇 Excel 檔案",
         type=["xlsx"],
@@ -869,50 +382,21 @@ def upload_page():
         
         # 讀取 Excel
         try:
-            excel_file = pd.ExcelFile(uploaded_file)
-            sheet_names = excel_file.sheet_names
-            
-            # 檢查必要的 Sheet
-            required_sheets = ["EE_BOM", "Cost_Adder_Logistic"]
-            missing_sheets = [s for s in required_sheets if s not in sheet_names]
-            
-            if missing_sheets:
-                st.error(f"❌ 缺少以下工作表：{', '.join(missing_sheets)}")
-                st.write(f"檔案中的工作表：{', '.join(sheet_names)}")
+            try:
+                df_ee_bom, df_cost_adder = read_workbook(uploaded_file)
+            except MissingSheetsError as e:
+                st.error(f"❌ {e}")
+                st.write(f"檔案中的工作表：{', '.join(e.sheet_names)}")
                 return
             
-            # 讀取資料
-            df_ee_bom = pd.read_excel(excel_file, sheet_name="EE_BOM")
-            df_cost_adder = pd.read_excel(excel_file, sheet_name="Cost_Adder_Logistic")
-            
-            # 加入 Project_Name 欄位
-            df_ee_bom.insert(0, "Project_Name", project_name)
-            df_cost_adder.insert(0, "Project_Name", project_name)
-            
-            # 轉換 Effective_Start_Date 為 Quarter
-            quarter_value = None
+            # 加入 Project_Name 與 Quarter 欄位
+            df_ee_bom, df_cost_adder, quarter_value = prepare_workbook(
+                df_ee_bom, df_cost_adder, project_name
+            )
             if "Effective_Start_Date" in df_ee_bom.columns:
-                # 取第一筆有效的日期來轉換
-                for date_val in df_ee_bom["Effective_Start_Date"]:
-                    q = date_to_quarter(date_val)
-                    if q:
-                        quarter_value = q
-                        break
-                
-                df_ee_bom["Quarter"] = quarter_value
                 st.write(f"**轉換後的 Quarter：** `{quarter_value}`")
             else:
                 st.warning("⚠️ EE_BOM 中沒有 Effective_Start_Date 欄位")
-                df_ee_bom["Quarter"] = None
-            
-            # Cost_Adder_Logistic 的 Quarter 來自 EE_BOM
-            # 根據 Parent_DPN 匹配（取第一筆匹配的）
-            if "Parent_DPN" in df_cost_adder.columns and "PARENT_DPN" in df_ee_bom.columns:
-                # 建立 PARENT_DPN -> Quarter 的對應
-                dpn_quarter_map = df_ee_bom.groupby("PARENT_DPN")["Quarter"].first().to_dict()
-                df_cost_adder["Quarter"] = df_cost_adder["Parent_DPN"].map(dpn_quarter_map)
-            else:
-                df_cost_adder["Quarter"] = quarter_value
             
             # 顯示預覽
             st.write("---")
@@ -932,12 +416,10 @@ def upload_page():
             st.write("---")
             if st.button("✅ 確認上傳", type="primary", use_container_width=True):
                 with st.spinner("正在處理資料..."):
-                    # 儲存到資料庫
-                    inserted_ee = insert_data("EE_BOM", df_ee_bom)
-                    inserted_cost = insert_data("Cost_Adder_Logistic", df_cost_adder)
-                    
-                    # 更新 metadata
-                    refresh_metadata()
+                    # 儲存到資料庫，並更新 metadata 與料號搜尋索引
+                    inserted = ingest_workbook(df_ee_bom, df_cost_adder)
+                    inserted_ee = inserted["EE_BOM"]
+                    inserted_cost = inserted["Cost_Adder_Logistic"]
                 
                 # 顯示結果
                 st.success("✅ 上傳完成！")
@@ -960,6 +442,80 @@ def upload_page():
             st.error(f"❌ 讀取檔案時發生錯誤：{str(e)}")
 
 
+def facet_filter(table_name: str, col: str, filters: dict) -> list:
+    """一般篩選欄位：依其他欄位條件列出選項與筆數，選項過多時分批載入"""
+    widget_key = f"filter_{table_name}_{col}"
+    limit_key = f"facet_limit_{table_name}_{col}"
+    limit = st.session_state.get(limit_key, FACET_OPTION_LIMIT)
+    
+    # 多取一筆，用來判斷是否還有更多選項
+    facets = get_facet_counts(table_name, col, filters, limit=limit + 1)
+    has_more = len(facets) > limit
+    counts = dict(facets[:limit])
+    
+    # 已選的值必須保留在選項中（即使在目前條件下已無資料）
+    selected_values = filters[col]
+    options = list(counts.keys())
+    options += [v for v in selected_values if v not in counts]
+    
+    selected = st.multiselect(
+        col,
+        options=options,
+        key=widget_key,
+        format_func=lambda v, c=counts: f"{v} ({c.get(v, 0)})",
+        help=f"選擇 {col} 的篩選值（可複選）"
+    )
+    
+    if has_more:
+        if st.button(f"載入更多 {col} 選項", key=f"more_{limit_key}"):
+            st.session_state[limit_key] = limit + FACET_OPTION_LIMIT
+            st.rerun()
+    
+    return selected
+
+
+def part_number_filter(table_name: str, col: str, filters: dict) -> list:
+    """料號篩選欄位：輸入關鍵字搜尋，或輸入含 * 的樣式（例如 GRM*）依料號族群篩選"""
+    widget_key = f"filter_{table_name}_{col}"
+    search_text = st.text_input(
+        f"搜尋 {col}",
+        key=f"search_{table_name}_{col}",
+        placeholder="輸入料號片段，或 GRM* 篩選整個族群"
+    ).strip()
+    
+    selected_values = filters[col]
+    options = []
+    
+    if search_text:
+        # 含萬用字元的輸入本身就是一個可選的篩選條件
+        if is_wildcard(search_text):
+            options.append(search_text)
+        matches = search_part_numbers(table_name, col, search_text)
+        counts = dict(get_facet_counts(table_name, col, filters, within=matches))
+        options += [v for v in matches if v in counts]
+    else:
+        counts = {}
+    
+    # 已選的值必須保留在選項中
+    options += [v for v in selected_values if v not in options]
+    
+    def format_option(v):
+        if is_wildcard(v):
+            return f"{v}（萬用字元）"
+        if v in counts:
+            return f"{v} ({counts[v]})"
+        return v
+    
+    return st.multiselect(
+        col,
+        options=options,
+        key=widget_key,
+        format_func=format_option,
+        label_visibility="collapsed",
+        help=f"選擇 {col} 的篩選值（可複選）"
+    )
+
+
 def report_page():
     """產生報表頁面"""
     st.header("📊 產生報表")
@@ -982,32 +538,36 @@ def report_page():
     
     st.write("---")
     st.subheader("🔍 篩選條件")
-    st.caption("可複選，欄位內為 OR 邏輯，欄位間為 AND 邏輯")
+    st.caption("可複選，欄位內為 OR 邏輯，欄位間為 AND 邏輯；選項後方為符合目前其他條件的筆數")
     
     # 動態產生篩選條件
-    filters = {}
     table_metadata = metadata[selected_table]
+    columns = list(table_metadata.keys())
+    
+    # 先從 session_state 取出目前所有欄位的選擇，
+    # 讓每個欄位的選項都依「其他欄位」的條件重新計算（cascading facets）
+    filters = {
+        col: st.session_state.get(f"filter_{selected_table}_{col}", [])
+        for col in columns
+    }
     
     # 將篩選條件分成多欄顯示
-    columns = list(table_metadata.keys())
     num_cols = 3
     
     for i in range(0, len(columns), num_cols):
         cols = st.columns(num_cols)
         for j, col in enumerate(columns[i:i+num_cols]):
             with cols[j]:
-                options = table_metadata.get(col, [])
-                selected = st.multiselect(
-                    col,
-                    options=options,
-                    default=[],
-                    help=f"選擇 {col} 的篩選值（可複選）"
-                )
-                filters[col] = selected
+                if col in SEARCH_COLUMNS.get(selected_table, []):
+                    filters[col] = part_number_filter(selected_table, col, filters)
+                else:
+                    filters[col] = facet_filter(selected_table, col, filters)
+    
+    st.write(f"符合目前篩選條件：共 {count_rows(selected_table, filters)} 筆")
     
     # 查詢與下載
     st.write("---")
-
+    
     result_df = pd.DataFrame()
     
     col1, col2 = st.columns([1, 1])
@@ -1017,27 +577,38 @@ def report_page():
     
     # 顯示預覽
     if preview_clicked or "preview_shown" in st.session_state:
-        result_df = query_data(selected_table, filters)
-
+        # 相同條件、資料未變更時共用已查詢的結果（rerun 與其他 session 不會重新查詢）
+        versions = get_data_versions([selected_table])
+        key = store_result(
+            selected_table, [selected_table], filters,
+            lambda: query_data(selected_table, filters), versions=versions
+        )
+        hold_result("report_result", key)
+        result_df = get_result(key)
+        
         st.write("---")
         st.subheader("📋 資料預覽")
         
-        if result_df.empty:
+        if result_df is None:
+            result_df = pd.DataFrame()
+            st.info("ℹ️ 查詢結果已被清除，請重新預覽")
+        elif result_df.empty:
             st.info("🔍 無符合篩選條件的資料")
         else:
             st.write(f"共 {len(result_df)} 筆資料（顯示前 100 筆）")
             st.dataframe(result_df.head(100), use_container_width=True)
             st.session_state["preview_shown"] = True
-
+    
     with col2:
         # 先查詢資料以便產生下載檔案
         
         if not result_df.empty:
-            # 產生 Excel 檔案
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                result_df.to_excel(writer, sheet_name=selected_table, index=False)
-            excel_data = output.getvalue()
+            # 產生 Excel 檔案（同樣的篩選條件、資料未變更時直接使用快取的檔案）
+            excel_data = cached_export(
+                selected_table, [selected_table], filters, "xlsx",
+                lambda: to_excel_bytes(result_df, selected_table),
+                versions=versions,
+            )
             
             # 下載檔案名稱
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -1058,6 +629,327 @@ def report_page():
                 use_container_width=True,
                 help="無符合條件的資料"
             )
+    
+    if selected_table == "EE_BOM" and not result_df.empty:
+        rollup_section(result_df)
+
+
+def rollup_section(result_df: pd.DataFrame):
+    """預覽資料中各 PARENT_DPN 的階層成本（包含下層組件）"""
+    st.write("---")
+    st.subheader("🌳 階層成本（PARENT_DPN rollup）")
+    
+    quarters = [q for q in QUARTER_LIST if q in set(result_df["Quarter"].dropna())]
+    if not quarters:
+        st.info("🔍 預覽資料中沒有 Quarter")
+        return
+    
+    quarter = st.selectbox("Quarter", quarters, index=len(quarters) - 1, key="rollup_quarter")
+    rollup = get_bom_rollup(quarter)
+    parent_dpns = set(result_df.loc[result_df["Quarter"] == quarter, "PARENT_DPN"])
+    rollup = rollup[rollup["PARENT_DPN"].isin(parent_dpns)]
+    
+    cycles = rollup.loc[rollup["In_Cycle"], "PARENT_DPN"].tolist()
+    if cycles:
+        st.warning(f"⚠️ 以下 PARENT_DPN 的 BOM 形成循環，無法計算階層成本：{', '.join(map(str, cycles[:20]))}")
+    
+    st.write(f"共 {len(rollup)} 個 PARENT_DPN")
+    st.dataframe(rollup, use_container_width=True, hide_index=True)
+
+
+def diff_page():
+    """BOM 差異比較頁面"""
+    st.header("🔀 BOM 差異比較")
+    
+    metadata = load_metadata()
+    if not metadata.get("EE_BOM"):
+        st.warning("⚠️ EE_BOM 尚無資料，請先上傳檔案。")
+        return
+    
+    mode = st.radio("比較方式", ["Quarter", "上傳批次"], horizontal=True)
+    
+    col1, col2 = st.columns(2)
+    if mode == "Quarter":
+        quarters = [q for q in QUARTER_LIST if q in metadata["EE_BOM"].get("Quarter", [])]
+        if len(quarters) < 2:
+            st.warning("⚠️ 至少需要兩個 Quarter 的資料才能比較")
+            return
+        with col1:
+            old_q = st.selectbox("比較基準（舊）", quarters, index=len(quarters) - 2)
+        with col2:
+            new_q = st.selectbox("比較對象（新）", quarters, index=len(quarters) - 1)
+        old_filters = {"Quarter": [old_q]}
+        new_filters = {"Quarter": [new_q]}
+        label = f"{old_q}_vs_{new_q}"
+    else:
+        batches = get_upload_batches()
+        if len(batches) < 2:
+            st.warning("⚠️ 至少需要兩個上傳批次才能比較")
+            return
+        batch_labels = {
+            row.created_at: f"{row.created_at} | {row.Project_Name} | {row.Quarter} | {row.Rows} 筆"
+            for row in batches.itertuples()
+        }
+        batch_keys = list(batch_labels.keys())
+        with col1:
+            old_b = st.selectbox("比較基準（舊）", batch_keys, index=1,
+                                 format_func=batch_labels.get)
+        with col2:
+            new_b = st.selectbox("比較對象（新）", batch_keys, index=0,
+                                 format_func=batch_labels.get)
+        old_filters = {"created_at": [old_b]}
+        new_filters = {"created_at": [new_b]}
+        label = "batches"
+    
+    projects = st.multiselect(
+        "Project_Name",
+        options=metadata["EE_BOM"].get("Project_Name", []),
+        help="不選擇則比較所有 Project"
+    )
+    filters = {"Project_Name": projects}
+    
+    if st.button("🔄 比較", type="primary", use_container_width=True):
+        with st.spinner("正在比較..."):
+            versions = get_data_versions(["EE_BOM"])
+            diff_key = {
+                f"{side}.{col}": values
+                for side, side_filters in (("old", old_filters), ("new", new_filters), ("all", filters))
+                for col, values in side_filters.items()
+            }
+            result_key = store_result(
+                "BOM_Diff", ["EE_BOM"], diff_key,
+                lambda: calculate_bom_diff(old_filters, new_filters, filters), versions=versions
+            )
+            hold_result("diff_result", result_key)
+            # 彙總的變更筆數由同一份差異結果統計，不再重新比較
+            computed_diff = get_result(result_key)
+            hold_result("diff_summary", store_result(
+                "BOM_Diff_Summary", ["EE_BOM"], diff_key,
+                lambda: summarize_bom_diff(old_filters, new_filters, filters, diff=computed_diff),
+                versions=versions
+            ))
+            st.session_state["diff_args"] = (diff_key, label, versions)
+    
+    if "diff_result" not in st.session_state:
+        return
+    
+    diff_df = get_result(st.session_state["diff_result"])
+    summary_df = get_result(st.session_state["diff_summary"])
+    if diff_df is None or summary_df is None:
+        del st.session_state["diff_result"]
+        st.info("ℹ️ 比較結果已閒置過久而清除，請重新比較")
+        return
+    diff_key, label, versions = st.session_state["diff_args"]
+    
+    st.write("---")
+    st.subheader("📊 比較結果")
+    
+    if diff_df.empty:
+        st.info("🔍 兩者沒有差異")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    change_counts = diff_df["Change_Type"].value_counts()
+    col1.metric("新增", int(change_counts.get("added", 0)))
+    col2.metric("移除", int(change_counts.get("removed", 0)))
+    col3.metric("變更", int(change_counts.get("changed", 0)))
+    col4.metric("EXT_COST 差額", f"{diff_df['Cost_Delta'].sum():,.4f}")
+    
+    tab_summary, tab_added, tab_removed, tab_changed = st.tabs(
+        ["PARENT_DPN 彙總", "新增", "移除", "變更"]
+    )
+    with tab_summary:
+        st.dataframe(summary_df, use_container_width=True)
+    for tab, change_type in [(tab_added, "added"), (tab_removed, "removed"),
+                             (tab_changed, "changed")]:
+        with tab:
+            part_df = diff_df[diff_df["Change_Type"] == change_type]
+            st.write(f"共 {len(part_df)} 筆資料（顯示前 100 筆）")
+            st.dataframe(part_df.head(100), use_container_width=True)
+    
+    # 下載按鈕：按下時才由畫面上的差異結果產生 CSV（同樣的條件、資料未變更時直接使用快取的檔案）
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    st.download_button(
+        label="⬇️ 下載差異 CSV",
+        data=lambda: cached_export(
+            "BOM_Diff", ["EE_BOM"], diff_key, "csv",
+            lambda: diff_df.to_csv(index=False).encode("utf-8-sig"),
+            versions=versions,
+        ),
+        file_name=f"EE_BOM_diff_{label}_{timestamp}.csv",
+        mime="text/csv",
+        use_container_width=True,
+        type="primary"
+    )
+
+
+def cube_page():
+    """成本儀表板：由成本 cube 切片與下鑽（不讀取 EE_BOM 原始資料）"""
+    st.header("📈 成本儀表板")
+    
+    quarters = query_cost_cube(["Quarter"])
+    if quarters.empty:
+        st.warning("⚠️ EE_BOM 尚無資料，請先上傳檔案。")
+        return
+    quarter_options = [q for q in QUARTER_LIST if q in set(quarters["Quarter"])]
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_quarters = st.multiselect(
+            "Quarter", quarter_options, default=quarter_options[-1:], key="cube_quarter",
+            help="不選擇則包含所有 Quarter"
+        )
+    with col2:
+        projects = query_cost_cube(["Project_Name"], {"Quarter": selected_quarters})
+        selected_projects = st.multiselect(
+            "Project_Name", projects["Project_Name"].tolist(), key="cube_project",
+            help="不選擇則包含所有 Project"
+        )
+    filters = {"Quarter": selected_quarters, "Project_Name": selected_projects}
+    
+    # 依 CUBE_DRILL_LEVELS 逐層下鑽：選擇某一項後，下一層只顯示該項之下的明細
+    level = "Project_Name"
+    drill_cols = st.columns(len(CUBE_DRILL_LEVELS))
+    for drill_col, drill_level in zip(drill_cols, CUBE_DRILL_LEVELS):
+        options = query_cost_cube([drill_level], filters)[drill_level].tolist()
+        with drill_col:
+            choice = st.selectbox(
+                drill_level, ["（全部）"] + options, key=f"cube_drill_{drill_level}",
+                format_func=lambda v: "（空白）" if v == "" else v
+            )
+        if choice == "（全部）":
+            level = drill_level
+            break
+        filters[drill_level] = [choice]
+    
+    level_df = query_cost_cube([level], filters)
+    if level_df.empty:
+        st.info("🔍 沒有符合條件的資料")
+        return
+    total_cost = level_df["EXT_COST"].sum()
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("EXT_COST 合計", f"{total_cost:,.2f}")
+    col2.metric("料件筆數", f"{int(level_df['Rows'].sum()):,}")
+    col3.metric(level, f"{len(level_df):,} 項")
+    
+    level_df["Share_%"] = (level_df["EXT_COST"] / total_cost * 100) if total_cost else 0.0
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader(f"📊 {level}")
+        st.bar_chart(level_df.head(CUBE_TREND_TOP * 2).set_index(level)["EXT_COST"])
+    with col2:
+        st.subheader("📋 明細")
+        st.dataframe(level_df, use_container_width=True, hide_index=True)
+    
+    # Quarter 趨勢：目前層級中 EXT_COST 最高的幾項，不套用 Quarter 篩選
+    st.subheader(f"📉 Quarter 趨勢（前 {CUBE_TREND_TOP} 項）")
+    trend_filters = {**filters, "Quarter": [], level: level_df[level].head(CUBE_TREND_TOP).tolist()}
+    trend = query_cost_cube(["Quarter", level], trend_filters)
+    if not trend.empty:
+        trend_df = trend.pivot_table(index="Quarter", columns=level, values="EXT_COST", aggfunc="sum")
+        trend_df = trend_df.reindex([q for q in QUARTER_LIST if q in trend_df.index])
+        st.line_chart(trend_df)
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    st.download_button(
+        label="⬇️ 下載明細 CSV",
+        data=level_df.to_csv(index=False).encode("utf-8-sig"),
+        file_name=f"EE_BOM_cost_{level}_{timestamp}.csv",
+        mime="text/csv",
+        use_container_width=True
+    )
+
+
+def database_page():
+    """資料庫管理頁面：儲存空間、維護工作、共用查詢結果與慢查詢紀錄"""
+    st.header("🗄️ 資料庫管理")
+    
+    summary = database_summary()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("資料庫大小", f"{summary['file_mb']:,.1f} MB")
+    col2.metric("可回收空間", f"{summary['free_mb']:,.1f} MB",
+                help=f"freelist {summary['freelist_count']:,} 頁")
+    col3.metric("WAL 大小", f"{summary['wal_mb']:,.1f} MB")
+    col4.metric("auto_vacuum", summary["auto_vacuum"],
+                help=f"journal mode：{summary['journal_mode']}")
+    
+    # =========================================================================
+    # 維護工作
+    # =========================================================================
+    st.subheader("🧹 維護")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("📈 更新統計資訊（ANALYZE）", use_container_width=True):
+            with st.spinner("正在分析..."):
+                optimize_database(analyze=True)
+            st.success("✅ 已更新查詢統計資訊")
+    with col2:
+        if st.button("♻️ 回收空間（incremental vacuum）", use_container_width=True):
+            freed = incremental_vacuum()
+            st.success(f"✅ 已釋放 {freed:,} 頁")
+    with col3:
+        if st.button("💾 WAL checkpoint", use_container_width=True):
+            result = checkpoint_wal("TRUNCATE")
+            if result is None:
+                st.info("資料庫不是 WAL 模式")
+            elif result["busy"]:
+                st.warning("⚠️ 有其他連線正在讀寫，checkpoint 未完成，請稍後再試")
+            else:
+                st.success(f"✅ 已寫回 {result['checkpointed']:,} 頁")
+    
+    if summary["auto_vacuum"] != "incremental":
+        st.info("此資料庫未啟用 incremental vacuum，刪除資料後的空間不會自動歸還。"
+                "轉換需要重建整個資料庫，期間無法寫入。")
+        if st.button("🔁 轉換為 incremental vacuum"):
+            with st.spinner("正在重建資料庫..."):
+                enable_incremental_vacuum()
+            st.rerun()
+    
+    # =========================================================================
+    # 儲存空間
+    # =========================================================================
+    st.subheader("📦 儲存空間")
+    # 統計需要讀取整個資料庫，資料庫未變更時使用上次的結果
+    stats = storage_stats(refresh=st.button("🔄 重新統計儲存空間"))
+    if stats["Pages"].isna().all():
+        st.info("此 SQLite 未啟用 dbstat，無法顯示各 table / 索引的頁數與大小")
+    st.caption("Rows 為最近一次 ANALYZE 的筆數（大量上傳後自動更新）；沒有筆數的 table 可按「更新統計資訊」")
+    st.dataframe(
+        stats, use_container_width=True,
+        column_config={
+            "Size_MB": st.column_config.NumberColumn(format="%.2f"),
+            "Unused_Pct": st.column_config.NumberColumn("Unused %", format="%.1f"),
+            "Fragmentation_Pct": st.column_config.NumberColumn("Fragmentation %", format="%.1f"),
+        }
+    )
+    
+    # =========================================================================
+    # 共用查詢結果
+    # =========================================================================
+    st.subheader("🧠 共用查詢結果")
+    results = result_store_stats()
+    if results.empty:
+        st.info("目前沒有保存的查詢結果")
+    else:
+        in_memory = results.loc[results["Location"] == "memory", "Size_MB"].sum()
+        st.write(f"共 {len(results)} 個結果，記憶體 {in_memory:,.1f} MB，"
+                 f"磁碟 {results['Size_MB'].sum() - in_memory:,.1f} MB")
+        st.dataframe(results, use_container_width=True, hide_index=True,
+                     column_config={"Size_MB": st.column_config.NumberColumn(format="%.2f")})
+    
+    # =========================================================================
+    # 慢查詢
+    # =========================================================================
+    st.subheader(f"🐢 慢查詢（超過 {config.SLOW_QUERY_MS} ms）")
+    slow_queries = get_slow_queries()
+    if slow_queries.empty:
+        st.info("目前沒有慢查詢紀錄")
+        return
+    st.dataframe(slow_queries, use_container_width=True)
+    if st.button("🗑️ 清除紀錄"):
+        clear_slow_queries()
+        st.rerun()
 
 
 # =============================================================================
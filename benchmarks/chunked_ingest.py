@@ -0,0 +1,91 @@
+"""
+分段上傳的去重結果
+
+同一份含重複列的 Excel，以不同的分段大小（INGEST_CHUNK_ROWS）寫入各自的資料庫，
+確認每種分段大小新增的筆數與寫入後的資料都與整份一次寫入相同（同一份 Excel 中重複的列都保留，
+先前提交的分段不會被當成已存在的資料），且重新上傳時不再新增資料。
+
+用法：
+    python benchmarks/chunked_ingest.py --rows 5000 --repeated 1000 --chunks 1000,333,50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import bom_core  # noqa: E402
+from bom_core import config  # noqa: E402
+from synthetic import make_cost_adder, make_ee_bom  # noqa: E402
+
+
+def make_workbook(rows: int, repeated: int, seed: int = 0) -> tuple:
+    """產生含重複列的 EE_BOM / Cost_Adder_Logistic（重複的列分散在整份資料中）"""
+    quarter = config.QUARTER_LIST[8]
+    ee_bom = make_ee_bom(rows, "CHUNK", quarter, seed=seed)
+    ee_bom = pd.concat([ee_bom, ee_bom.sample(repeated, replace=True, random_state=seed)])
+    cost_adder = make_cost_adder(ee_bom, seed=seed)
+    cost_adder = pd.concat([cost_adder, cost_adder.sample(len(cost_adder) // 5, random_state=seed)])
+    return (ee_bom.sample(frac=1, random_state=seed).reset_index(drop=True),
+            cost_adder.sample(frac=1, random_state=seed).reset_index(drop=True))
+
+
+def table_contents(table_name: str) -> pd.DataFrame:
+    """寫入後的資料（排除 created_at，排序後比較）"""
+    df = bom_core.query_data(table_name, {}).drop(columns="created_at", errors="ignore").astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def ingest(db_path: str, frames: tuple, chunk_rows: int) -> tuple:
+    """寫入新的資料庫，回傳 (新增筆數, 重新上傳新增筆數, 毫秒, {table: 寫入後的資料})"""
+    config.DB_PATH = db_path
+    bom_core.init_database()
+    start = time.perf_counter()
+    inserted = bom_core.ingest_workbook(*frames, chunk_rows=chunk_rows)
+    elapsed = (time.perf_counter() - start) * 1000
+    again = bom_core.ingest_workbook(*frames, chunk_rows=chunk_rows)
+    contents = {table_name: table_contents(table_name) for table_name in inserted}
+    return inserted, again, elapsed, contents
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分段上傳的去重結果")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeated", type=int, default=1000, help="重複的 EE_BOM 列數")
+    parser.add_argument("--chunks", default="1000,333,50", help="要比較的分段大小")
+    args = parser.parse_args()
+    
+    os.chdir(tempfile.mkdtemp(prefix="bom_chunked_"))
+    frames = make_workbook(args.rows, args.repeated)
+    total = {table_name: len(df) for table_name, df in zip(["EE_BOM", "Cost_Adder_Logistic"], frames)}
+    
+    # 整份一次寫入（分段大小大於資料筆數）作為基準
+    whole = sum(len(df) for df in frames)
+    expected, _, whole_ms, expected_contents = ingest("whole.db", frames, whole)
+    
+    print(f"EE_BOM {len(frames[0])} rows ({args.repeated} repeated), "
+          f"Cost_Adder_Logistic {len(frames[1])} rows")
+    print(f"{'chunk rows':>10}{'EE_BOM':>9}{'Cost_Adder':>12}{'re-upload':>11}{'ms':>9}  same")
+    print(f"{'whole':>10}{expected['EE_BOM']:>9}{expected['Cost_Adder_Logistic']:>12}"
+          f"{'':>11}{whole_ms:>9.0f}  {expected == total}")
+    
+    all_same = expected == total
+    for chunk_rows in [int(c) for c in args.chunks.split(",")]:
+        inserted, again, elapsed, contents = ingest(f"chunk_{chunk_rows}.db", frames, chunk_rows)
+        same = inserted == expected and all(
+            contents[name].equals(expected_contents[name]) for name in expected_contents
+        )
+        all_same = all_same and same and not any(again.values())
+        print(f"{chunk_rows:>10}{inserted['EE_BOM']:>9}{inserted['Cost_Adder_Logistic']:>12}"
+              f"{sum(again.values()):>11}{elapsed:>9.0f}  {same}")
+    
+    if not all_same:
+        sys.exit("分段寫入的結果與整份一次寫入不同")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+成本 cube 與直接彙總 EE_BOM 的查詢時間
+
+儀表板常用的切片（依 COMMODITY_CODE、Quarter × MANUFACTURER 等），
+比較 query_cost_cube（由 cube 再彙總）與 aggregate_data（掃描 EE_BOM 原始資料）的時間，
+並確認兩者的 EXT_COST 加總相同。
+
+用法：
+    python benchmarks/cost_cube.py --rows 400000 --quarters 4 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import bom_core  # noqa: E402
+from bom_core import config  # noqa: E402
+from synthetic import seed_database  # noqa: E402
+
+
+def best_of(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="成本 cube 與直接彙總 EE_BOM 的查詢時間")
+    parser.add_argument("--rows", type=int, default=400000)
+    parser.add_argument("--quarters", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    os.chdir(tempfile.mkdtemp(prefix="bom_cube_"))
+    seed_database("database.db", args.rows, quarters=args.quarters)
+    quarter = config.QUARTER_LIST[8]
+    
+    slices = [
+        ("COMMODITY_CODE", ["COMMODITY_CODE"], {}),
+        ("Quarter x MANUFACTURER", ["Quarter", "MANUFACTURER"], {}),
+        (f"{quarter} SUB_COMMODITY", ["SUB_COMMODITY"], {"Quarter": [quarter]}),
+        ("Project x COMMODITY", ["Project_Name", "COMMODITY_CODE"], {"Quarter": [quarter]}),
+    ]
+    
+    print(f"EE_BOM {args.rows} rows, cube {len(bom_core.query_cost_cube(config.COST_CUBE_DIMENSIONS))} cells")
+    print(f"{'slice':<28}{'EE_BOM ms':>11}{'cube ms':>10}{'speedup':>9}  same total")
+    for name, group_by, filters in slices:
+        raw = bom_core.aggregate_data("EE_BOM", group_by, filters)
+        cube = bom_core.query_cost_cube(group_by, filters)
+        same = abs(raw["EXT_COST"].sum() - cube["EXT_COST"].sum()) < 1e-6 * max(abs(raw["EXT_COST"].sum()), 1)
+        
+        raw_ms = best_of(lambda: bom_core.aggregate_data("EE_BOM", group_by, filters), args.repeat)
+        cube_ms = best_of(lambda: bom_core.query_cost_cube(group_by, filters), args.repeat)
+        print(f"{name:<28}{raw_ms:>11.1f}{cube_ms:>10.2f}{raw_ms / cube_ms:>8.0f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Excel 讀取引擎的解析速度
+
+產生一份包含 EE_BOM / Cost_Adder_Logistic 的合成 Excel，量測：
+- pd.read_excel 預設方式（openpyxl，兩個工作表依序讀取）
+- bom_core.read_sheets 搭配各個已安裝的引擎（calamine 需 pip install python-calamine）
+輸出每個引擎的解析時間與每 MB 的解析時間，並確認各引擎讀出的 DataFrame 與 pd.read_excel 相同。
+
+用法：
+    python benchmarks/excel_readers.py --rows 50000 --repeat 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bom_core import REQUIRED_SHEETS, available_engines, read_sheets  # noqa: E402
+from synthetic import make_cost_adder, make_ee_bom  # noqa: E402
+
+
+def write_workbook(path: str, rows: int):
+    ee_bom = make_ee_bom(rows, "LOAD", "FY26Q1").drop(columns=["Project_Name", "Quarter"])
+    ee_bom["Effective_Start_Date"] = pd.Timestamp("2025-03-01")
+    cost_adder = make_cost_adder(make_ee_bom(rows, "LOAD", "FY26Q1"))
+    cost_adder = cost_adder.drop(columns=["Project_Name", "Quarter"])
+    with pd.ExcelWriter(path) as writer:
+        ee_bom.to_excel(writer, sheet_name="EE_BOM", index=False)
+        cost_adder.to_excel(writer, sheet_name="Cost_Adder_Logistic", index=False)
+
+
+def read_with_pandas(path: str) -> dict:
+    with pd.ExcelFile(path) as excel_file:
+        return {name: pd.read_excel(excel_file, sheet_name=name) for name in REQUIRED_SHEETS}
+
+
+def timed(func, repeat: int) -> tuple:
+    """執行 repeat 次，回傳（中位數秒數, 最後一次的結果）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel 讀取引擎的解析速度")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    
+    path = os.path.join(tempfile.mkdtemp(prefix="bom_excel_"), "workbook.xlsx")
+    write_workbook(path, args.rows)
+    size_mb = os.path.getsize(path) / 1e6
+    print(f"{args.rows} rows, {size_mb:.2f} MB")
+    
+    baseline_time, expected = timed(lambda: read_with_pandas(path), args.repeat)
+    results = [("pd.read_excel", baseline_time, True)]
+    for engine in available_engines():
+        seconds, frames = timed(lambda: read_sheets(path, REQUIRED_SHEETS, engine), args.repeat)
+        same = all(frames[name].equals(expected[name]) for name in REQUIRED_SHEETS)
+        results.append((engine, seconds, same))
+    
+    print(f"{'engine':<16}{'seconds':>9}{'s/MB':>8}{'speedup':>9}  identical")
+    for engine, seconds, same in results:
+        print(f"{engine:<16}{seconds:>9.2f}{seconds / size_mb:>8.2f}"
+              f"{baseline_time / seconds:>8.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+報表頁面篩選條件（facet）的計算時間
+
+每次 render 報表頁面時，會計算 FACET_COLUMNS 每個欄位的選項與筆數，再計算符合條件的總筆數。
+比較每個欄位各查詢一次（直接查詢）與由 facet 彙總計算（上傳後第一次 render 需重新彙總、
+之後切換 facet 選項直接使用快取）的時間，並確認結果相同。目標為每次 render 低於 --budget 毫秒。
+
+用法：
+    python benchmarks/facets.py --rows 300000 --repeat 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import bom_core  # noqa: E402
+from bom_core import config  # noqa: E402
+from synthetic import seed_database  # noqa: E402
+
+# 與 app.py 的 FACET_OPTION_LIMIT 相同（多取一筆判斷是否還有更多選項）
+OPTION_LIMIT = 200
+
+
+def render(columns: list, filters: dict) -> tuple:
+    """報表頁面一次 render 的 facet 計算（columns：一般 facet 欄位）"""
+    filters = {col: filters.get(col, []) for col in config.METADATA_COLUMNS["EE_BOM"]}
+    facets = {
+        col: bom_core.get_facet_counts("EE_BOM", col, filters, limit=OPTION_LIMIT + 1)
+        for col in columns
+    }
+    return facets, bom_core.count_rows("EE_BOM", filters)
+
+
+def timed(func, repeat: int, before=None) -> float:
+    times = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="報表頁面 facet 的計算時間")
+    parser.add_argument("--rows", type=int, default=300000)
+    parser.add_argument("--quarters", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=300)
+    args = parser.parse_args()
+    
+    os.chdir(tempfile.mkdtemp(prefix="bom_facets_"))
+    seed_database("database.db", args.rows, quarters=args.quarters)
+    quarter = config.QUARTER_LIST[8]
+    
+    scenarios = [
+        ("no filter", {}),
+        ("Quarter", {"Quarter": [quarter]}),
+        ("Quarter + COMMODITY", {"Quarter": [quarter], "COMMODITY_CODE": ["CAP"]}),
+        ("PARENT_DPN", {"PARENT_DPN": ["PRJ0-P0001", "PRJ1-P0002"]}),
+    ]
+    facet_columns = config.FACET_COLUMNS
+    columns = facet_columns["EE_BOM"]
+    
+    print(f"EE_BOM {args.rows} rows, {len(columns)} facet columns + row count")
+    print(f"{'filters':<22}{'direct ms':>11}{'cold ms':>10}{'cached ms':>11}  same  within budget")
+    for name, filters in scenarios:
+        # 直接查詢：不使用 facet 彙總
+        config.FACET_COLUMNS = {}
+        direct = render(columns, filters)
+        direct_ms = timed(lambda: render(columns, filters), args.repeat)
+        config.FACET_COLUMNS = facet_columns
+        
+        # cold：資料版本變更後（例如剛上傳）第一次 render；cached：之後的 render
+        cold_ms = timed(lambda: render(columns, filters), args.repeat,
+                        before=lambda: bom_core.bump_data_version("EE_BOM"))
+        cached = render(columns, filters)
+        cached_ms = timed(lambda: render(columns, filters), args.repeat)
+        
+        within = max(cold_ms, cached_ms) < args.budget
+        print(f"{name:<22}{direct_ms:>11.1f}{cold_ms:>10.1f}{cached_ms:>11.1f}  "
+              f"{str(direct == cached):<5} {within}")
+
+
+if __name__ == "__main__":
+    main()
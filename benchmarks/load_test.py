@@ -0,0 +1,205 @@
+"""
+多人同時操作的壓力測試
+
+N 個模擬使用者同時執行，每次依比例隨機選擇一種操作：
+- upload：寫入一份合成 Excel（與上傳頁面「確認上傳」相同的 ingest_workbook）
+- report：報表頁面選擇 Quarter 後按「預覽資料」（Streamlit AppTest 無頭執行）
+- estimate：預估頁面按「計算預估」（Streamlit AppTest 無頭執行）
+
+--direct 時 report / estimate 改為直接呼叫 bom_core（query_data / calculate_em_mva + Excel 匯出），
+不經過 Streamlit，用來區分 UI 與資料層的延遲。
+
+輸出每種操作的次數、throughput、p50 / p95 / p99 延遲、"database is locked" 失敗次數與各類錯誤次數，
+以及在 DB_BUSY_TIMEOUT 內等到寫入鎖的次數與等待時間（成功但發生鎖競爭的情況）。
+
+用法：
+    python benchmarks/load_test.py --users 10 --duration 60 --mix upload=20,report=60,estimate=20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import bom_core  # noqa: E402
+from bom_core import config  # noqa: E402
+from synthetic import make_cost_adder, make_ee_bom, seed_database  # noqa: E402
+
+APP_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "app.py"))
+
+
+def parse_mix(text: str) -> dict:
+    """解析 "upload=20,report=60,estimate=20" 為 {操作: 權重}"""
+    mix = {}
+    for item in text.split(","):
+        name, weight = item.split("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {"upload", "report", "estimate"}
+    if unknown:
+        raise ValueError(f"未知的操作：{', '.join(sorted(unknown))}")
+    return mix
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+def is_lock_error(error) -> bool:
+    return "database is locked" in str(error) or "database table is locked" in str(error)
+
+
+class SimulatedUser:
+    """一個模擬使用者（一個 Streamlit session）"""
+    
+    def __init__(self, user_id: int, quarters: list, upload_rows: int, direct: bool):
+        self.user_id = user_id
+        self.quarters = quarters
+        self.upload_rows = upload_rows
+        self.direct = direct
+        self.rng = random.Random(user_id)
+        self.uploads = 0
+        self.app = None
+    
+    def _app(self, page: str):
+        from streamlit.testing.v1 import AppTest
+        
+        if self.app is None:
+            self.app = AppTest.from_file(APP_PATH, default_timeout=300)
+            self.app.run()
+        self.app.sidebar.radio[0].set_value(page).run()
+        return self.app
+    
+    @staticmethod
+    def _check(at):
+        """AppTest 中的例外（包含 st.error 顯示的錯誤）轉為 Python 例外"""
+        errors = [e.value for e in at.exception] + [e.value for e in at.error]
+        if errors:
+            raise RuntimeError("; ".join(str(e) for e in errors))
+    
+    def upload(self):
+        self.uploads += 1
+        quarter = self.rng.choice(self.quarters)
+        ee_bom = make_ee_bom(
+            self.upload_rows, f"LOAD{self.user_id}", quarter,
+            seed=self.user_id * 10000 + self.uploads
+        )
+        cost_adder = make_cost_adder(ee_bom, seed=self.uploads)
+        bom_core.ingest_workbook(ee_bom, cost_adder)
+    
+    def report(self):
+        quarter = self.rng.choice(self.quarters)
+        if self.direct:
+            df = bom_core.query_data("EE_BOM", {"Quarter": [quarter]})
+            bom_core.to_excel_bytes(df, "EE_BOM")
+            return
+        
+        at = self._app("產生報表")
+        at.multiselect(key="filter_EE_BOM_Quarter").set_value([quarter]).run()
+        next(b for b in at.button if "預覽資料" in b.label).click().run()
+        self._check(at)
+    
+    def estimate(self):
+        quarter = self.rng.choice(self.quarters)
+        if self.direct:
+            df = bom_core.calculate_em_mva(quarter)
+            bom_core.to_excel_bytes(df, "EM_MVA_Estimate")
+            return
+        
+        at = self._app("預估 EM/MVA")
+        at.selectbox[0].set_value(quarter).run()
+        next(b for b in at.button if "計算預估" in b.label).click().run()
+        self._check(at)
+
+
+def run_user(user: SimulatedUser, mix: dict, deadline: float, results: dict,
+             lock: threading.Lock):
+    operations = list(mix)
+    weights = [mix[op] for op in operations]
+    while time.perf_counter() < deadline:
+        op = user.rng.choices(operations, weights)[0]
+        start = time.perf_counter()
+        error = None
+        try:
+            getattr(user, op)()
+        except Exception as e:
+            # 任何錯誤都只記錄，繼續下一次操作（不中斷這個使用者的 thread）
+            error = e
+        elapsed = (time.perf_counter() - start) * 1000
+        
+        with lock:
+            stats = results[op]
+            if error is None:
+                stats["latencies"].append(elapsed)
+            elif is_lock_error(error):
+                stats["locked"] += 1
+            else:
+                error_type = type(error).__name__
+                stats["errors"][error_type] += 1
+                stats["samples"].setdefault(error_type, str(error))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多人同時操作的壓力測試")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=60, help="秒")
+    parser.add_argument("--mix", default="upload=20,report=60,estimate=20")
+    parser.add_argument("--rows", type=int, default=50000, help="初始資料筆數")
+    parser.add_argument("--upload-rows", type=int, default=2000, help="每次上傳的 EE_BOM 筆數")
+    parser.add_argument("--direct", action="store_true", help="不經過 Streamlit，直接呼叫 bom_core")
+    args = parser.parse_args()
+    
+    mix = parse_mix(args.mix)
+    
+    workdir = tempfile.mkdtemp(prefix="bom_load_")
+    os.chdir(workdir)
+    seed_database("database.db", args.rows)
+    bom_core.refresh_metadata()
+    quarters = config.QUARTER_LIST[8:12]
+    
+    results = defaultdict(lambda: {"latencies": [], "locked": 0, "errors": Counter(), "samples": {}})
+    lock = threading.Lock()
+    users = [SimulatedUser(i, quarters, args.upload_rows, args.direct) for i in range(args.users)]
+    
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(target=run_user, args=(user, mix, deadline, results, lock))
+        for user in users
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    waits = bom_core.get_lock_waits()
+    
+    print(f"{args.users} users, {wall:.1f}s, mix {args.mix}, "
+          f"{'direct' if args.direct else 'AppTest'}")
+    print(f"{'operation':<10}{'ok':>7}{'ops/s':>8}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'locked':>8}{'errors':>8}")
+    for op in mix:
+        stats = results[op]
+        latencies = stats["latencies"]
+        if latencies:
+            p50, p95, p99 = (percentile(latencies, p) for p in (50, 95, 99))
+        else:
+            p50 = p95 = p99 = float("nan")
+        print(f"{op:<10}{len(latencies):>7}{len(latencies) / wall:>8.2f}{p50:>10.1f}"
+              f"{p95:>10.1f}{p99:>10.1f}{stats['locked']:>8}{sum(stats['errors'].values()):>8}")
+    
+    print(f"lock waits (resolved within {config.DB_BUSY_TIMEOUT:g}s): {waits['Waits']}, "
+          f"total {waits['Total_ms']:.0f} ms, max {waits['Max_ms']:.0f} ms")
+    for op in mix:
+        for error_type, count in results[op]["errors"].most_common():
+            print(f"[{op}] {error_type} x{count}: {results[op]['samples'][error_type][:200]}")
+
+
+if __name__ == "__main__":
+    main()
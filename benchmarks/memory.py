@@ -0,0 +1,63 @@
+"""
+查詢結果的記憶體用量
+
+量測載入單一 Quarter 的 EE_BOM（query_data）與預估結果（calculate_em_mva）的記憶體用量，
+比較一般 DataFrame 與精簡表示（COMPACT_RESULTS：category / 整數 downcast），
+以及 chunksize 逐批讀取時單批的最大用量。
+
+用法：
+    python benchmarks/memory.py --rows 400000 --quarters 4 --chunksize 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import bom_core  # noqa: E402
+from bom_core import config  # noqa: E402
+from synthetic import seed_database  # noqa: E402
+
+
+def frame_bytes(df) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查詢結果的記憶體用量")
+    parser.add_argument("--rows", type=int, default=400000)
+    parser.add_argument("--quarters", type=int, default=4)
+    parser.add_argument("--chunksize", type=int, default=20000)
+    args = parser.parse_args()
+    
+    os.chdir(tempfile.mkdtemp(prefix="bom_memory_"))
+    seed_database("database.db", args.rows, quarters=args.quarters)
+    quarter = config.QUARTER_LIST[8]
+    filters = {"Quarter": [quarter]}
+    
+    results = {}
+    for compact in (False, True):
+        config.COMPACT_RESULTS = compact
+        bom_core.clear_rollup_cache()
+        results[compact] = {
+            "query_data": frame_bytes(bom_core.query_data("EE_BOM", filters)),
+            "calculate_em_mva": frame_bytes(bom_core.calculate_em_mva(quarter)),
+        }
+    
+    rows = len(bom_core.query_data("EE_BOM", filters))
+    print(f"{quarter}: {rows} rows")
+    print(f"{'result':<20}{'plain MB':>10}{'compact MB':>12}{'ratio':>8}")
+    for name in results[False]:
+        plain, compact = results[False][name], results[True][name]
+        print(f"{name:<20}{plain / 1e6:>10.2f}{compact / 1e6:>12.2f}{plain / compact:>7.1f}x")
+    
+    chunk_peak = max(
+        frame_bytes(chunk)
+        for chunk in bom_core.query_data("EE_BOM", filters, chunksize=args.chunksize)
+    )
+    print(f"query_data(chunksize={args.chunksize}): largest chunk {chunk_peak / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
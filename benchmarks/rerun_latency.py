@@ -0,0 +1,66 @@
+"""
+量測 Streamlit 冷啟動與每次互動（rerun）的延遲
+
+以 Streamlit AppTest 無頭執行 app.py：
+- cold start：第一次執行（含 import 與資料庫初始化）
+- rerun：切換到各頁面後重複 rerun 的延遲（p50 / p95）
+
+用法：
+    python benchmarks/rerun_latency.py --rows 50000 --reruns 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from synthetic import seed_database  # noqa: E402
+
+APP_PATH = os.path.join(os.path.dirname(__file__), "..", "app.py")
+PAGES = ["維護 Project/Parent_DPN", "預估 EM/MVA", "上傳資料", "產生報表", "BOM 差異比較"]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="量測 Streamlit rerun 延遲")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--reruns", type=int, default=20)
+    args = parser.parse_args()
+    
+    from streamlit.testing.v1 import AppTest
+    
+    workdir = tempfile.mkdtemp(prefix="bom_bench_")
+    os.chdir(workdir)
+    seed_database("database.db", args.rows)
+    
+    import bom_core
+    bom_core.refresh_metadata()
+    
+    start = time.perf_counter()
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    at.run()
+    print(f"cold start: {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    for page in PAGES:
+        at.sidebar.radio[0].set_value(page).run()
+        timings = []
+        for _ in range(args.reruns):
+            start = time.perf_counter()
+            at.run()
+            timings.append((time.perf_counter() - start) * 1000)
+        print(
+            f"{page:<24} rerun p50 {statistics.median(timings):7.1f} ms"
+            f"  p95 {percentile(timings, 95):7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+PARENT_DPN 階層成本彙總的計算時間
+
+產生一個 --nodes 個 PARENT_DPN 的隨機 BOM 森林（每個組件另有 --leaves 個直屬料件），
+量測 compute_rollup 的時間。
+
+用法：
+    python benchmarks/rollup.py --nodes 100000 --leaves 3 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bom_core.rollup import compute_rollup  # noqa: E402
+
+
+def make_forest(nodes: int, leaves: int, roots: int = 100, seed: int = 0) -> pd.DataFrame:
+    """隨機 BOM 森林：每個非根節點接在編號較小的節點下"""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(roots, nodes)
+    parents = (rng.random(len(ids)) * ids).astype(int)
+    
+    leaf_parents = np.repeat(np.arange(nodes), leaves)
+    return pd.DataFrame({
+        "PARENT_DPN": np.concatenate([parents, leaf_parents]).astype(str),
+        "DPN": np.concatenate([
+            ids.astype(str),
+            [f"L{i}" for i in range(len(leaf_parents))],
+        ]),
+        "EXT_COST": rng.random(len(ids) + len(leaf_parents)),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PARENT_DPN 階層成本彙總的計算時間")
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--leaves", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    edges = make_forest(args.nodes, args.leaves)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        rollup = compute_rollup(edges)
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    print(f"{args.nodes} nodes, {len(edges)} edges, depth {rollup['Depth'].max()}")
+    print(f"compute_rollup: best {min(timings):.1f} ms, median {sorted(timings)[len(timings) // 2]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+比較 SQLite 與 DuckDB/Parquet 儲存引擎
+
+兩個引擎寫入相同的合成資料後，量測：
+- 單一 Quarter 依 PARENT_DPN 彙總 EXT_COST（aggregate_data）
+- 所有 Quarter 依 COMMODITY_CODE × MANUFACTURER 彙總
+- 讀出單一 Quarter 的完整資料（query_data）
+- 預估 EM/MVA（calculate_em_mva）
+
+用法（需安裝 duckdb）：
+    python benchmarks/storage_engines.py --rows 400000 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import bom_core  # noqa: E402
+from bom_core import config  # noqa: E402
+from synthetic import seed_database  # noqa: E402
+
+
+def timed(func, repeat: int) -> float:
+    """執行 repeat 次，回傳中位數（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比較 SQLite 與 DuckDB/Parquet 儲存引擎")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--quarters", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix="bom_engines_")
+    quarter = config.QUARTER_LIST[8]
+    
+    workloads = {
+        "quarter aggregate (PARENT_DPN)": lambda: bom_core.aggregate_data(
+            "EE_BOM", ["PARENT_DPN"], {"Quarter": [quarter]}
+        ),
+        "all quarters aggregate (COMMODITY x MFR)": lambda: bom_core.aggregate_data(
+            "EE_BOM", ["Quarter", "COMMODITY_CODE", "MANUFACTURER"]
+        ),
+        "query_data (one quarter)": lambda: bom_core.query_data(
+            "EE_BOM", {"Quarter": [quarter]}
+        ),
+        "calculate_em_mva": lambda: bom_core.calculate_em_mva(quarter),
+    }
+    
+    results = {}
+    for engine in ["sqlite", "duckdb"]:
+        db_path = os.path.join(workdir, f"{engine}.db")
+        start = time.perf_counter()
+        seed_database(db_path, args.rows, args.quarters, engine=engine,
+                      parquet_dir=os.path.join(workdir, "parquet"))
+        print(f"[{engine}] ingest {args.rows} rows: {time.perf_counter() - start:.1f}s")
+        results[engine] = {name: timed(func, args.repeat) for name, func in workloads.items()}
+    
+    print(f"\n{'workload':<42}{'sqlite ms':>12}{'duckdb ms':>12}{'speedup':>10}")
+    for name in workloads:
+        sqlite_ms = results["sqlite"][name]
+        duckdb_ms = results["duckdb"][name]
+        print(f"{name:<42}{sqlite_ms:>12.1f}{duckdb_ms:>12.1f}{sqlite_ms / duckdb_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
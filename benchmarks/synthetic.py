@@ -0,0 +1,126 @@
+"""
+產生 benchmark 用的合成 BOM 資料
+
+用法：
+    python benchmarks/synthetic.py --db bench.db --rows 200000 --quarters 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import bom_core  # noqa: E402
+from bom_core import config  # noqa: E402
+
+COMMODITIES = {
+    "CAP": ["MLCC", "Tantalum", "Aluminum"],
+    "RES": ["Chip", "Network", "Current Sense"],
+    "IC": ["PMIC", "MCU", "Memory", "Logic"],
+    "IND": ["Power", "Ferrite Bead"],
+    "CONN": ["Board to Board", "USB", "FPC"],
+}
+MANUFACTURERS = ["Murata", "TDK", "Yageo", "Samsung", "Vishay", "TI", "ADI", "Infineon"]
+MPN_PREFIX = {"Murata": "GRM", "TDK": "C", "Yageo": "RC", "Samsung": "CL",
+              "Vishay": "CRCW", "TI": "TPS", "ADI": "LT", "Infineon": "IRF"}
+
+
+def make_ee_bom(rows: int, project_name: str, quarter: str,
+                parents: int = 200, seed: int = 0) -> pd.DataFrame:
+    """產生一份 EE_BOM 工作表內容（含 Project_Name 與 Quarter）"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(rows):
+        commodity = rng.choice(list(COMMODITIES))
+        manufacturer = rng.choice(MANUFACTURERS)
+        records.append({
+            "Project_Name": project_name,
+            "PARENT_DPN": f"{project_name}-P{i % parents:04d}",
+            "COMMODITY_CODE": commodity,
+            "SUB_COMMODITY": rng.choice(COMMODITIES[commodity]),
+            "DPN": f"D{i:07d}",
+            "ODM_PN": f"ODM-{i:07d}",
+            "MANUFACTURER": manufacturer,
+            "MPN": f"{MPN_PREFIX[manufacturer]}{rng.randint(100, 999)}-{i:06d}",
+            "EM_DM": rng.choice(["EM", "DM"]),
+            "QTY": rng.randint(1, 20),
+            "EXT_COST": round(rng.random() * 2, 4),
+            "BOM_COMMENT": rng.choice(["", "", "", "Concession"]),
+            "Quarter": quarter,
+        })
+    return pd.DataFrame(records)
+
+
+def make_cost_adder(ee_bom: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """依 EE_BOM 的 PARENT_DPN 產生 Cost_Adder_Logistic 工作表內容"""
+    rng = random.Random(seed)
+    parents = ee_bom[["Project_Name", "PARENT_DPN", "Quarter"]].drop_duplicates()
+    records = []
+    for row in parents.itertuples():
+        for category in ["MVA", "Logistic", "Adder"]:
+            records.append({
+                "Project_Name": row.Project_Name,
+                "Parent_DPN": row.PARENT_DPN,
+                "Sub_Cost_Category": category,
+                "Region": rng.choice(["TW", "CN", "MX"]),
+                "Unit_Cost": round(rng.random() * 50, 2),
+                "Quarter": row.Quarter,
+            })
+    return pd.DataFrame(records)
+
+
+def seed_database(db_path: str, rows: int, quarters: int = 4,
+                  projects: int = 3, engine: str = "sqlite",
+                  parquet_dir: str = None) -> dict:
+    """
+    建立合成資料庫，每個 Quarter × Project 各寫入 rows / (quarters × projects) 筆
+    engine = "duckdb" 時 EE_BOM / Cost_Adder_Logistic 寫入 parquet_dir
+    """
+    config.DB_PATH = db_path
+    config.STORAGE_ENGINE = engine
+    if parquet_dir:
+        config.PARQUET_DIR = parquet_dir
+    bom_core.init_database()
+    
+    per_batch = max(rows // (quarters * projects), 1)
+    counts = {"EE_BOM": 0, "Cost_Adder_Logistic": 0}
+    for q_idx, quarter in enumerate(config.QUARTER_LIST[8:8 + quarters]):
+        for p_idx in range(projects):
+            seed = q_idx * 100 + p_idx
+            ee_bom = make_ee_bom(per_batch, f"PRJ{p_idx}", quarter, seed=seed)
+            counts["EE_BOM"] += bom_core.insert_data("EE_BOM", ee_bom)
+            counts["Cost_Adder_Logistic"] += bom_core.insert_data(
+                "Cost_Adder_Logistic", make_cost_adder(ee_bom, seed=seed)
+            )
+    
+    bom_core.ensure_indexes("EE_BOM")
+    bom_core.ensure_indexes("Cost_Adder_Logistic")
+    bom_core.refresh_search_index()
+    bom_core.rebuild_cost_cube()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="產生合成 BOM 資料庫")
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--quarters", type=int, default=4)
+    parser.add_argument("--projects", type=int, default=3)
+    parser.add_argument("--engine", choices=["sqlite", "duckdb"], default="sqlite")
+    parser.add_argument("--parquet-dir", default="parquet")
+    args = parser.parse_args()
+    
+    if os.path.exists(args.db):
+        os.remove(args.db)
+    start = time.perf_counter()
+    counts = seed_database(args.db, args.rows, args.quarters, args.projects,
+                           args.engine, args.parquet_dir)
+    print(f"{counts} in {time.perf_counter() - start:.1f}s -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+BOM 資料引擎：上傳、查詢、預估與匯出
+
+不依賴 Streamlit，可直接用於排程工作或其他程式：
+
+    from bom_core import config, init_database, query_data
+    
+    config.DB_PATH = "/data/database.db"
+    init_database()
+    df = query_data("EE_BOM", {"Quarter": ["FY26Q1"]})
+"""
+from . import config
+from .config import COST_CUBE_DIMENSIONS, METADATA_COLUMNS, QUARTER_LIST, QUARTER_TABLE, SEARCH_COLUMNS
+from .compact import compact_frame
+from .cube import add_to_cost_cube, query_cost_cube, rebuild_cost_cube
+from .db import (
+    aggregate_data,
+    bump_data_version,
+    build_where_clause,
+    count_rows,
+    get_all_data,
+    get_all_project_names,
+    get_data_versions,
+    get_db_connection,
+    get_facet_counts,
+    get_plant_generation,
+    get_project_mva_info,
+    get_table_columns,
+    insert_data,
+    insert_new_rows,
+    is_wildcard,
+    iter_query,
+    query_data,
+    read_query,
+    run_query,
+    table_exists,
+    upsert_plant_generation,
+    upsert_project_mva_info,
+)
+from .diff import (
+    calculate_bom_diff,
+    export_bom_diff_csv,
+    get_upload_batches,
+    iter_bom_diff,
+    summarize_bom_diff,
+)
+from .estimate import ESTIMATE_SOURCE_TABLES, calculate_em_mva, is_empty_value
+from .excel import available_engines, read_sheet, read_sheets
+from .export import to_excel_bytes
+from .export_cache import (
+    cached_export,
+    content_digest,
+    evict_export_cache,
+    invalidate_export_cache,
+)
+from .feed import export_changes, get_changes, get_feed_watermark, iter_changes
+from .ingest import (
+    REQUIRED_SHEETS,
+    MissingSheetsError,
+    get_interrupted_uploads,
+    ingest_workbook,
+    load_workbook,
+    parse_project_name,
+    prepare_workbook,
+    read_workbook,
+    workbook_id,
+)
+from .maintenance import (
+    checkpoint_wal,
+    database_summary,
+    enable_incremental_vacuum,
+    incremental_vacuum,
+    optimize_database,
+    run_idle_maintenance,
+    start_maintenance_scheduler,
+    storage_stats,
+)
+from .metadata import load_metadata, refresh_metadata, save_metadata
+from .quarters import (
+    date_to_quarter,
+    get_current_quarter,
+    get_next_quarter,
+    get_quarter_distance,
+)
+from .querylog import clear_slow_queries, get_lock_waits, get_slow_queries
+from .result_store import (
+    acquire_result,
+    clear_result_store,
+    evict_results,
+    get_result,
+    release_result,
+    result_entry_id,
+    result_key,
+    result_store_stats,
+    store_result,
+)
+from .rollup import clear_rollup_cache, compute_rollup, get_bom_rollup
+from .schema import (
+    archive_old_quarters,
+    ensure_indexes,
+    init_database,
+    partition_existing_tables,
+)
+from .search import add_to_search_index, refresh_search_index, search_part_numbers
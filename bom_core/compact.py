@@ -0,0 +1,35 @@
+"""
+查詢結果的精簡表示
+
+重複值多的字串欄位（Project_Name、MANUFACTURER、Quarter…）轉為 category，
+每個值只存一次，各列只存整數代碼；整數欄位改用能容納所有值的最小型別。
+浮點數（EXT_COST 等）維持 float64：float32 加總時會以 float32 累計，成本合計會產生誤差。
+"""
+import pandas as pd
+
+from . import config
+
+
+def _is_text(series: pd.Series) -> bool:
+    return series.dtype == object or pd.api.types.is_string_dtype(series.dtype)
+
+
+def compact_frame(df: pd.DataFrame, max_category_ratio: float = None) -> pd.DataFrame:
+    """
+    精簡 df 的記憶體用量（原地轉換欄位型別後回傳）
+    - 不重複值比例不超過 max_category_ratio（預設 CATEGORY_MAX_RATIO）的字串欄位 → category
+    - 整數 → 能容納所有值的最小整數型別
+    """
+    if df.empty:
+        return df
+    
+    max_ratio = config.CATEGORY_MAX_RATIO if max_category_ratio is None else max_category_ratio
+    rows = len(df)
+    for col in df.columns:
+        series = df[col]
+        if _is_text(series):
+            if series.nunique(dropna=True) <= rows * max_ratio:
+                df[col] = series.astype("category")
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast="integer")
+    return df
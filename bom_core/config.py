@@ -0,0 +1,198 @@
+"""設定：資料庫路徑、追蹤欄位、Quarter 對照表等"""
+import os
+
+# 資料庫與 metadata 檔案路徑（可在執行期間修改，例如排程工作或 benchmark 指向其他檔案）
+DB_PATH = "database.db"
+METADATA_PATH = "metadata.json"
+
+# 儲存引擎："sqlite"（預設）或 "duckdb"（EE_BOM / Cost_Adder_Logistic 改存為 Parquet，需安裝 duckdb）
+STORAGE_ENGINE = os.environ.get("BOM_STORAGE_ENGINE", "sqlite")
+PARQUET_DIR = os.environ.get("BOM_PARQUET_DIR", "parquet")
+
+# 欄式儲存引擎管理的資料表，以及 Parquet 的分區欄位
+COLUMNAR_TABLES = ["EE_BOM", "Cost_Adder_Logistic"]
+PARTITION_COLUMNS = ["Quarter", "Project_Name"]
+
+# SQLite 依 Quarter 分區（每個 Quarter 一張 table，例如 EE_BOM__FY26Q1），
+# 超過 ARCHIVE_AFTER_QUARTERS 季的分區可封存到 ARCHIVE_DIR 下的唯讀封存資料庫（archive.db）
+PARTITION_BY_QUARTER = os.environ.get("BOM_PARTITION_BY_QUARTER", "0") == "1"
+PARTITIONED_TABLES = ["EE_BOM", "Cost_Adder_Logistic"]
+ARCHIVE_DIR = os.environ.get("BOM_ARCHIVE_DIR", "archive")
+ARCHIVE_AFTER_QUARTERS = 8
+
+# 連線池：每個資料庫檔案最多保留的閒置連線數
+DB_POOL_SIZE = 8
+
+# 等待其他連線釋放寫入鎖的上限（秒），超過時拋出 "database is locked"
+DB_BUSY_TIMEOUT = 5.0
+
+# 以唯讀方式開啟資料庫（只讀取的命令列工具，例如 python -m bom_core.feed）
+DB_READ_ONLY = False
+
+# 上傳：每累積多少筆提交一次 transaction（並記錄 checkpoint，中斷後從下一段繼續）
+INGEST_CHUNK_ROWS = 50000
+INGEST_JOBS_TABLE = "Ingest_Jobs"
+INGEST_CHECKPOINT_TABLE = "Ingest_Checkpoint"
+
+# 資料庫維護：
+# - journal mode（WAL 讓讀取不會被寫入擋住，由維護工作定期 checkpoint）
+# - 單次上傳新增超過 ANALYZE_AFTER_ROWS 筆時執行 ANALYZE，否則只執行 PRAGMA optimize
+# - 每 MAINTENANCE_INTERVAL_SECONDS 秒檢查一次，資料庫閒置超過 MAINTENANCE_IDLE_SECONDS 秒時
+#   執行 incremental vacuum（每次最多 VACUUM_PAGES_PER_RUN 頁）與 WAL checkpoint
+DB_JOURNAL_MODE = os.environ.get("BOM_JOURNAL_MODE", "wal")
+ANALYZE_AFTER_ROWS = 10000
+MAINTENANCE_INTERVAL_SECONDS = 300
+MAINTENANCE_IDLE_SECONDS = 60
+VACUUM_PAGES_PER_RUN = 2000
+
+# 慢查詢紀錄：超過 SLOW_QUERY_MS 毫秒的查詢，保留最近 SLOW_QUERY_LOG_SIZE 筆
+SLOW_QUERY_MS = 500
+SLOW_QUERY_LOG_SIZE = 200
+
+# 各資料表的資料版本（每次寫入遞增，匯出快取以此判斷檔案是否過期）
+DATA_VERSIONS_TABLE = "Data_Versions"
+
+# 匯出檔案快取：超過 EXPORT_CACHE_MAX_BYTES 時刪除最久未使用的檔案
+EXPORT_CACHE_DIR = os.environ.get("BOM_EXPORT_CACHE_DIR", "export_cache")
+EXPORT_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+# Excel 讀取引擎："auto"（有安裝 python-calamine 時使用 calamine，否則 openpyxl）、"calamine" 或 "openpyxl"
+# EE_BOM 與 Cost_Adder_Logistic 兩個工作表同時解析
+EXCEL_READER_ENGINE = os.environ.get("BOM_EXCEL_ENGINE", "auto")
+EXCEL_READER_WORKERS = 2
+
+# 查詢結果精簡表示：不重複值比例不超過 CATEGORY_MAX_RATIO 的字串欄位轉為 category
+COMPACT_RESULTS = True
+CATEGORY_MAX_RATIO = 0.5
+
+# Metadata 要追蹤的欄位
+METADATA_COLUMNS = {
+    "EE_BOM": [
+        "Project_Name",
+        "PARENT_DPN",
+        "COMMODITY_CODE",
+        "SUB_COMMODITY",
+        "DPN",
+        "ODM_PN",
+        "MANUFACTURER",
+        "MPN",
+        "EM_DM",
+        "Quarter",
+    ],
+    "Cost_Adder_Logistic": [
+        "Project_Name",
+        "Parent_DPN",
+        "Sub_Cost_Category",
+        "Region",
+        "Quarter",
+    ],
+}
+
+# Quarter 對照表
+QUARTER_TABLE = [
+    ("FY24Q1", "2023-02-04", "2023-05-05"),
+    ("FY24Q2", "2023-05-06", "2023-08-04"),
+    ("FY24Q3", "2023-08-05", "2023-11-03"),
+    ("FY24Q4", "2023-11-04", "2024-02-02"),
+    ("FY25Q1", "2024-02-03", "2024-05-03"),
+    ("FY25Q2", "2024-05-04", "2024-08-02"),
+    ("FY25Q3", "2024-08-03", "2024-11-01"),
+    ("FY25Q4", "2024-11-02", "2025-01-31"),
+    ("FY26Q1", "2025-02-01", "2025-05-02"),
+    ("FY26Q2", "2025-05-03", "2025-08-01"),
+    ("FY26Q3", "2025-08-02", "2025-10-31"),
+    ("FY26Q4", "2025-11-01", "2026-01-30"),
+    ("FY27Q1", "2026-01-31", "2026-05-01"),
+    ("FY27Q2", "2026-05-02", "2026-07-31"),
+    ("FY27Q3", "2026-08-01", "2026-10-30"),
+    ("FY27Q4", "2026-10-31", "2027-01-29"),
+    ("FY28Q1", "2027-01-30", "2027-04-30"),
+    ("FY28Q2", "2027-05-01", "2027-07-30"),
+    ("FY28Q3", "2027-07-31", "2027-10-29"),
+    ("FY28Q4", "2027-10-30", "2028-01-28"),
+    ("FY29Q1", "2028-01-29", "2028-04-28"),
+    ("FY29Q2", "2028-04-29", "2028-07-28"),
+    ("FY29Q3", "2028-07-29", "2028-10-27"),
+    ("FY29Q4", "2028-10-28", "2029-02-02"),
+    ("FY30Q1", "2029-02-03", "2029-05-04"),
+    ("FY30Q2", "2029-05-05", "2029-08-03"),
+    ("FY30Q3", "2029-08-04", "2029-11-02"),
+    ("FY30Q4", "2029-11-03", "2030-02-01"),
+    ("FY31Q1", "2030-02-02", "2030-05-03"),
+    ("FY31Q2", "2030-05-04", "2030-08-02"),
+    ("FY31Q3", "2030-08-03", "2030-11-01"),
+    ("FY31Q4", "2030-11-02", "2031-01-31"),
+    ("FY32Q1", "2031-02-01", "2031-05-02"),
+    ("FY32Q2", "2031-05-03", "2031-08-01"),
+    ("FY32Q3", "2031-08-02", "2031-10-31"),
+    ("FY32Q4", "2031-11-01", "2032-01-30"),
+    ("FY33Q1", "2032-01-31", "2032-04-30"),
+    ("FY33Q2", "2032-05-01", "2032-07-30"),
+    ("FY33Q3", "2032-07-31", "2032-10-29"),
+    ("FY33Q4", "2032-10-30", "2033-01-28"),
+    ("FY34Q1", "2033-01-29", "2033-04-29"),
+    ("FY34Q2", "2033-04-30", "2033-07-29"),
+    ("FY34Q3", "2033-07-30", "2033-10-28"),
+    ("FY34Q4", "2033-10-29", "2034-02-03"),
+    ("FY35Q1", "2034-02-04", "2034-05-05"),
+    ("FY35Q2", "2034-05-06", "2034-08-04"),
+    ("FY35Q3", "2034-08-05", "2034-11-03"),
+    ("FY35Q4", "2034-11-04", "2035-02-02"),
+]
+
+# 建立 Quarter 列表（用於下拉選單）
+QUARTER_LIST = [q[0] for q in QUARTER_TABLE]
+
+# 料號類高基數欄位：改用搜尋（trigram 全文索引）而非列出所有值
+SEARCH_COLUMNS = {
+    "EE_BOM": ["PARENT_DPN", "DPN", "ODM_PN", "MPN"],
+}
+SEARCH_INDEX_TABLE = "PartNumber_Search"
+# 已建立索引的料號（上傳時只加入尚未建立索引的值）
+SEARCH_VALUES_TABLE = "PartNumber_Search_Values"
+SEARCH_RESULT_LIMIT = 50
+
+# Facet 篩選欄位（料號類欄位以外的篩選欄位）：所有欄位的選項筆數由同一次 GROUP BY 取得，
+# 依資料版本快取 FACET_CACHE_SIZE 組（不同的料號篩選條件各一組）
+FACET_COLUMNS = {
+    table_name: [col for col in columns if col not in SEARCH_COLUMNS.get(table_name, [])]
+    for table_name, columns in METADATA_COLUMNS.items()
+}
+FACET_CACHE_SIZE = 32
+
+# 額外的複合索引（BOM 差異比較依 Quarter / 上傳批次取出一側，再以 key 欄位 join）
+COMPOSITE_INDEXES = {
+    "EE_BOM": [
+        ("Quarter", "PARENT_DPN", "DPN"),
+        ("created_at", "PARENT_DPN", "DPN"),
+        # facet 彙總的 covering index（與 FACET_COLUMNS 同順序，GROUP BY 不需讀取資料列）
+        tuple(FACET_COLUMNS["EE_BOM"]),
+    ],
+    # 變更紀錄依上傳批次（created_at）讀取
+    "Cost_Adder_Logistic": [
+        ("created_at",),
+    ],
+}
+
+# BOM 差異比較：以 (PARENT_DPN, DPN) 對齊，比較以下欄位
+DIFF_KEY_COLUMNS = ["PARENT_DPN", "DPN"]
+DIFF_COMPARE_COLUMNS = ["MANUFACTURER", "MPN", "EXT_COST"]
+
+# 成本 cube：EE_BOM 依以下維度預先彙總 EXT_COST 與筆數，上傳時只加上新增資料的彙總
+COST_CUBE_TABLE = "EE_BOM_Cost_Cube"
+COST_CUBE_DIMENSIONS = ["Quarter", "Project_Name", "COMMODITY_CODE", "SUB_COMMODITY", "MANUFACTURER"]
+
+# 變更紀錄（change feed）：上傳完成時依提交順序給予遞增的序號（Ingest_Jobs.Seq），
+# 下游以序號作為 watermark，只匯出之後完成的上傳批次；每個檔案最多 FEED_CHUNK_ROWS 筆
+FEED_TABLES = ["EE_BOM", "Cost_Adder_Logistic"]
+FEED_CHUNK_ROWS = 100000
+
+# 跨 session 共用的查詢結果：記憶體超過 RESULT_STORE_MAX_MEMORY 時，最久未使用的結果寫到 RESULT_STORE_DIR
+# （Arrow 檔案，需要 pyarrow），磁碟超過 RESULT_STORE_MAX_DISK 時刪除；
+# 沒有 session 持有的結果閒置 RESULT_STORE_TTL_SECONDS 秒後移除，
+# session 關閉後留下的參照（Streamlit 不會通知）閒置 RESULT_STORE_HOLD_SECONDS 秒後移除
+RESULT_STORE_DIR = os.environ.get("BOM_RESULT_STORE_DIR", "result_store")
+RESULT_STORE_MAX_MEMORY = 512 * 1024 * 1024
+RESULT_STORE_MAX_DISK = 2 * 1024 * 1024 * 1024
+RESULT_STORE_TTL_SECONDS = 600
+RESULT_STORE_HOLD_SECONDS = 3600
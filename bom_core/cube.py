@@ -0,0 +1,139 @@
+"""
+EE_BOM 成本 cube
+
+依 COST_CUBE_DIMENSIONS（Quarter × Project_Name × COMMODITY_CODE × SUB_COMMODITY × MANUFACTURER）
+預先彙總 EXT_COST 與筆數，存放在 COST_CUBE_TABLE。
+寫入 EE_BOM 時（上傳或 insert_data）在同一個 transaction 中，把新增資料的彙總累加到 cube（中斷續傳不會重複計算）；
+成本儀表板的切片與下鑽都由 cube 再彙總，不讀取 EE_BOM 原始資料。
+
+空值維度存為空字串：主鍵中的 NULL 彼此不相等，無法以 ON CONFLICT 累加。
+"""
+import pandas as pd
+
+from .config import COST_CUBE_DIMENSIONS, COST_CUBE_TABLE
+from .db import (
+    build_where_clause,
+    get_db_connection,
+    get_table_columns,
+    read_query,
+    table_exists,
+)
+
+# cube 的量值欄位
+CUBE_MEASURES = ["EXT_COST", "Rows"]
+
+
+def _group_cells(frame: pd.DataFrame) -> pd.DataFrame:
+    """將維度欄位的空值轉為空字串（缺少的維度欄位補空字串），再依維度加總量值"""
+    cells = pd.DataFrame(index=frame.index)
+    for col in COST_CUBE_DIMENSIONS:
+        if col in frame.columns:
+            values = frame[col].astype(object)
+            cells[col] = values.where(values.notna(), "")
+        else:
+            cells[col] = ""
+    cells["EXT_COST"] = pd.to_numeric(frame["EXT_COST"], errors="coerce").fillna(0)
+    cells["Rows"] = frame["Rows"]
+    return cells.groupby(COST_CUBE_DIMENSIONS, sort=False).sum().reset_index()
+
+
+def _write_cells(conn, cells: pd.DataFrame):
+    """將彙總結果累加到 cube（已存在的 cell 加上新的 EXT_COST 與筆數）"""
+    if cells.empty:
+        return
+    columns = COST_CUBE_DIMENSIONS + CUBE_MEASURES
+    placeholders = ", ".join("?" for _ in columns)
+    conn.executemany(
+        f"""
+        INSERT INTO {COST_CUBE_TABLE} ({", ".join(columns)}) VALUES ({placeholders})
+        ON CONFLICT ({", ".join(COST_CUBE_DIMENSIONS)}) DO UPDATE SET
+            EXT_COST = EXT_COST + excluded.EXT_COST,
+            Rows = Rows + excluded.Rows
+        """,
+        cells[columns].astype(object).values.tolist()
+    )
+
+
+def add_to_cost_cube(conn, new_rows: pd.DataFrame):
+    """
+    將新增的 EE_BOM 資料累加到 cube（insert_new_rows 寫入 EE_BOM 時呼叫）
+    在呼叫端的連線 / transaction 中寫入，與 EE_BOM 的寫入一起提交或 rollback
+    """
+    if new_rows.empty:
+        return
+    # cube 尚未建立（建立失敗）時略過，下次 init_database 會由 EE_BOM 完整重建
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (COST_CUBE_TABLE,))
+    if cursor.fetchone() is None:
+        return
+    if "EXT_COST" not in new_rows.columns:
+        new_rows = new_rows.assign(EXT_COST=0)
+    _write_cells(conn, _group_cells(new_rows.assign(Rows=1)))
+
+
+def _create_cube_table(conn):
+    """建立 cube table：各維度組合的 EXT_COST 與筆數（空值維度存為空字串）"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {COST_CUBE_TABLE} (
+            {", ".join(f"{col} TEXT" for col in COST_CUBE_DIMENSIONS)},
+            EXT_COST REAL,
+            Rows INTEGER,
+            PRIMARY KEY ({", ".join(COST_CUBE_DIMENSIONS)})
+        )
+    """)
+
+
+def rebuild_cost_cube() -> int:
+    """
+    由 EE_BOM 重新建立整個 cube（既有資料庫第一次建立 cube 時使用）
+    建立 table 與寫入在同一個 transaction 中，失敗時不會留下空的 cube；
+    EE_BOM 缺少的維度視為空字串，缺少 EXT_COST 時成本為 0
+    回傳 cube 的 cell 數
+    """
+    cells = pd.DataFrame(columns=COST_CUBE_DIMENSIONS + CUBE_MEASURES)
+    if table_exists("EE_BOM"):
+        table_columns = get_table_columns("EE_BOM")
+        columns = [col for col in COST_CUBE_DIMENSIONS if col in table_columns]
+        measure = "SUM(EXT_COST)" if "EXT_COST" in table_columns else "0"
+        select = ", ".join(columns + [f"{measure} AS EXT_COST", "COUNT(*) AS Rows"])
+        group_sql = f" GROUP BY {', '.join(columns)}" if columns else ""
+        summary = read_query("EE_BOM", f"SELECT {select} FROM EE_BOM{group_sql}")
+        summary = summary[summary["Rows"] > 0]
+        if not summary.empty:
+            cells = _group_cells(summary)
+    
+    conn = get_db_connection()
+    try:
+        with conn.transaction():
+            _create_cube_table(conn)
+            conn.execute(f"DELETE FROM {COST_CUBE_TABLE}")
+            _write_cells(conn, cells)
+    finally:
+        conn.close()
+    return len(cells)
+
+
+def query_cost_cube(group_by: list, filters: dict = None) -> pd.DataFrame:
+    """
+    由 cube 依 group_by 維度彙總（group_by 為空時回傳總計一列）
+    filters: {維度: [值, ...]}，與 query_data 的篩選條件相同
+    回傳欄位：group_by 各欄、EXT_COST、Rows，依 EXT_COST 由大到小排序
+    """
+    if not table_exists(COST_CUBE_TABLE):
+        return pd.DataFrame(columns=list(group_by) + CUBE_MEASURES)
+    
+    filters = filters or {}
+    where_sql, params = build_where_clause(filters)
+    measures = "COALESCE(SUM(EXT_COST), 0) AS EXT_COST, COALESCE(SUM(Rows), 0) AS Rows"
+    if group_by:
+        keys = ", ".join(group_by)
+        query = f"""
+            SELECT {keys}, {measures}
+            FROM {COST_CUBE_TABLE}{where_sql}
+            GROUP BY {keys}
+            ORDER BY EXT_COST DESC
+        """
+    else:
+        query = f"SELECT {measures} FROM {COST_CUBE_TABLE}{where_sql}"
+    return read_query(COST_CUBE_TABLE, query, params)
+
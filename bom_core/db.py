@@ -0,0 +1,895 @@
+"""資料庫連線與基本讀寫操作"""
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from . import config, partitions, storage
+from .compact import compact_frame
+from .querylog import record_lock_wait, record_query
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """
+    記錄 SQL 執行時間的 cursor（PooledConnection 上的 SQL 都經過這裡，包括 pandas 的讀寫）
+    有結果的查詢連同讀取結果（fetchall / fetchmany / fetchone）的時間一起計算，
+    讀完結果、執行下一個 SQL 或 cursor 關閉時交給 record_query 判斷是否為慢查詢
+    """
+    
+    # [SQL, 參數, 累計毫秒, 筆數]
+    _statement = None
+    
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._started(sql, parameters, start)
+    
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._started(sql, None, start)
+    
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, int(row is not None), done=True)
+        return row
+    
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), done=len(rows) < size)
+        return rows
+    
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), done=True)
+        return rows
+    
+    def close(self):
+        self._finish()
+        super().close()
+    
+    def __del__(self):
+        self._finish()
+    
+    def _started(self, sql, parameters, start):
+        self._statement = [sql, parameters, (time.perf_counter() - start) * 1000, 0]
+        if self.description is None:
+            # 沒有結果的 SQL（寫入、DDL）執行完即結束
+            self._statement[3] = max(self.rowcount, 0)
+            self._finish()
+    
+    def _fetched(self, start, rows: int, done: bool):
+        if self._statement is None:
+            return
+        self._statement[2] += (time.perf_counter() - start) * 1000
+        self._statement[3] += rows
+        if done:
+            self._finish()
+    
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            record_query(None, *statement)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    連線池中的 SQLite 連線
+    close() 時先 rollback 未提交的變更（與真正關閉的行為一致），再歸還連線池
+    所有 SQL（包括 conn.execute 與 pandas 的讀寫）都會記錄執行時間（慢查詢紀錄）
+    """
+    
+    _deferred = False
+    
+    def cursor(self, factory=None):
+        return super().cursor(factory or _TimedCursor)
+    
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+    
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+    
+    def commit(self):
+        # transaction() 區塊內延後提交（pandas to_sql 寫入後會自行 commit）
+        if self._deferred:
+            return
+        super().commit()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        區塊內的所有寫入在結束時一次提交，發生例外時全部 rollback
+        區塊內呼叫的 commit()（包括 pandas to_sql）都會延後到區塊結束
+        """
+        # 明確 BEGIN，CREATE TABLE 等 DDL 也包含在同一個 transaction 中
+        if not self.in_transaction:
+            self._begin()
+        self._deferred = True
+        try:
+            yield self
+        except BaseException:
+            self._deferred = False
+            self.rollback()
+            raise
+        self._deferred = False
+        super().commit()
+    
+    def _begin(self):
+        """
+        BEGIN IMMEDIATE：開始時就取得寫入鎖（避免讀取後才升級為寫入時因其他連線已提交而失敗）
+        寫入鎖被其他連線占用時，等待至多 DB_BUSY_TIMEOUT 秒，等待成功的時間記錄為鎖等待
+        """
+        self.execute("PRAGMA busy_timeout = 0")
+        try:
+            self.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+        finally:
+            self.execute(f"PRAGMA busy_timeout = {int(config.DB_BUSY_TIMEOUT * 1000)}")
+        
+        start = time.perf_counter()
+        self.execute("BEGIN IMMEDIATE")
+        record_lock_wait((time.perf_counter() - start) * 1000)
+    
+    def close(self):
+        try:
+            self.rollback()
+        except sqlite3.Error:
+            super().close()
+            return
+        
+        with _pool_lock:
+            pool = _connection_pools.setdefault(self.pool_key, [])
+            if len(pool) < config.DB_POOL_SIZE:
+                pool.append(self)
+                return
+        super().close()
+
+
+_connection_pools = {}
+_pool_lock = threading.Lock()
+
+
+_last_activity = time.monotonic()
+
+
+def seconds_since_last_activity() -> float:
+    """距離上次取得資料庫連線經過的秒數（維護工作用來判斷是否閒置）"""
+    return time.monotonic() - _last_activity
+
+
+def get_db_connection():
+    """取得資料庫連線（優先重用連線池中的閒置連線）"""
+    global _last_activity
+    _last_activity = time.monotonic()
+    
+    pool_key = (config.DB_PATH, config.DB_READ_ONLY)
+    with _pool_lock:
+        pool = _connection_pools.get(pool_key)
+        conn = pool.pop() if pool else None
+    
+    if conn is None:
+        # Streamlit 每個 session 在不同 thread 執行，連線歸還後可能換 thread 使用
+        # 以 URI 開啟，ATTACH 封存分區時才能指定唯讀模式
+        uri = partitions.database_uri(config.DB_PATH)
+        if config.DB_READ_ONLY:
+            uri += "?mode=ro"
+        conn = sqlite3.connect(
+            uri, uri=True, factory=PooledConnection, check_same_thread=False,
+            timeout=config.DB_BUSY_TIMEOUT
+        )
+        conn.db_path = config.DB_PATH
+        conn.pool_key = pool_key
+        conn.row_factory = sqlite3.Row
+    return conn
+
+
+def table_exists(table_name: str) -> bool:
+    """檢查 table 是否存在"""
+    if storage.is_columnar(table_name):
+        return storage.table_exists(table_name)
+    
+    conn = get_db_connection()
+    if partitions.is_partitioned(table_name):
+        exists = bool(partitions.hot_partitions(conn, table_name)
+                      or partitions.archived_partitions(table_name))
+        conn.close()
+        return exists
+    
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (table_name,)
+    )
+    result = cursor.fetchone()
+    conn.close()
+    return result is not None
+
+
+def get_table_columns(table_name: str) -> list:
+    """取得 table 的欄位名稱"""
+    if storage.is_columnar(table_name):
+        return storage.get_columns(table_name)
+    
+    with _query_connection(table_name) as conn:
+        if conn is None:
+            return []
+        cursor = conn.cursor()
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        return [row[1] for row in cursor.fetchall()]
+
+
+@contextmanager
+def _query_connection(table_name: str, filters: dict = None):
+    """
+    取得查詢 table 用的 SQLite 連線
+    依 Quarter 分區存放時，先在連線上建立同名的 TEMP VIEW（只含 filters 涵蓋的分區）；
+    沒有任何符合的分區時回傳 None
+    """
+    conn = get_db_connection()
+    routed = partitions.is_partitioned(table_name)
+    attached = []
+    try:
+        if routed:
+            attached = partitions.open_view(conn, table_name, filters)
+        yield None if attached is None else conn
+    finally:
+        if routed and attached is not None:
+            partitions.close_view(conn, table_name, attached)
+        conn.close()
+
+
+def run_query(table_name: str, query: str, params: list = None,
+              filters: dict = None) -> list:
+    """
+    對 table 執行查詢並回傳所有結果
+    依 table 使用的儲存引擎在 SQLite 或 DuckDB 上執行；
+    filters 用於分區篩選（應與 query 的 WHERE 條件一致）
+    超過 SLOW_QUERY_MS 的查詢會記錄到慢查詢紀錄
+    """
+    if storage.is_columnar(table_name):
+        # DuckDB 不經過 SQLite 連線，在這裡記錄執行時間
+        start = time.perf_counter()
+        rows = storage.fetch_rows(table_name, query, params, filters)
+        record_query(table_name, query, params, (time.perf_counter() - start) * 1000, len(rows))
+        return rows
+    
+    with _query_connection(table_name, filters) as conn:
+        if conn is None:
+            return []
+        cursor = conn.cursor()
+        cursor.execute(query, params or [])
+        return cursor.fetchall()
+
+
+def read_query(table_name: str, query: str, params: list = None,
+               filters: dict = None) -> pd.DataFrame:
+    """與 run_query 相同，但回傳 DataFrame"""
+    if storage.is_columnar(table_name):
+        start = time.perf_counter()
+        df = storage.read_frame(table_name, query, params, filters)
+        record_query(table_name, query, params, (time.perf_counter() - start) * 1000, len(df))
+        return df
+    
+    with _query_connection(table_name, filters) as conn:
+        if conn is None:
+            return pd.DataFrame()
+        return pd.read_sql(query, conn, params=params)
+
+
+def iter_query(table_name: str, query: str, params: list = None,
+               filters: dict = None, chunksize: int = 50000):
+    """與 read_query 相同，但逐批回傳 DataFrame（每批約 chunksize 筆），不會一次載入全部結果"""
+    if storage.is_columnar(table_name):
+        yield from storage.iter_frames(table_name, query, params, filters, chunksize)
+        return
+    
+    with _query_connection(table_name, filters) as conn:
+        if conn is None:
+            return
+        yield from pd.read_sql(query, conn, params=params, chunksize=chunksize)
+
+
+def is_wildcard(value) -> bool:
+    """判斷篩選值是否為萬用字元樣式（含 * 或 %）"""
+    return isinstance(value, str) and ("*" in value or "%" in value)
+
+
+def build_where_clause(filters: dict, exclude: str = None) -> tuple:
+    """
+    將篩選條件轉換為 SQL WHERE 子句
+    filters: {column_name: [value1, value2, ...], ...}
+    值含 * 或 % 時視為萬用字元（不分大小寫），例如 "grm*" 轉為 lower(MPN) LIKE 'grm%'
+    （SQLite 的 LIKE 不分大小寫、DuckDB 分大小寫，兩邊都先轉為小寫，結果才會相同）
+    exclude: 略過的欄位（計算該欄位自身的 facet 時使用）
+    回傳：(where_sql, params)，沒有條件時 where_sql 為空字串
+    """
+    conditions = []
+    params = []
+    
+    for col, values in filters.items():
+        if col == exclude or not values:  # 只處理有選擇值的欄位
+            continue
+        
+        exact_values = [v for v in values if not is_wildcard(v)]
+        patterns = [v.replace("*", "%").lower() for v in values if is_wildcard(v)]
+        
+        # 同欄位內為 OR：精確值用 IN，萬用字元用 LIKE
+        col_conditions = []
+        if exact_values:
+            placeholders = ", ".join(["?" for _ in exact_values])
+            col_conditions.append(f"{col} IN ({placeholders})")
+            params.extend(exact_values)
+        for pattern in patterns:
+            col_conditions.append(f"lower({col}) LIKE ?")
+            params.append(pattern)
+        
+        if len(col_conditions) == 1:
+            conditions.append(col_conditions[0])
+        else:
+            conditions.append("(" + " OR ".join(col_conditions) + ")")
+    
+    if not conditions:
+        return "", params
+    return " WHERE " + " AND ".join(conditions), params
+
+
+def drop_existing_rows(df: pd.DataFrame, df_to_insert: pd.DataFrame,
+                       existing_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    從 df_to_insert 中移除已存在於 existing_df 的資料（所有欄位相同才視為重複）
+    df: 原始上傳資料（不含 created_at），df_to_insert: 加上 created_at 後的資料
+    """
+    if existing_df.empty:
+        return df_to_insert
+    
+    # 比較用的欄位（排除 created_at）
+    compare_cols = [col for col in df.columns if col != "created_at"]
+    
+    # 確保只比較兩邊都有的欄位
+    common_cols = [col for col in compare_cols if col in existing_df.columns]
+    
+    # 將所有欄位轉換為字串以避免資料類型不一致的問題
+    df_compare = df[common_cols].astype(str)
+    existing_compare = existing_df[common_cols].astype(str).drop_duplicates()
+    
+    # 將 df 與 existing 合併，找出新資料
+    merged = df_compare.merge(
+        existing_compare,
+        how="left",
+        indicator=True
+    )
+    new_mask = merged["_merge"] == "left_only"
+    return df_to_insert[new_mask.values]
+
+
+def _has_table(conn, table_name: str) -> bool:
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+        (table_name,)
+    )
+    return cursor.fetchone() is not None
+
+
+def _read_existing_rows(conn, physical_name: str, df: pd.DataFrame,
+                        created_at: str) -> pd.DataFrame:
+    """
+    讀取可能與 df 重複的現有資料（用於去重）
+    所有欄位相同才算重複，因此只需讀取 Quarter / Project_Name 與 df 相同的資料；
+    同一批次（created_at 相同，例如同一次上傳先前提交的分段）的資料不算現有資料
+    """
+    cursor = conn.cursor()
+    cursor.execute(f"PRAGMA table_info({physical_name})")
+    table_columns = [row[1] for row in cursor.fetchall()]
+    
+    clauses = []
+    params = []
+    for col in config.PARTITION_COLUMNS:
+        if col not in df.columns or col not in table_columns:
+            continue
+        values = df[col].dropna().unique().tolist()
+        conditions = []
+        if values:
+            conditions.append(f'"{col}" IN ({", ".join("?" * len(values))})')
+            params.extend(values)
+        if df[col].isna().any():
+            conditions.append(f'"{col}" IS NULL')
+        clauses.append("(" + " OR ".join(conditions) + ")")
+    if "created_at" in table_columns:
+        clauses.append("(created_at IS NULL OR created_at <> ?)")
+        params.append(created_at)
+    
+    where_sql = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return pd.read_sql(f"SELECT * FROM {physical_name}{where_sql}", conn, params=params)
+
+
+def insert_data(table_name: str, df: pd.DataFrame, conn=None,
+                created_at: str = None) -> int:
+    """
+    插入資料到 table，跳過重複資料
+    conn：在呼叫端的連線 / transaction 中寫入（不會 commit 或關閉），未指定時自行開啟並提交
+    created_at：上傳批次時間，未指定時為現在時間，並在 Ingest_Jobs 記錄為一個已完成的批次（變更紀錄的序號）
+    回傳實際新增的筆數
+    """
+    return len(insert_new_rows(table_name, df, conn, created_at))
+
+
+def insert_new_rows(table_name: str, df: pd.DataFrame, conn=None,
+                    created_at: str = None) -> pd.DataFrame:
+    """
+    與 insert_data 相同，但回傳實際新增的資料（包含 created_at 欄位）
+    與現有資料所有欄位相同的列不寫入（df 本身重複的列照原樣寫入）；有新增資料時遞增 table 的資料版本，
+    並累加到成本 cube 與料號搜尋索引（與寫入在同一個 transaction 中）
+    """
+    if df.empty:
+        return df
+    
+    # 未指定批次時間時，這次寫入自成一個批次（ingest_workbook 會傳入自己的 job 時間）
+    own_batch = created_at is None
+    created_at = created_at or datetime.now().isoformat()
+    
+    # 加入 created_at 欄位
+    df_to_insert = df.copy()
+    df_to_insert["created_at"] = created_at
+    
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    
+    try:
+        if own_conn and partitions.is_partitioned(table_name):
+            # 搬回已封存的 Quarter 需在寫入資料的 transaction 之外完成
+            partitions.restore_quarters(conn, [df])
+        
+        if storage.is_columnar(table_name):
+            # 欄式儲存：只需與同一分區（Quarter / Project_Name）的現有資料比較
+            existing_df = storage.read_partitions(table_name, df_to_insert)
+            if "created_at" in existing_df.columns:
+                existing_df = existing_df[existing_df["created_at"] != created_at]
+            new_df = drop_existing_rows(df, df_to_insert, existing_df)
+            storage.write_partitions(table_name, new_df)
+        elif partitions.is_partitioned(table_name):
+            # 依 Quarter 分區：每個 Quarter 只需與同一分區的現有資料比較
+            new_df = _insert_partitioned(table_name, df, df_to_insert, conn)
+        elif not _has_table(conn, table_name):
+            # 如果 table 不存在，直接建立
+            df_to_insert.to_sql(table_name, conn, if_exists="replace", index=False)
+            new_df = df_to_insert
+        else:
+            # 取得現有資料，找出不重複的資料
+            existing_df = _read_existing_rows(conn, table_name, df, created_at)
+            new_df = drop_existing_rows(df, df_to_insert, existing_df)
+            if not new_df.empty:
+                new_df.to_sql(table_name, conn, if_exists="append", index=False)
+        
+        if not new_df.empty:
+            bump_data_version(table_name, conn)
+            if own_batch:
+                _record_batch(created_at, conn)
+            _add_to_summaries(conn, table_name, new_df)
+        if own_conn:
+            conn.commit()
+    finally:
+        if own_conn:
+            conn.close()
+    return new_df
+
+
+def _add_to_summaries(conn, table_name: str, new_rows: pd.DataFrame):
+    """
+    新增的資料同時累加到由原始資料彙總的 table（成本 cube、料號搜尋索引），與寫入在同一個連線 / transaction 中
+    cube 與 search 模組依賴本模組，在函式內 import
+    """
+    from .cube import add_to_cost_cube
+    from .search import add_to_search_index
+    
+    if table_name == "EE_BOM":
+        add_to_cost_cube(conn, new_rows)
+    add_to_search_index(conn, table_name, new_rows)
+
+
+def _insert_partitioned(table_name: str, df: pd.DataFrame,
+                        df_to_insert: pd.DataFrame, conn) -> pd.DataFrame:
+    """
+    依 Quarter 分別寫入各分區，回傳新增的資料
+    已封存的 Quarter 須先以 partitions.restore_quarters 搬回主資料庫
+    （搬回需在 transaction 之外進行，無法在呼叫端的 transaction 中完成）
+    """
+    quarters = (df["Quarter"] if "Quarter" in df.columns
+                else pd.Series(None, index=df.index)).map(partitions.partition_name)
+    created_at = df_to_insert["created_at"].iloc[0]
+    
+    hot = partitions.hot_partitions(conn, table_name)
+    cold = sorted((set(quarters.unique()) - set(hot)) & set(partitions.archived_partitions(table_name)))
+    if cold:
+        raise ValueError(f"{table_name} 的 Quarter {', '.join(cold)} 已封存，請先搬回主資料庫再寫入")
+    
+    inserted = []
+    for quarter in quarters.unique():
+        mask = (quarters == quarter).values
+        physical = partitions.partition_table(table_name, quarter)
+        if quarter in hot:
+            existing_df = _read_existing_rows(conn, physical, df[mask], created_at)
+        else:
+            existing_df = pd.DataFrame()
+        
+        new_df = drop_existing_rows(df[mask], df_to_insert[mask], existing_df)
+        if not new_df.empty:
+            new_df.to_sql(physical, conn, if_exists="append", index=False)
+        inserted.append(new_df)
+    
+    return pd.concat(inserted)
+
+
+def _result_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """查詢結果的共同處理：移除 created_at（不需要在報表中顯示），並精簡記憶體用量"""
+    if "created_at" in df.columns:
+        df = df.drop(columns=["created_at"])
+    return compact_frame(df) if config.COMPACT_RESULTS else df
+
+
+def _iter_result_frames(table_name: str, query: str, params: list,
+                        filters: dict, chunksize: int):
+    for chunk in iter_query(table_name, query, params, filters, chunksize):
+        yield _result_frame(chunk)
+
+
+def query_data(table_name: str, filters: dict, chunksize: int = None):
+    """
+    根據篩選條件查詢資料
+    filters: {column_name: [value1, value2, ...], ...}
+    chunksize: 指定時改為回傳 iterator，逐批產生約 chunksize 筆的 DataFrame
+    """
+    if not table_exists(table_name):
+        return iter([]) if chunksize else pd.DataFrame()
+    
+    # 建立 SQL 查詢
+    where_sql, params = build_where_clause(filters)
+    query = f"SELECT * FROM {table_name}{where_sql}"
+    
+    if chunksize:
+        return _iter_result_frames(table_name, query, params, filters, chunksize)
+    return _result_frame(read_query(table_name, query, params, filters))
+
+
+def get_all_data(table_name: str) -> pd.DataFrame:
+    """取得 table 中所有資料"""
+    if not table_exists(table_name):
+        return pd.DataFrame()
+    
+    df = read_query(table_name, f"SELECT * FROM {table_name}")
+    return compact_frame(df) if config.COMPACT_RESULTS else df
+
+
+def aggregate_data(table_name: str, group_by: list, filters: dict = None,
+                   value_column: str = "EXT_COST") -> pd.DataFrame:
+    """
+    依 group_by 欄位彙總 value_column（加總與筆數），在資料庫端完成
+    回傳欄位：group_by 各欄、{value_column}（加總）、Rows
+    """
+    if not table_exists(table_name):
+        return pd.DataFrame()
+    
+    filters = filters or {}
+    where_sql, params = build_where_clause(filters)
+    keys = ", ".join(group_by)
+    query = f"""
+        SELECT {keys}, SUM({value_column}) AS {value_column}, COUNT(*) AS Rows
+        FROM {table_name}{where_sql}
+        GROUP BY {keys}
+        ORDER BY {keys}
+    """
+    return read_query(table_name, query, params, filters)
+
+
+def get_facet_counts(table_name: str, column: str, filters: dict,
+                     limit: int = None, within: list = None) -> list:
+    """
+    取得單一欄位的篩選選項與對應筆數（facet）
+    套用其他欄位的篩選條件，但不套用該欄位自身的條件，
+    讓使用者仍可在同欄位內追加 OR 選項
+    within: 只計算這些值（例如料號搜尋結果）
+    回傳：[(value, count), ...]，依筆數由多到少排序
+    """
+    if not table_exists(table_name):
+        return []
+    if within is not None and not within:
+        return []
+    
+    # 一般 facet 欄位由 facet 彙總在記憶體中計算（不需每個欄位各查詢一次）
+    if within is None and column in config.FACET_COLUMNS.get(table_name, []):
+        cube = _facet_cube(table_name, filters)
+        if cube is not None and column in cube.columns:
+            return _cube_facet_counts(cube, column, filters, limit)
+    
+    where_sql, params = build_where_clause(filters, exclude=column)
+    not_empty = f"{column} IS NOT NULL AND {column} != ''"
+    if within is not None:
+        placeholders = ", ".join(["?" for _ in within])
+        not_empty += f" AND {column} IN ({placeholders})"
+        params.extend(within)
+    if where_sql:
+        where_sql += f" AND {not_empty}"
+    else:
+        where_sql = f" WHERE {not_empty}"
+    
+    query = f"""
+        SELECT {column}, COUNT(*) AS cnt
+        FROM {table_name}{where_sql}
+        GROUP BY {column}
+        ORDER BY cnt DESC, {column}
+    """
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    
+    # 分區篩選只依其他欄位的條件（與 WHERE 一致）
+    partition_filters = {k: v for k, v in filters.items() if k != column}
+    rows = run_query(table_name, query, params, partition_filters)
+    return [(str(row[0]), row[1]) for row in rows]
+
+
+def count_rows(table_name: str, filters: dict) -> int:
+    """計算符合篩選條件的筆數"""
+    if not table_exists(table_name):
+        return 0
+    
+    cube = _facet_cube(table_name, filters)
+    if cube is not None:
+        return int(cube.loc[_facet_mask(cube, filters), "cnt"].sum())
+    
+    where_sql, params = build_where_clause(filters)
+    rows = run_query(table_name, f"SELECT COUNT(*) FROM {table_name}{where_sql}", params, filters)
+    return rows[0][0] if rows else 0
+
+
+# =============================================================================
+# Facet 彙總
+# =============================================================================
+# {(DB_PATH, 儲存引擎, table_name, 資料版本, 非 facet 欄位的條件): 各 facet 欄位組合的筆數}
+_facet_cubes = OrderedDict()
+_facet_lock = threading.Lock()
+
+
+def _facet_cube(table_name: str, filters: dict):
+    """
+    FACET_COLUMNS 各欄位組合的筆數（欄位值轉為字串，另有 cnt 欄），以一次 GROUP BY 取得
+    料號等非 facet 欄位的條件在資料庫端套用；facet 欄位的條件由呼叫端在記憶體中套用，
+    切換 facet 選項時不需重新查詢。依資料版本快取，資料寫入後自動失效
+    facet 欄位的條件含萬用字元、或條件欄位不在 table 中時回傳 None（改為直接查詢）
+    """
+    facet_columns = config.FACET_COLUMNS.get(table_name, [])
+    facet_filters = {col: values for col, values in filters.items() if col in facet_columns and values}
+    other_filters = {col: values for col, values in filters.items() if col not in facet_columns and values}
+    if not facet_columns or any(is_wildcard(v) for values in facet_filters.values() for v in values):
+        return None
+    
+    key = (
+        config.DB_PATH, config.STORAGE_ENGINE, table_name,
+        get_data_versions([table_name])[table_name],
+        tuple(sorted((col, tuple(sorted(map(str, values)))) for col, values in other_filters.items())),
+    )
+    with _facet_lock:
+        cube = _facet_cubes.get(key)
+        if cube is not None:
+            _facet_cubes.move_to_end(key)
+    
+    if cube is None:
+        table_columns = get_table_columns(table_name)
+        columns = [col for col in facet_columns if col in table_columns]
+        if not columns:
+            return None
+        keys = ", ".join(columns)
+        where_sql, params = build_where_clause(other_filters)
+        cube = read_query(
+            table_name,
+            f"SELECT {keys}, COUNT(*) AS cnt FROM {table_name}{where_sql} GROUP BY {keys}",
+            params, other_filters
+        )
+        for col in columns:
+            values = cube[col].astype(object)
+            cube[col] = values.where(values.isna(), values.astype(str))
+        
+        with _facet_lock:
+            _facet_cubes[key] = cube
+            while len(_facet_cubes) > config.FACET_CACHE_SIZE:
+                _facet_cubes.popitem(last=False)
+    
+    if any(col not in cube.columns for col in facet_filters):
+        return None
+    return cube
+
+
+def _facet_mask(cube: pd.DataFrame, filters: dict, exclude: str = None) -> pd.Series:
+    """facet 彙總中符合 facet 欄位條件的列（非 facet 欄位的條件已在查詢時套用）"""
+    mask = pd.Series(True, index=cube.index)
+    for col, values in filters.items():
+        if col == exclude or not values or col not in cube.columns:
+            continue
+        mask &= cube[col].isin([str(v) for v in values])
+    return mask
+
+
+def _cube_facet_counts(cube: pd.DataFrame, column: str, filters: dict,
+                       limit: int = None) -> list:
+    """由 facet 彙總計算單一欄位的選項與筆數（結果與 get_facet_counts 直接查詢相同）"""
+    rows = cube[_facet_mask(cube, filters, exclude=column)]
+    rows = rows[rows[column].notna() & (rows[column] != "")]
+    counts = rows.groupby(column)["cnt"].sum().reset_index()
+    counts = counts.sort_values(["cnt", column], ascending=[False, True])
+    if limit is not None:
+        counts = counts.head(limit)
+    return [(value, int(cnt)) for value, cnt in zip(counts[column], counts["cnt"])]
+
+
+# =============================================================================
+# 資料版本
+# =============================================================================
+def bump_data_version(table_name: str, conn=None):
+    """
+    table 的資料有變更時遞增版本（匯出快取依版本判斷檔案是否過期）
+    conn：在呼叫端的 transaction 中更新（不會 commit）
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    conn.execute(
+        f"""
+        INSERT INTO {config.DATA_VERSIONS_TABLE} (Table_Name, Version, updated_at)
+        VALUES (?, 1, ?)
+        ON CONFLICT(Table_Name) DO UPDATE
+        SET Version = Version + 1, updated_at = excluded.updated_at
+        """,
+        (table_name, datetime.now().isoformat())
+    )
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+def _record_batch(created_at: str, conn=None):
+    """
+    將不經過 ingest_workbook 寫入的一批資料（相同 created_at）記錄為已完成的 job，
+    並取得變更紀錄的序號（與 ingest_workbook 完成時相同，依提交順序遞增）
+    conn：在呼叫端的 transaction 中記錄（不會 commit）
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    table = config.INGEST_JOBS_TABLE
+    conn.execute(
+        f"""
+        INSERT OR IGNORE INTO {table} (Upload_ID, Status, created_at, finished_at, Seq)
+        VALUES (?, 'done', ?, ?, (SELECT COALESCE(MAX(Seq), 0) + 1 FROM {table}))
+        """,
+        (f"insert_data:{created_at}", created_at, datetime.now().isoformat())
+    )
+    if own_conn:
+        conn.commit()
+        conn.close()
+
+
+def get_data_versions(table_names: list) -> dict:
+    """取得各 table 目前的資料版本（尚未寫入過為 0）"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT Table_Name, Version FROM {config.DATA_VERSIONS_TABLE} "
+        f"WHERE Table_Name IN ({', '.join('?' * len(table_names))})",
+        list(table_names)
+    )
+    versions = {row[0]: row[1] for row in cursor.fetchall()}
+    conn.close()
+    return {table_name: versions.get(table_name, 0) for table_name in table_names}
+
+
+# =============================================================================
+# Plant_Generation 操作
+# =============================================================================
+def upsert_plant_generation(df: pd.DataFrame) -> int:
+    """插入或更新 Plant_Generation 資料"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    count = 0
+    for _, row in df.iterrows():
+        cursor.execute("""
+            INSERT OR REPLACE INTO Plant_Generation 
+            (Project_Name, Parent_DPN, Plant, Generation)
+            VALUES (?, ?, ?, ?)
+        """, (row["Project_Name"], row["Parent_DPN"], row["Plant"], row["Generation"]))
+        count += 1
+    
+    bump_data_version("Plant_Generation", conn)
+    conn.commit()
+    conn.close()
+    return count
+
+
+def get_plant_generation() -> pd.DataFrame:
+    """取得所有 Plant_Generation 資料"""
+    conn = get_db_connection()
+    try:
+        df = pd.read_sql("SELECT * FROM Plant_Generation", conn)
+    except:
+        df = pd.DataFrame()
+    conn.close()
+    return df
+
+
+# =============================================================================
+# Project_MVA_Info 操作
+# =============================================================================
+def upsert_project_mva_info(project_name: str, initial_mva: float, 
+                            initial_quarter: str, adder: float):
+    """插入或更新 Project_MVA_Info"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("""
+        INSERT OR REPLACE INTO Project_MVA_Info 
+        (Project_Name, Initial_MVA, Initial_Quarter, Adder)
+        VALUES (?, ?, ?, ?)
+    """, (project_name, initial_mva, initial_quarter, adder))
+    
+    bump_data_version("Project_MVA_Info", conn)
+    conn.commit()
+    conn.close()
+
+
+def get_project_mva_info(project_name: str = None) -> pd.DataFrame:
+    """取得 Project_MVA_Info 資料"""
+    conn = get_db_connection()
+    try:
+        if project_name:
+            df = pd.read_sql(
+                "SELECT * FROM Project_MVA_Info WHERE Project_Name = ?",
+                conn, params=[project_name]
+            )
+        else:
+            df = pd.read_sql("SELECT * FROM Project_MVA_Info", conn)
+    except:
+        df = pd.DataFrame()
+    conn.close()
+    return df
+
+
+def get_all_project_names() -> list:
+    """取得所有不重複的 Project_Name"""
+    projects = set()
+    
+    # 從 EE_BOM 取得
+    if table_exists("EE_BOM"):
+        for row in run_query("EE_BOM", "SELECT DISTINCT Project_Name FROM EE_BOM"):
+            if row[0]:
+                projects.add(row[0])
+    
+    # 從 Project_MVA_Info 取得
+    if table_exists("Project_MVA_Info"):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT Project_Name FROM Project_MVA_Info")
+        for row in cursor.fetchall():
+            if row[0]:
+                projects.add(row[0])
+        conn.close()
+    
+    return sorted(list(projects))
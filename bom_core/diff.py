@@ -0,0 +1,223 @@
+"""BOM 差異比較"""
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from .config import DIFF_COMPARE_COLUMNS, DIFF_KEY_COLUMNS
+from .db import (
+    build_where_clause,
+    get_db_connection,
+    get_table_columns,
+    read_query,
+    table_exists,
+)
+from .partitions import is_partitioned
+from .storage import is_columnar
+
+
+def get_upload_batches(table_name: str = "EE_BOM") -> pd.DataFrame:
+    """取得上傳批次（以 created_at 區分），由新到舊排序"""
+    if not table_exists(table_name):
+        return pd.DataFrame()
+    
+    return read_query(table_name, f"""
+        SELECT created_at, MAX(Project_Name) AS Project_Name,
+               MAX(Quarter) AS Quarter, COUNT(*) AS Rows
+        FROM {table_name}
+        GROUP BY created_at
+        ORDER BY created_at DESC
+    """)
+
+
+def _diff_connection(old_filters: dict, new_filters: dict, filters: dict):
+    """
+    取得執行差異查詢的 SQLite 連線
+    欄式儲存或依 Quarter 分區時，先將兩側的原始資料（依分區篩選讀取）
+    載入 in-memory SQLite，之後的差異查詢與單一 SQLite 資料表完全相同
+    """
+    if not is_columnar("EE_BOM") and not is_partitioned("EE_BOM"):
+        return get_db_connection()
+    
+    sides = []
+    for side_filters in (old_filters, new_filters):
+        side = {**filters, **side_filters}
+        where_sql, params = build_where_clause(side)
+        sides.append(read_query("EE_BOM", f"SELECT * FROM EE_BOM{where_sql}", params, side))
+    
+    conn = sqlite3.connect(":memory:")
+    pd.concat(sides, ignore_index=True).to_sql("EE_BOM", conn, index=False)
+    return conn
+
+
+def _create_diff_side(cursor, side_name: str, side_filters: dict,
+                      filters: dict, table_columns: list):
+    """
+    將比較的一側（某個 Quarter 或上傳批次）依 DIFF_KEY_COLUMNS 彙總後存入暫存表
+    同一 key 有多筆（例如替代料）時，EXT_COST 加總，MANUFACTURER/MPN 以逗號串接
+    """
+    where_sql, params = build_where_clause({**filters, **side_filters})
+    
+    select_cols = []
+    for col in DIFF_COMPARE_COLUMNS:
+        if col not in table_columns:
+            select_cols.append(f"NULL AS {col}")
+        elif col == "EXT_COST":
+            select_cols.append(f"ROUND(SUM({col}), 6) AS {col}")
+        else:
+            select_cols.append(f"GROUP_CONCAT(DISTINCT {col}) AS {col}")
+    
+    # 先排序再 GROUP_CONCAT，讓串接結果的順序固定，避免誤判為變更
+    keys = ", ".join(DIFF_KEY_COLUMNS)
+    order_cols = DIFF_KEY_COLUMNS + [
+        c for c in DIFF_COMPARE_COLUMNS if c in table_columns and c != "EXT_COST"
+    ]
+    cursor.execute(f"DROP TABLE IF EXISTS temp.{side_name}")
+    cursor.execute(f"""
+        CREATE TEMP TABLE {side_name} AS
+        SELECT {keys}, MAX(Project_Name) AS Project_Name, {", ".join(select_cols)}
+        FROM (SELECT * FROM EE_BOM{where_sql} ORDER BY {", ".join(order_cols)})
+        GROUP BY {keys}
+    """, params)
+    cursor.execute(f"CREATE UNIQUE INDEX temp.{side_name}_key ON {side_name} ({keys})")
+
+
+def _bom_diff_query() -> str:
+    """組出 added / removed / changed 三段的差異查詢"""
+    join_on = " AND ".join(f"o.{k} IS n.{k}" for k in DIFF_KEY_COLUMNS)
+    changed = " OR ".join(f"o.{c} IS NOT n.{c}" for c in DIFF_COMPARE_COLUMNS)
+    
+    def columns(key_side: str) -> str:
+        cols = [f"{key_side}.Project_Name AS Project_Name"]
+        cols += [f"{key_side}.{k} AS {k}" for k in DIFF_KEY_COLUMNS]
+        for c in DIFF_COMPARE_COLUMNS:
+            cols += [f"o.{c} AS Old_{c}", f"n.{c} AS New_{c}"]
+        cols.append("COALESCE(n.EXT_COST, 0) - COALESCE(o.EXT_COST, 0) AS Cost_Delta")
+        return ", ".join(cols)
+    
+    return f"""
+        SELECT 'added' AS Change_Type, {columns("n")}
+        FROM diff_new n LEFT JOIN diff_old o ON {join_on}
+        WHERE o.rowid IS NULL
+        UNION ALL
+        SELECT 'removed' AS Change_Type, {columns("o")}
+        FROM diff_old o LEFT JOIN diff_new n ON {join_on}
+        WHERE n.rowid IS NULL
+        UNION ALL
+        SELECT 'changed' AS Change_Type, {columns("n")}
+        FROM diff_new n JOIN diff_old o ON {join_on}
+        WHERE {changed}
+        ORDER BY PARENT_DPN, DPN
+    """
+
+
+def iter_bom_diff(old_filters: dict, new_filters: dict, filters: dict = None,
+                  chunksize: int = 10000):
+    """
+    比較兩個 Quarter（或兩個上傳批次）的 EE_BOM，逐批產出差異
+    old_filters / new_filters: 定義兩側，例如 {"Quarter": ["FY26Q1"]}
+                               或 {"created_at": ["2025-04-11T10:00:00"]}
+    filters: 兩側共用的篩選條件，例如 {"Project_Name": [...]}
+    每批為一個 DataFrame，欄位：Change_Type (added/removed/changed)、
+    Project_Name、PARENT_DPN、DPN、Old_*/New_* 比較欄位、Cost_Delta
+    """
+    if not table_exists("EE_BOM"):
+        return
+    
+    table_columns = get_table_columns("EE_BOM")
+    if any(k not in table_columns for k in DIFF_KEY_COLUMNS):
+        return
+    
+    conn = _diff_connection(old_filters, new_filters, filters or {})
+    chunks = None
+    try:
+        cursor = conn.cursor()
+        _create_diff_side(cursor, "diff_old", old_filters, filters or {}, table_columns)
+        _create_diff_side(cursor, "diff_new", new_filters, filters or {}, table_columns)
+        
+        chunks = pd.read_sql(_bom_diff_query(), conn, chunksize=chunksize)
+        for chunk in chunks:
+            yield chunk
+    finally:
+        # 連線會回到連線池重複使用，暫存表需在歸還前刪除；
+        # 中途停止讀取時先關閉查詢，否則暫存表仍被鎖定而無法刪除
+        if chunks is not None:
+            chunks.close()
+        conn.execute("DROP TABLE IF EXISTS temp.diff_old")
+        conn.execute("DROP TABLE IF EXISTS temp.diff_new")
+        conn.close()
+
+
+def calculate_bom_diff(old_filters: dict, new_filters: dict,
+                       filters: dict = None) -> pd.DataFrame:
+    """比較兩個 Quarter（或兩個上傳批次）的 EE_BOM，回傳完整差異"""
+    chunks = list(iter_bom_diff(old_filters, new_filters, filters))
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+def summarize_bom_diff(old_filters: dict, new_filters: dict,
+                       filters: dict = None, diff: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    每個 PARENT_DPN 的新增/移除/變更筆數與 EXT_COST 差額
+    diff: 已計算的 calculate_bom_diff 結果（同樣的條件），變更筆數由此統計，不再重新比較
+    """
+    if not table_exists("EE_BOM") or "EXT_COST" not in get_table_columns("EE_BOM"):
+        return pd.DataFrame()
+    
+    totals = []
+    for side, side_filters in [("Old", old_filters), ("New", new_filters)]:
+        side_filters = {**(filters or {}), **side_filters}
+        where_sql, params = build_where_clause(side_filters)
+        totals.append(read_query("EE_BOM", f"""
+            SELECT PARENT_DPN, MAX(Project_Name) AS Project_Name,
+                   SUM(EXT_COST) AS {side}_EXT_COST
+            FROM EE_BOM{where_sql}
+            GROUP BY PARENT_DPN
+        """, params, side_filters))
+    
+    summary = totals[0].merge(totals[1], on="PARENT_DPN", how="outer",
+                              suffixes=("_old", "_new"))
+    summary["Project_Name"] = summary["Project_Name_new"].fillna(summary["Project_Name_old"])
+    summary = summary.drop(columns=["Project_Name_old", "Project_Name_new"])
+    summary["Cost_Delta"] = summary["New_EXT_COST"].fillna(0) - summary["Old_EXT_COST"].fillna(0)
+    
+    # 各 PARENT_DPN 的變更筆數
+    counts = {"added": {}, "removed": {}, "changed": {}}
+    if diff is not None:
+        chunks = [diff] if not diff.empty else []
+    else:
+        chunks = iter_bom_diff(old_filters, new_filters, filters)
+    for chunk in chunks:
+        grouped = chunk.groupby(["Change_Type", "PARENT_DPN"]).size()
+        for (change_type, parent_dpn), n in grouped.items():
+            counts[change_type][parent_dpn] = counts[change_type].get(parent_dpn, 0) + n
+    for change_type, per_parent in counts.items():
+        summary[change_type.capitalize()] = summary["PARENT_DPN"].map(per_parent).fillna(0).astype(int)
+    
+    columns = ["Project_Name", "PARENT_DPN", "Old_EXT_COST", "New_EXT_COST",
+               "Cost_Delta", "Added", "Removed", "Changed"]
+    return summary[columns].sort_values("PARENT_DPN").reset_index(drop=True)
+
+
+def export_bom_diff_csv(output, old_filters: dict, new_filters: dict,
+                        filters: dict = None) -> int:
+    """
+    將差異逐批寫入 CSV（output 為檔案路徑或可寫入的 file object），
+    不必一次把完整差異載入記憶體
+    回傳寫入的筆數
+    """
+    close_output = isinstance(output, (str, Path))
+    if close_output:
+        output = open(output, "w", encoding="utf-8-sig", newline="")
+    
+    count = 0
+    try:
+        for i, chunk in enumerate(iter_bom_diff(old_filters, new_filters, filters)):
+            chunk.to_csv(output, index=False, header=(i == 0))
+            count += len(chunk)
+    finally:
+        if close_output:
+            output.close()
+    return count
@@ -0,0 +1,144 @@
+"""預估 EM/MVA 計算"""
+import pandas as pd
+
+from . import config
+from .compact import compact_frame
+from .db import get_all_data, get_plant_generation, get_project_mva_info, query_data
+from .quarters import get_next_quarter, get_quarter_distance
+from .rollup import get_bom_rollup
+
+# 預估報表讀取的資料表（匯出快取依這些 table 的資料版本判斷是否過期）
+ESTIMATE_SOURCE_TABLES = ["EE_BOM", "Cost_Adder_Logistic", "Plant_Generation", "Project_MVA_Info"]
+
+
+def is_empty_value(value) -> bool:
+    """判斷值是否為空（NULL、空字串、純空白）"""
+    if pd.isna(value):
+        return True
+    if isinstance(value, str) and value.strip() == "":
+        return True
+    return False
+
+
+def calculate_em_mva(cur_quarter: str) -> pd.DataFrame:
+    """計算 EM/MVA 預估報表"""
+    next_quarter = get_next_quarter(cur_quarter)
+    
+    if not next_quarter:
+        return pd.DataFrame()
+    
+    # 取得資料
+    ee_bom_df = query_data("EE_BOM", {"Quarter": [cur_quarter]})
+    cost_adder_df = get_all_data("Cost_Adder_Logistic")
+    plant_gen_df = get_plant_generation()
+    mva_info_df = get_project_mva_info()
+    
+    if ee_bom_df.empty:
+        return pd.DataFrame()
+    
+    # 階層成本（包含下層組件），循環中的 PARENT_DPN 為空；
+    # 無法計算階層成本（EE_BOM 缺少 DPN / EXT_COST）的 PARENT_DPN 使用直屬料件的成本
+    rollup_costs = get_bom_rollup(cur_quarter).set_index("PARENT_DPN")["Rollup_Cost"]
+    
+    # Plant / Generation、Cost_Adder 的 MVA 先建成對照表（同一組 key 取第一筆）
+    plant_gen_map = {}
+    if not plant_gen_df.empty:
+        plant_gen_map = (
+            plant_gen_df.drop_duplicates(["Project_Name", "Parent_DPN"])
+            .set_index(["Project_Name", "Parent_DPN"])[["Plant", "Generation"]]
+            .to_dict("index")
+        )
+    cur_mva_map = {}
+    if not cost_adder_df.empty:
+        mva_rows = cost_adder_df[cost_adder_df["Sub_Cost_Category"] == "MVA"]
+        cur_mva_map = (
+            mva_rows.drop_duplicates("Parent_DPN").set_index("Parent_DPN")["Unit_Cost"].to_dict()
+        )
+    
+    results = []
+    
+    # 依 PARENT_DPN 分組（依首次出現的順序），每組只取一次
+    for parent_dpn, dpn_ee_bom in ee_bom_df.groupby(
+        "PARENT_DPN", sort=False, observed=True, dropna=False
+    ):
+        # 取得 Project_Name
+        project_name = dpn_ee_bom["Project_Name"].iloc[0] if not dpn_ee_bom.empty else None
+        
+        # 取得 Plant 和 Generation
+        plant = None
+        generation = None
+        if project_name:
+            pg_match = plant_gen_map.get((project_name, parent_dpn))
+            if pg_match:
+                plant = pg_match["Plant"]
+                generation = pg_match["Generation"]
+        
+        # 取得 MVA Info
+        initial_mva = None
+        initial_quarter = None
+        adder = None
+        if not mva_info_df.empty and project_name:
+            mva_match = mva_info_df[mva_info_df["Project_Name"] == project_name]
+            if not mva_match.empty:
+                initial_mva = mva_match["Initial_MVA"].iloc[0]
+                initial_quarter = mva_match["Initial_Quarter"].iloc[0]
+                adder = mva_match["Adder"].iloc[0]
+        
+        # 計算 EM cost incl. QoQ & concession (cur_quarter)
+        cur_em_cost_total = dpn_ee_bom["EXT_COST"].sum() if "EXT_COST" in dpn_ee_bom.columns else 0
+        
+        # 計算 EM (w/ QoQ part) - BOM_COMMENT 為空的
+        if "BOM_COMMENT" in dpn_ee_bom.columns:
+            empty_comment_mask = dpn_ee_bom["BOM_COMMENT"].apply(is_empty_value).astype(bool)
+            cur_em_w_qoq = dpn_ee_bom.loc[empty_comment_mask, "EXT_COST"].sum() if "EXT_COST" in dpn_ee_bom.columns else 0
+            # 計算 EM (w/o QoQ part) - BOM_COMMENT 不為空的
+            next_em_wo_qoq = dpn_ee_bom.loc[~empty_comment_mask, "EXT_COST"].sum() if "EXT_COST" in dpn_ee_bom.columns else 0
+        else:
+            cur_em_w_qoq = cur_em_cost_total
+            next_em_wo_qoq = 0
+        
+        # 計算衰減率
+        decay_rate = 0
+        if initial_quarter:
+            quarter_distance = get_quarter_distance(initial_quarter, cur_quarter)
+            if quarter_distance is not None and quarter_distance < 8:
+                decay_rate = 0.02
+        
+        # 計算 next_quarter EM (w/ QoQ part)
+        next_em_w_qoq = cur_em_w_qoq * (1 - decay_rate)
+        
+        # 計算 next_quarter EM cost incl. QoQ & concession
+        next_em_cost_total = next_em_w_qoq + next_em_wo_qoq
+        
+        # 取得 cur_quarter MVA incl. QoQ
+        cur_mva = cur_mva_map.get(parent_dpn)
+        
+        # 計算 next_quarter MVA incl. QoQ
+        next_mva = None
+        if initial_mva is not None and initial_quarter and adder is not None:
+            delta_q = get_quarter_distance(initial_quarter, cur_quarter)
+            if delta_q is not None:
+                delta_q += 1  # (cur_quarter - Initial_Quarter) + 1
+                if delta_q > 8:
+                    next_mva = cur_mva
+                else:
+                    next_mva = round(initial_mva * (0.98 ** delta_q)) + adder
+        
+        # 組合結果
+        results.append({
+            "Plant": plant,
+            "Generation": generation,
+            "Project_Name": project_name,
+            "PARENT_DPN": parent_dpn,
+            f"{cur_quarter} EM cost incl. QoQ & concession": cur_em_cost_total,
+            f"{cur_quarter} EM rollup cost": rollup_costs.get(parent_dpn, cur_em_cost_total),
+            f"{next_quarter} EM cost incl. QoQ & concession": next_em_cost_total,
+            f"{cur_quarter} EM (w/ QoQ part)": cur_em_w_qoq,
+            f"{next_quarter} EM (w/ QoQ part)": next_em_w_qoq,
+            f"{next_quarter} EM (w/o QoQ part)": next_em_wo_qoq,
+            f"{cur_quarter} MVA incl. QoQ": cur_mva,
+            f"{next_quarter} MVA incl. QoQ": next_mva,
+        })
+    
+    result_df = pd.DataFrame(results)
+    return compact_frame(result_df) if config.COMPACT_RESULTS else result_df
@@ -0,0 +1,164 @@
+"""
+Excel 讀取引擎
+
+依 config.EXCEL_READER_ENGINE 選擇讀取引擎：
+- "calamine"：Rust 實作的 python-calamine（需另外安裝），各工作表在不同 thread 同時解析
+- "openpyxl"：預設安裝的引擎，以唯讀模式逐列取出儲存格（依儲存格型別辨識錯誤值），
+  workbook 只開啟一次，各工作表依序解析（純 Python 解析受 GIL 限制，多 thread 反而較慢）
+- "auto"（預設）：有安裝 python-calamine 時使用 calamine，否則使用 openpyxl
+
+openpyxl 取出的值交給 pandas 的 TextParser 推斷欄位型別（與 pd.read_excel 相同的處理），
+兩種引擎讀出的 DataFrame 相同。
+"""
+import importlib.util
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from . import config
+
+# 引擎名稱 → 需要的 Python 套件（依速度排序）
+READER_ENGINES = {
+    "calamine": "python_calamine",
+    "openpyxl": "openpyxl",
+}
+
+# openpyxl 錯誤儲存格（#DIV/0!、#N/A 等）的 data_type；內容相同的文字儲存格不受影響
+TYPE_ERROR = "e"
+
+
+class MissingSheetsError(ValueError):
+    """上傳的 Excel 缺少必要的工作表"""
+    
+    def __init__(self, missing_sheets: list, sheet_names: list):
+        self.missing_sheets = missing_sheets
+        self.sheet_names = sheet_names
+        super().__init__(f"缺少以下工作表：{', '.join(missing_sheets)}")
+
+
+def available_engines() -> list:
+    """目前環境可用的讀取引擎（依速度排序）"""
+    return [
+        engine for engine, module in READER_ENGINES.items()
+        if importlib.util.find_spec(module) is not None
+    ]
+
+
+def select_engine(engine: str = None) -> str:
+    """決定要使用的讀取引擎；指定的引擎未安裝時拋出 ImportError"""
+    engine = engine or config.EXCEL_READER_ENGINE
+    if engine == "auto":
+        return available_engines()[0]
+    if engine not in READER_ENGINES:
+        raise ValueError(f"未知的 Excel 讀取引擎：{engine}")
+    if engine not in available_engines():
+        raise ImportError(f"Excel 讀取引擎 {engine} 需要安裝 {READER_ENGINES[engine]}")
+    return engine
+
+
+def _workbook_bytes(file) -> bytes:
+    """讀出檔案內容（路徑、bytes、Streamlit UploadedFile 或其他 file-like object）"""
+    if isinstance(file, bytes):
+        return file
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return f.read()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    file.seek(0)
+    return file.read()
+
+
+def _rows_to_frame(rows: list) -> pd.DataFrame:
+    """以第一列為標題，交給 pandas 推斷型別（與 pd.read_excel 相同的處理）"""
+    if not rows:
+        return pd.DataFrame()
+    return TextParser(rows, header=0).read()
+
+
+def _convert_cell(cell):
+    """
+    與 pandas openpyxl 引擎相同的儲存格轉換：空白 → ""、錯誤儲存格 → 空值、整數值的 float → int
+    只有錯誤儲存格轉為空值，內容剛好是 "#N/A" 等的文字儲存格交給 TextParser 依 na_values 處理
+    """
+    value = cell.value
+    if value is None:
+        return ""
+    if cell.data_type == TYPE_ERROR:
+        return float("nan")
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def _openpyxl_rows(sheet) -> list:
+    """取出工作表的所有列（去除尾端的空白儲存格與空白列，並補齊為相同寬度）"""
+    sheet.reset_dimensions()
+    rows = []
+    last_row_with_data = -1
+    for row_number, cells in enumerate(sheet.iter_rows()):
+        row = [_convert_cell(cell) for cell in cells]
+        while row and row[-1] == "":
+            row.pop()
+        if row:
+            last_row_with_data = row_number
+        rows.append(row)
+    rows = rows[:last_row_with_data + 1]
+    
+    width = max((len(row) for row in rows), default=0)
+    return [row + [""] * (width - len(row)) for row in rows]
+
+
+def _read_openpyxl(data: bytes, names: list) -> dict:
+    import openpyxl
+    
+    workbook = openpyxl.load_workbook(
+        io.BytesIO(data), read_only=True, data_only=True, keep_links=False
+    )
+    try:
+        sheet_names = workbook.sheetnames
+        names = [sheet_names[0] if name == 0 else name for name in names]
+        missing = [name for name in names if name not in sheet_names]
+        if missing:
+            raise MissingSheetsError(missing, sheet_names)
+        return {name: _rows_to_frame(_openpyxl_rows(workbook[name])) for name in names}
+    finally:
+        workbook.close()
+
+
+def _read_calamine(data: bytes, names: list) -> dict:
+    with pd.ExcelFile(io.BytesIO(data), engine="calamine") as excel_file:
+        sheet_names = excel_file.sheet_names
+    names = [sheet_names[0] if name == 0 else name for name in names]
+    missing = [name for name in names if name not in sheet_names]
+    if missing:
+        raise MissingSheetsError(missing, sheet_names)
+    
+    def parse(name):
+        return pd.read_excel(io.BytesIO(data), sheet_name=name, engine="calamine")
+    
+    workers = min(config.EXCEL_READER_WORKERS, len(names))
+    if workers <= 1:
+        return {name: parse(name) for name in names}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(names, executor.map(parse, names)))
+
+
+def read_sheets(file, names: list, engine: str = None) -> dict:
+    """
+    讀取多個工作表（名稱為 0 時代表第一個工作表）
+    缺少工作表時拋出 MissingSheetsError
+    回傳：{工作表名稱: DataFrame}
+    """
+    data = _workbook_bytes(file)
+    if select_engine(engine) == "calamine":
+        return _read_calamine(data, names)
+    return _read_openpyxl(data, names)
+
+
+def read_sheet(file, engine: str = None) -> pd.DataFrame:
+    """讀取第一個工作表"""
+    return next(iter(read_sheets(file, [0], engine).values()))
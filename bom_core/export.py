@@ -0,0 +1,15 @@
+"""Excel 匯出"""
+import io
+
+import pandas as pd
+
+
+def to_excel_bytes(df: pd.DataFrame, sheet_name: str) -> bytes:
+    """
+    將 DataFrame 轉為 xlsx 檔案內容
+    xlsxwriter 只在實際匯出時才由 pandas 載入，不影響其他頁面的啟動時間
+    """
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+    return output.getvalue()
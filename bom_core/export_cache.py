@@ -0,0 +1,120 @@
+"""
+匯出檔案快取
+
+產生過的報表檔案存放在 {EXPORT_CACHE_DIR}/{name}@{依賴的 table}/ 下，
+檔名由「正規化後的篩選條件 + 檔案格式」與「依賴 table 的資料版本」組成：
+
+    export_cache/EE_BOM@EE_BOM/{篩選條件 hash}-{版本 hash}.xlsx
+
+同樣的篩選條件再次下載時直接讀取檔案；上傳新資料後資料版本改變，舊檔案不會再被使用，
+並由 invalidate_export_cache 刪除。總大小超過 EXPORT_CACHE_MAX_BYTES 時，
+依最後使用時間（mtime）刪除最久未使用的檔案。
+"""
+import glob
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from . import config
+from .db import get_data_versions
+
+_evict_lock = threading.Lock()
+
+
+def normalize_filters(filters: dict) -> dict:
+    """正規化篩選條件：移除空條件，值去重並排序（選擇順序不同視為相同條件）"""
+    return {
+        col: sorted({str(v) for v in values})
+        for col, values in sorted((filters or {}).items())
+        if values
+    }
+
+
+def content_digest(value) -> str:
+    """條件、資料版本等 JSON 可序列化內容的 hash（作為快取 key）"""
+    text = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:24]
+
+
+def _cache_dir(name: str, tables: list) -> str:
+    return os.path.join(config.EXPORT_CACHE_DIR, f"{name}@{'+'.join(sorted(tables))}")
+
+
+def cached_export(name: str, tables: list, filters: dict, fmt: str, build,
+                  versions: dict = None) -> bytes:
+    """
+    取得匯出檔案內容，有快取時直接讀取檔案，否則呼叫 build() 產生並寫入快取
+    name: 報表名稱（例如 table 名稱、"EM_MVA_Estimate"）
+    tables: 報表內容依賴的 table（任一 table 的資料版本改變，快取即失效）
+    filters: 產生報表的條件；fmt: 檔案格式（副檔名）
+    versions: 報表資料讀取當時的資料版本（get_data_versions），預設為目前版本；
+              資料先算好、稍後才匯出時（例如存在 session 中的預估結果）需要指定
+    """
+    directory = _cache_dir(name, tables)
+    filters_key = content_digest({"filters": normalize_filters(filters), "format": fmt})
+    version_key = content_digest(versions if versions is not None else get_data_versions(tables))
+    path = os.path.join(directory, f"{filters_key}-{version_key}.{fmt}")
+    
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        os.utime(path)  # 更新最後使用時間（LRU）
+        return data
+    except FileNotFoundError:
+        pass
+    
+    data = build()
+    
+    # 先寫到暫存檔再改名，其他 session 不會讀到寫一半的檔案
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    
+    # 同一組條件的舊版本檔案已不會再使用
+    for old_path in glob.glob(os.path.join(directory, f"{filters_key}-*.{fmt}")):
+        if old_path != path:
+            _remove(old_path)
+    
+    evict_export_cache()
+    return data
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def evict_export_cache(max_bytes: int = None):
+    """總大小超過 max_bytes（預設 EXPORT_CACHE_MAX_BYTES）時，刪除最久未使用的檔案"""
+    max_bytes = config.EXPORT_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    with _evict_lock:
+        entries = []
+        for path in glob.glob(os.path.join(config.EXPORT_CACHE_DIR, "*", "*")):
+            if path.endswith(".tmp"):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+
+def invalidate_export_cache(tables: list = None):
+    """刪除依賴 tables 的快取檔案（未指定時全部刪除）"""
+    for directory in glob.glob(os.path.join(config.EXPORT_CACHE_DIR, "*@*")):
+        depends_on = os.path.basename(directory).split("@", 1)[1].split("+")
+        if tables is None or set(depends_on) & set(tables):
+            shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,195 @@
+"""
+變更紀錄（change feed）：匯出某個 watermark 之後新增的資料
+
+每次上傳（ingest_workbook）完成時，在同一個 transaction 中取得遞增的序號（Ingest_Jobs.Seq）；
+該次上傳寫入的資料都帶有相同的 created_at。直接呼叫 insert_data / insert_new_rows（未指定 created_at）
+寫入的資料，每次呼叫也會記錄為一個批次並取得序號。下游記錄已處理的最大序號（watermark），
+下次只讀取序號更大的上傳批次（以 created_at 索引查詢），成本與新增的資料量成正比，與 table 大小無關。
+
+- 只包含已提交的資料：中斷後 rollback 的分段不會出現；尚未完成的上傳要等續傳完成後才會出現
+- watermark 為 0 時匯出完整資料（包含建立變更紀錄前的舊資料），作為初次同步
+- 每個上傳批次依 FEED_CHUNK_ROWS 分成多個 CSV / Parquet 檔案，另寫出 manifest（JSON）
+
+命令列（以唯讀方式開啟資料庫，不建立或修改任何 table；資料庫需先由 App 初始化並建立序號欄位）：
+
+    python -m bom_core.feed --db database.db --out feed/ --state feed_state.json --format parquet
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from . import config
+from .config import FEED_TABLES, INGEST_JOBS_TABLE
+from .db import get_db_connection, get_table_columns, iter_query, table_exists
+from .storage import is_columnar
+
+FEED_FORMATS = {"csv": ".csv", "parquet": ".parquet"}
+
+
+def get_feed_watermark() -> int:
+    """目前最新的序號（已完成上傳的數量）"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute(f"SELECT COALESCE(MAX(Seq), 0) FROM {INGEST_JOBS_TABLE}").fetchone()
+        return row[0]
+    finally:
+        conn.close()
+
+
+def get_changes(since: int = 0, until: int = None) -> pd.DataFrame:
+    """序號介於 (since, until] 的上傳批次：Seq, Upload_ID, created_at, finished_at"""
+    until = get_feed_watermark() if until is None else until
+    conn = get_db_connection()
+    try:
+        return pd.read_sql(
+            f"""
+            SELECT Seq, Upload_ID, created_at, finished_at
+            FROM {INGEST_JOBS_TABLE}
+            WHERE Seq > ? AND Seq <= ?
+            ORDER BY Seq
+            """,
+            conn,
+            params=[since, until]
+        )
+    finally:
+        conn.close()
+
+
+def _snapshot_query(table_name: str, until: int) -> tuple:
+    """
+    完整匯出的查詢：排除 watermark 之後才完成（或尚未完成）的上傳批次
+    SQLite 以子查詢在同一個查詢中判斷（與讀取的資料一致）；欄式儲存無法讀取 SQLite 的 job 表，改為先查出批次
+    """
+    pending_sql = f"SELECT created_at FROM {INGEST_JOBS_TABLE} WHERE Seq IS NULL OR Seq > ?"
+    if not is_columnar(table_name):
+        return (
+            f"SELECT * FROM {table_name} "
+            f"WHERE created_at IS NULL OR created_at NOT IN ({pending_sql})",
+            [until]
+        )
+    
+    conn = get_db_connection()
+    try:
+        pending = [row[0] for row in conn.execute(pending_sql, (until,)).fetchall()]
+    finally:
+        conn.close()
+    if not pending:
+        return f"SELECT * FROM {table_name}", []
+    placeholders = ", ".join("?" for _ in pending)
+    return (
+        f"SELECT * FROM {table_name} "
+        f"WHERE created_at IS NULL OR created_at NOT IN ({placeholders})",
+        pending
+    )
+
+
+def iter_changes(table_name: str, since: int = 0, until: int = None,
+                 chunksize: int = None):
+    """
+    逐批產生 table_name 在序號 (since, until] 之間新增的資料
+    每批為 (Seq, DataFrame)，DataFrame 最多 chunksize（預設 FEED_CHUNK_ROWS）筆並包含 created_at；
+    since 為 0 時產生完整資料，Seq 為 0
+    """
+    until = get_feed_watermark() if until is None else until
+    chunksize = chunksize or config.FEED_CHUNK_ROWS
+    if not table_exists(table_name):
+        return
+    
+    if since == 0:
+        query, params = _snapshot_query(table_name, until)
+        for chunk in iter_query(table_name, query, params, None, chunksize):
+            yield 0, chunk
+        return
+    
+    for batch in get_changes(since, until).itertuples():
+        filters = {"created_at": [batch.created_at]}
+        query = f"SELECT * FROM {table_name} WHERE created_at = ?"
+        for chunk in iter_query(table_name, query, [batch.created_at], filters, chunksize):
+            yield batch.Seq, chunk
+
+
+def _parquet_safe(df: pd.DataFrame) -> pd.DataFrame:
+    """同一欄混有數字與文字時（Excel 欄位常見）轉為文字，Parquet 每欄只能有一種型別"""
+    for col in df.columns:
+        series = df[col]
+        if series.dtype == object and pd.api.types.infer_dtype(series, skipna=True).startswith("mixed"):
+            df[col] = series.where(series.isna(), series.astype(str))
+    return df
+
+
+def _write_chunk(df: pd.DataFrame, path: str, fmt: str):
+    if fmt == "parquet":
+        _parquet_safe(df).to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, encoding="utf-8")
+
+
+def export_changes(output_dir: str, since: int = 0, fmt: str = "csv",
+                   tables: list = None, chunksize: int = None) -> dict:
+    """
+    將序號 since 之後的新增資料寫到 output_dir
+    檔名：{table}_{since}-{watermark}_{part}.csv|parquet，另寫出 manifest_{since}-{watermark}.json
+    回傳 manifest：{"since", "watermark", "format", "rows": {table: 筆數}, "files": [...]}
+    """
+    if fmt not in FEED_FORMATS:
+        raise ValueError(f"未知的輸出格式：{fmt}")
+    watermark = get_feed_watermark()
+    if since > watermark:
+        raise ValueError(f"watermark {since} 大於目前的序號 {watermark}（資料庫是否已更換？）")
+    
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = {"since": since, "watermark": watermark, "format": fmt, "rows": {}, "files": []}
+    for table_name in tables or FEED_TABLES:
+        manifest["rows"][table_name] = 0
+        for part, (seq, chunk) in enumerate(iter_changes(table_name, since, watermark, chunksize)):
+            chunk.insert(0, "Feed_Seq", seq)
+            name = f"{table_name}_{since}-{watermark}_{part:05d}{FEED_FORMATS[fmt]}"
+            _write_chunk(chunk, os.path.join(output_dir, name), fmt)
+            manifest["rows"][table_name] += len(chunk)
+            manifest["files"].append(name)
+    
+    manifest_path = os.path.join(output_dir, f"manifest_{since}-{watermark}.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="匯出 watermark 之後新增的 BOM 資料")
+    parser.add_argument("--db", default=config.DB_PATH)
+    parser.add_argument("--out", required=True, help="輸出目錄")
+    parser.add_argument("--since", type=int, default=None, help="上次匯出的 watermark（預設 0：完整匯出）")
+    parser.add_argument("--state", help="記錄 watermark 的 JSON 檔；未指定 --since 時由此讀取，匯出後更新")
+    parser.add_argument("--format", choices=list(FEED_FORMATS), default="csv")
+    parser.add_argument("--tables", nargs="+", default=FEED_TABLES)
+    parser.add_argument("--chunksize", type=int, default=config.FEED_CHUNK_ROWS)
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.db):
+        raise SystemExit(f"找不到資料庫：{args.db}")
+    config.DB_PATH = args.db
+    config.DB_READ_ONLY = True
+    if "Seq" not in get_table_columns(INGEST_JOBS_TABLE):
+        raise SystemExit(
+            f"{args.db} 的 {INGEST_JOBS_TABLE} 沒有 Seq 欄位（尚未建立變更紀錄序號），"
+            "請先以目前版本的 App 開啟資料庫完成初始化後再匯出"
+        )
+    
+    since = args.since
+    if since is None and args.state and os.path.exists(args.state):
+        with open(args.state, encoding="utf-8") as f:
+            since = json.load(f)["watermark"]
+    
+    manifest = export_changes(args.out, since or 0, args.format, args.tables, args.chunksize)
+    if args.state:
+        with open(args.state, "w", encoding="utf-8") as f:
+            json.dump({"watermark": manifest["watermark"]}, f)
+    
+    rows = ", ".join(f"{table} {count}" for table, count in manifest["rows"].items())
+    print(f"{manifest['since']} -> {manifest['watermark']}: {rows} 筆，{len(manifest['files'])} 個檔案")
+
+
+if __name__ == "__main__":
+    main()
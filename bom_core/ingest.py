@@ -0,0 +1,240 @@
+"""上傳 Excel 的解析與寫入"""
+import hashlib
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from . import config, partitions
+from .config import INGEST_CHECKPOINT_TABLE, INGEST_JOBS_TABLE
+from .db import get_db_connection, insert_new_rows
+from .excel import MissingSheetsError, read_sheets
+from .export_cache import invalidate_export_cache
+from .maintenance import after_ingest
+from .metadata import refresh_metadata
+from .quarters import date_to_quarter
+from .schema import archive_old_quarters, ensure_indexes
+
+# 上傳的 Excel 必須包含的工作表
+REQUIRED_SHEETS = ["EE_BOM", "Cost_Adder_Logistic"]
+
+
+def parse_project_name(filename: str) -> str:
+    """
+    從檔名解析 Project_Name
+    規則：以底線分隔，取第 3 個欄位（index 2）
+    """
+    name_without_ext = Path(filename).stem
+    parts = name_without_ext.split("_")
+    
+    if len(parts) >= 3:
+        return parts[2]
+    else:
+        return name_without_ext
+
+
+def read_workbook(file) -> tuple:
+    """
+    讀取 EE_BOM 和 Cost_Adder_Logistic 兩個工作表（讀取引擎見 excel.py）
+    file: 檔案路徑或 file-like object
+    缺少工作表時拋出 MissingSheetsError
+    """
+    frames = read_sheets(file, REQUIRED_SHEETS)
+    return frames["EE_BOM"], frames["Cost_Adder_Logistic"]
+
+
+def prepare_workbook(df_ee_bom: pd.DataFrame, df_cost_adder: pd.DataFrame,
+                     project_name: str) -> tuple:
+    """
+    加入 Project_Name 與 Quarter 欄位
+    EE_BOM 的 Quarter 由 Effective_Start_Date 轉換，
+    Cost_Adder_Logistic 的 Quarter 依 Parent_DPN 對應 EE_BOM
+    回傳：(df_ee_bom, df_cost_adder, quarter)；沒有 Effective_Start_Date 時 quarter 為 None
+    """
+    df_ee_bom = df_ee_bom.copy()
+    df_cost_adder = df_cost_adder.copy()
+    
+    # 加入 Project_Name 欄位
+    df_ee_bom.insert(0, "Project_Name", project_name)
+    df_cost_adder.insert(0, "Project_Name", project_name)
+    
+    # 轉換 Effective_Start_Date 為 Quarter
+    quarter_value = None
+    if "Effective_Start_Date" in df_ee_bom.columns:
+        # 取第一筆有效的日期來轉換
+        for date_val in df_ee_bom["Effective_Start_Date"]:
+            q = date_to_quarter(date_val)
+            if q:
+                quarter_value = q
+                break
+    df_ee_bom["Quarter"] = quarter_value
+    
+    # Cost_Adder_Logistic 的 Quarter 來自 EE_BOM
+    # 根據 Parent_DPN 匹配（取第一筆匹配的）
+    if "Parent_DPN" in df_cost_adder.columns and "PARENT_DPN" in df_ee_bom.columns:
+        # 建立 PARENT_DPN -> Quarter 的對應
+        dpn_quarter_map = df_ee_bom.groupby("PARENT_DPN")["Quarter"].first().to_dict()
+        df_cost_adder["Quarter"] = df_cost_adder["Parent_DPN"].map(dpn_quarter_map)
+    else:
+        df_cost_adder["Quarter"] = quarter_value
+    
+    return df_ee_bom, df_cost_adder, quarter_value
+
+
+def load_workbook(file, filename: str = None) -> tuple:
+    """
+    讀取並整理一份上傳的 Excel
+    filename: 用來解析 Project_Name，預設使用 file 的檔名
+    回傳：(df_ee_bom, df_cost_adder, quarter)
+    """
+    filename = filename or getattr(file, "name", None) or str(file)
+    df_ee_bom, df_cost_adder = read_workbook(file)
+    return prepare_workbook(df_ee_bom, df_cost_adder, parse_project_name(filename))
+
+
+def workbook_id(df_ee_bom: pd.DataFrame, df_cost_adder: pd.DataFrame) -> str:
+    """以兩個 Sheet 的內容計算上傳 ID（同一份 Excel 重新上傳時相同）"""
+    digest = hashlib.sha1()
+    for df in (df_ee_bom, df_cost_adder):
+        digest.update("\x1f".join(map(str, df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def _start_job(conn, upload_id: str, chunk_rows: int) -> dict:
+    """取得上傳 job；第一次上傳時建立（記錄分段大小與批次時間，續傳時沿用）"""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT Status, Chunk_Rows, created_at FROM {INGEST_JOBS_TABLE} WHERE Upload_ID = ?",
+        (upload_id,)
+    )
+    row = cursor.fetchone()
+    if row is not None:
+        return dict(row)
+    
+    created_at = datetime.now().isoformat()
+    conn.execute(
+        f"INSERT INTO {INGEST_JOBS_TABLE} (Upload_ID, Status, Chunk_Rows, created_at) "
+        "VALUES (?, 'running', ?, ?)",
+        (upload_id, chunk_rows, created_at)
+    )
+    conn.commit()
+    return {"Status": "running", "Chunk_Rows": chunk_rows, "created_at": created_at}
+
+
+def _load_checkpoints(conn, upload_id: str) -> dict:
+    """已提交的分段：{(table_name, chunk): 新增筆數}"""
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT Table_Name, Chunk, Rows FROM {INGEST_CHECKPOINT_TABLE} WHERE Upload_ID = ?",
+        (upload_id,)
+    )
+    return {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+
+
+def _commit_chunks(conn, upload_id: str, chunks: list, created_at: str,
+                   inserted: dict, finish: bool = False):
+    """
+    在同一個 transaction 中寫入 chunks（insert_new_rows 同時累加成本 cube）、加入新料號到搜尋索引並記錄 checkpoint；
+    finish 時一併將 job 標記為完成
+    """
+    counts = {}
+    with conn.transaction():
+        for table_name, chunk, df in chunks:
+            rows = len(insert_new_rows(table_name, df, conn=conn, created_at=created_at))
+            conn.execute(
+                f"INSERT INTO {INGEST_CHECKPOINT_TABLE} VALUES (?, ?, ?, ?)",
+                (upload_id, table_name, chunk, rows)
+            )
+            counts[table_name] = counts.get(table_name, 0) + rows
+        if finish:
+            # 序號在完成的 transaction 中取得，依提交順序遞增（變更紀錄的 watermark）
+            conn.execute(
+                f"UPDATE {INGEST_JOBS_TABLE} SET Status = 'done', finished_at = ?, "
+                f"Seq = (SELECT COALESCE(MAX(Seq), 0) + 1 FROM {INGEST_JOBS_TABLE}) "
+                "WHERE Upload_ID = ?",
+                (datetime.now().isoformat(), upload_id)
+            )
+    
+    for table_name, rows in counts.items():
+        inserted[table_name] += rows
+
+
+def get_interrupted_uploads() -> pd.DataFrame:
+    """尚未完成的上傳（重新上傳同一份 Excel 即可從中斷處繼續）"""
+    conn = get_db_connection()
+    try:
+        return pd.read_sql(
+            f"""
+            SELECT j.Upload_ID, j.created_at, COUNT(c.Chunk) AS Chunks, SUM(c.Rows) AS Rows
+            FROM {INGEST_JOBS_TABLE} j
+            LEFT JOIN {INGEST_CHECKPOINT_TABLE} c ON c.Upload_ID = j.Upload_ID
+            WHERE j.Status = 'running'
+            GROUP BY j.Upload_ID, j.created_at
+            ORDER BY j.created_at DESC
+            """,
+            conn
+        )
+    finally:
+        conn.close()
+
+
+def ingest_workbook(df_ee_bom: pd.DataFrame, df_cost_adder: pd.DataFrame,
+                    chunk_rows: int = None) -> dict:
+    """
+    寫入一份已整理的 Excel（跳過重複資料），並更新索引、metadata 與料號搜尋索引
+    
+    每累積 chunk_rows（預設 INGEST_CHUNK_ROWS）筆在同一個 transaction 中提交，並記錄 checkpoint；
+    較小的 Excel 兩個 Sheet 會在同一個 transaction 中完成。
+    中斷後重新上傳同一份 Excel，會從最後提交的分段繼續；已完成的上傳直接略過。
+    回傳：{table_name: 實際新增的筆數}
+    """
+    frames = {"EE_BOM": df_ee_bom, "Cost_Adder_Logistic": df_cost_adder}
+    upload_id = workbook_id(df_ee_bom, df_cost_adder)
+    
+    conn = get_db_connection()
+    try:
+        job = _start_job(conn, upload_id, chunk_rows or config.INGEST_CHUNK_ROWS)
+        if job["Status"] == "done":
+            return {table_name: 0 for table_name in frames}
+        
+        chunk_rows = job["Chunk_Rows"]
+        done = _load_checkpoints(conn, upload_id)
+        inserted = {
+            table_name: sum(rows for (t, _), rows in done.items() if t == table_name)
+            for table_name in frames
+        }
+        # 搬回已封存的 Quarter 會修改封存資料庫，需在寫入資料的 transaction 之外完成
+        partitions.restore_quarters(conn, list(frames.values()))
+        
+        # 依固定大小分段（續傳時分段位置不變），跳過已提交的分段
+        pending = []
+        pending_rows = 0
+        for table_name, df in frames.items():
+            for chunk, start in enumerate(range(0, len(df), chunk_rows)):
+                if (table_name, chunk) in done:
+                    continue
+                chunk_df = df.iloc[start:start + chunk_rows]
+                pending.append((table_name, chunk, chunk_df))
+                pending_rows += len(chunk_df)
+                if pending_rows >= chunk_rows:
+                    _commit_chunks(conn, upload_id, pending, job["created_at"], inserted)
+                    pending = []
+                    pending_rows = 0
+        _commit_chunks(conn, upload_id, pending, job["created_at"], inserted, finish=True)
+    finally:
+        conn.close()
+    
+    ensure_indexes("EE_BOM")
+    ensure_indexes("Cost_Adder_Logistic")
+    
+    # 依 Quarter 分區時，將過舊的 Quarter 封存
+    archive_old_quarters()
+    
+    # 更新 metadata，並刪除過期的匯出檔案（料號搜尋索引已在寫入時更新，階層成本依資料版本重新計算）
+    refresh_metadata()
+    invalidate_export_cache([table_name for table_name, rows in inserted.items() if rows])
+    
+    # 更新查詢規劃的統計資訊（大量新增時完整 ANALYZE）
+    after_ingest(sum(inserted.values()))
+    return inserted
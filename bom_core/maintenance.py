@@ -0,0 +1,249 @@
+"""
+資料庫維護：ANALYZE、incremental vacuum、WAL checkpoint 與儲存空間統計
+
+- 上傳後：新增筆數超過 ANALYZE_AFTER_ROWS 時執行 ANALYZE，否則執行 PRAGMA optimize
+- 背景排程：資料庫閒置時執行 incremental vacuum 與 WAL checkpoint
+- storage_stats：各 table / 索引的筆數（ANALYZE 統計）、頁數、大小、未使用空間與碎片化程度（dbstat，資料庫未變更時使用快取）
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+from . import config
+from .db import get_db_connection, seconds_since_last_activity
+
+# PRAGMA auto_vacuum 的值
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+logger = logging.getLogger(__name__)
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def _pragma(conn, name: str):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+def configure_database(conn):
+    """
+    設定 journal mode；全新的資料庫（尚未建立任何 table）改用 incremental auto_vacuum
+    既有資料庫需透過 enable_incremental_vacuum 重建後才會生效
+    """
+    has_tables = conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone() is not None
+    if not has_tables and _pragma(conn, "auto_vacuum") == 0:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute(f"PRAGMA journal_mode = {config.DB_JOURNAL_MODE}")
+
+
+def optimize_database(analyze: bool = False) -> str:
+    """
+    更新查詢規劃用的統計資訊
+    analyze=True 時重新分析所有 table（ANALYZE），否則只分析有需要的（PRAGMA optimize）
+    """
+    conn = get_db_connection()
+    try:
+        conn.execute("ANALYZE" if analyze else "PRAGMA optimize")
+        conn.commit()
+    finally:
+        conn.close()
+    return "ANALYZE" if analyze else "PRAGMA optimize"
+
+
+def after_ingest(rows_inserted: int) -> str:
+    """上傳後的維護：大量新增時 ANALYZE，否則 PRAGMA optimize"""
+    return optimize_database(analyze=rows_inserted >= config.ANALYZE_AFTER_ROWS)
+
+
+def incremental_vacuum(max_pages: int = None) -> int:
+    """
+    釋放 freelist 中最多 max_pages 頁（預設 VACUUM_PAGES_PER_RUN）給檔案系統
+    資料庫未使用 incremental auto_vacuum 時不做任何事；回傳釋放的頁數
+    """
+    max_pages = config.VACUUM_PAGES_PER_RUN if max_pages is None else max_pages
+    conn = get_db_connection()
+    try:
+        if _pragma(conn, "auto_vacuum") != 2:
+            return 0
+        before = _pragma(conn, "freelist_count")
+        # execute() 只會執行一步（釋放一頁），executescript 才會執行到完成
+        conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        return before - _pragma(conn, "freelist_count")
+    finally:
+        conn.close()
+
+
+def enable_incremental_vacuum():
+    """將既有資料庫改為 incremental auto_vacuum（需要完整 VACUUM 重建，資料量大時較久）"""
+    conn = get_db_connection()
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+def checkpoint_wal(mode: str = "PASSIVE") -> dict:
+    """
+    將 WAL 寫回資料庫檔案；mode 為 PASSIVE / FULL / RESTART / TRUNCATE
+    非 WAL 模式時回傳 None
+    """
+    conn = get_db_connection()
+    try:
+        if _pragma(conn, "journal_mode") != "wal":
+            return None
+        busy, log_frames, checkpointed = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+        return {"busy": busy, "log_frames": log_frames, "checkpointed": checkpointed}
+    finally:
+        conn.close()
+
+
+def run_idle_maintenance(force: bool = False) -> dict:
+    """資料庫閒置超過 MAINTENANCE_IDLE_SECONDS 時（或 force）執行 incremental vacuum 與 WAL checkpoint"""
+    if not force and seconds_since_last_activity() < config.MAINTENANCE_IDLE_SECONDS:
+        return {}
+    return {
+        "vacuumed_pages": incremental_vacuum(),
+        "checkpoint": checkpoint_wal("TRUNCATE"),
+    }
+
+
+def _scheduler_loop():
+    while True:
+        time.sleep(config.MAINTENANCE_INTERVAL_SECONDS)
+        try:
+            run_idle_maintenance()
+        except Exception:  # 維護失敗（例如資料庫忙碌）時記錄下來，下次再試
+            logger.exception("idle maintenance failed")
+
+
+def start_maintenance_scheduler():
+    """啟動背景維護排程（每個 process 只會有一個）"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None or not _scheduler.is_alive():
+            _scheduler = threading.Thread(
+                target=_scheduler_loop, name="bom-maintenance", daemon=True
+            )
+            _scheduler.start()
+    return _scheduler
+
+
+def database_summary() -> dict:
+    """資料庫檔案的整體狀態"""
+    conn = get_db_connection()
+    try:
+        page_size = _pragma(conn, "page_size")
+        summary = {
+            "journal_mode": _pragma(conn, "journal_mode"),
+            "auto_vacuum": AUTO_VACUUM_MODES.get(_pragma(conn, "auto_vacuum")),
+            "page_size": page_size,
+            "page_count": _pragma(conn, "page_count"),
+            "freelist_count": _pragma(conn, "freelist_count"),
+        }
+    finally:
+        conn.close()
+    
+    wal_path = config.DB_PATH + "-wal"
+    summary["file_mb"] = os.path.getsize(config.DB_PATH) / 1e6 if os.path.exists(config.DB_PATH) else 0
+    summary["wal_mb"] = os.path.getsize(wal_path) / 1e6 if os.path.exists(wal_path) else 0
+    summary["free_mb"] = summary["freelist_count"] * page_size / 1e6
+    return summary
+
+
+def _fragmentation(pages: pd.Series) -> float:
+    """依 b-tree 順序排列的頁面中，下一頁不是緊接在後的比例"""
+    if len(pages) < 2:
+        return 0.0
+    return float((pages.diff().iloc[1:] != 1).mean())
+
+
+def _analyzed_row_counts(conn) -> dict:
+    """
+    各 table 最近一次 ANALYZE 時的筆數（sqlite_stat1 每列 stat 的第一個數字），
+    不需要逐一 COUNT(*)；尚未 ANALYZE 的 table 不在結果中
+    """
+    try:
+        stats = conn.execute("SELECT tbl, stat FROM sqlite_stat1").fetchall()
+    except sqlite3.OperationalError:  # 從未執行過 ANALYZE
+        return {}
+    return {tbl: int(stat.split()[0]) for tbl, stat in stats}
+
+
+def _database_state(conn) -> tuple:
+    """
+    判斷資料庫內容是否變更：頁數、空閒頁數、schema 版本與各 table 的資料版本
+    都只讀取 header 或一張小 table，不需要掃描資料
+    """
+    try:
+        versions = conn.execute(
+            f"SELECT Table_Name, Version FROM {config.DATA_VERSIONS_TABLE} ORDER BY Table_Name"
+        ).fetchall()
+    except sqlite3.OperationalError:  # 尚未初始化的資料庫
+        versions = []
+    return (
+        _pragma(conn, "page_count"), _pragma(conn, "freelist_count"), _pragma(conn, "schema_version"),
+        tuple(tuple(row) for row in versions),
+    )
+
+
+def _page_usage(conn) -> pd.DataFrame:
+    """由 dbstat 統計各 table / 索引的頁數、大小、未使用空間與碎片化程度（需掃描整個資料庫）"""
+    try:
+        pages = pd.read_sql(
+            "SELECT name, pageno, pgsize, unused FROM dbstat ORDER BY name, path", conn
+        )
+    except sqlite3.OperationalError:  # 沒有 dbstat virtual table
+        pages = pd.DataFrame(columns=["name", "pageno", "pgsize", "unused"])
+    
+    grouped = pages.groupby("name", sort=False)
+    return pd.DataFrame({
+        "Pages": grouped.size(),
+        "Size_MB": grouped["pgsize"].sum() / 1e6,
+        "Unused_Pct": grouped["unused"].sum() / grouped["pgsize"].sum() * 100,
+        "Fragmentation_Pct": grouped["pageno"].apply(_fragmentation) * 100,
+    })
+
+
+# {DB_PATH: (資料庫狀態, _page_usage 結果)}；資料庫未變更時（例如重新整理頁面）不重新掃描
+_usage_cache = {}
+_usage_lock = threading.Lock()
+
+
+def storage_stats(refresh: bool = False) -> pd.DataFrame:
+    """
+    各 table / 索引的儲存空間
+    Rows 為最近一次 ANALYZE 的筆數（上傳後會自動更新統計資訊），尚未 ANALYZE 的 table 為空；
+    頁數與大小需要 SQLite 編譯時啟用 dbstat，未啟用時這些欄位為空。
+    dbstat 需要讀取資料庫的每一頁，結果依資料庫狀態（頁數、schema 與資料版本）快取，
+    狀態未變更時直接使用上次的統計；refresh=True 時強制重新掃描
+    回傳欄位：Name, Type, Table, Rows, Pages, Size_MB, Unused_Pct, Fragmentation_Pct
+    """
+    conn = get_db_connection()
+    try:
+        objects = pd.read_sql(
+            "SELECT name AS Name, type AS Type, tbl_name AS \"Table\" FROM sqlite_master "
+            "WHERE type IN ('table', 'index')",
+            conn
+        )
+        row_counts = _analyzed_row_counts(conn)
+        
+        state = _database_state(conn)
+        with _usage_lock:
+            cached = _usage_cache.get(config.DB_PATH)
+        if refresh or cached is None or cached[0] != state:
+            usage = _page_usage(conn)
+            with _usage_lock:
+                _usage_cache[config.DB_PATH] = (state, usage)
+        else:
+            usage = cached[1]
+    finally:
+        conn.close()
+    
+    stats = objects.merge(usage, left_on="Name", right_index=True, how="left")
+    stats.insert(3, "Rows", stats["Name"].map(row_counts).astype("Int64"))
+    return stats.sort_values("Size_MB", ascending=False).reset_index(drop=True)
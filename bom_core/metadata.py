@@ -0,0 +1,55 @@
+"""Metadata：各篩選欄位的 unique values（metadata.json）"""
+import json
+import os
+
+from . import config
+from .config import METADATA_COLUMNS
+from .db import get_table_columns, run_query, table_exists
+
+
+def load_metadata() -> dict:
+    """載入 metadata.json"""
+    if os.path.exists(config.METADATA_PATH):
+        with open(config.METADATA_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"EE_BOM": {}, "Cost_Adder_Logistic": {}}
+
+
+def save_metadata(metadata: dict):
+    """儲存 metadata.json"""
+    with open(config.METADATA_PATH, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+
+def refresh_metadata():
+    """重新掃描資料庫，更新 metadata"""
+    metadata = {"EE_BOM": {}, "Cost_Adder_Logistic": {}}
+    
+    for table_name, columns in METADATA_COLUMNS.items():
+        if not table_exists(table_name):
+            continue
+        
+        metadata[table_name] = {}
+        table_columns = get_table_columns(table_name)
+        
+        for col in columns:
+            # 檢查欄位是否存在
+            if col not in table_columns:
+                continue
+            
+            # 取得 unique values，按 created_at 由新到舊排序
+            query = f"""
+                SELECT DISTINCT {col}, MAX(created_at) as last_seen
+                FROM {table_name}
+                WHERE {col} IS NOT NULL AND {col} != ''
+                GROUP BY {col}
+                ORDER BY last_seen DESC
+            """
+            results = run_query(table_name, query)
+            
+            # 只保留值，不保留 timestamp
+            unique_values = [str(row[0]) for row in results]
+            metadata[table_name][col] = unique_values
+    
+    save_metadata(metadata)
+    return metadata
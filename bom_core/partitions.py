@@ -0,0 +1,276 @@
+"""
+SQLite 依 Quarter 分區（選用）
+
+config.PARTITION_BY_QUARTER 開啟時，PARTITIONED_TABLES 的資料依 Quarter 存放：
+- 近期 Quarter：主資料庫中的 {table}__{quarter}，例如 EE_BOM__FY26Q1
+- 已封存的 Quarter：封存資料庫 {ARCHIVE_DIR}/archive.db（唯讀）中同名的 {table}__{quarter}
+
+查詢時在連線上建立與原 table 同名的 TEMP VIEW，只 UNION 篩選條件涵蓋的分區，
+封存資料庫以唯讀方式 ATTACH（不論封存了幾個 Quarter 都只 ATTACH 一次，SQLite 最多同時 ATTACH 10 個），
+查詢結束後再移除，呼叫端的 SQL 不需要修改。
+分區在主資料庫與封存資料庫之間搬移時先複製、提交後再刪除來源；中斷時兩邊可能同時存在，
+此時一律以主資料庫中的分區為準。
+"""
+import os
+import sqlite3
+from contextlib import contextmanager
+from urllib.parse import quote
+
+from . import config
+from .config import PARTITIONED_TABLES, QUARTER_LIST
+
+# Quarter 為空的資料所在的分區名稱
+NULL_QUARTER = "NULL"
+
+# 封存資料庫 ATTACH 時的 schema 名稱
+ARCHIVE_SCHEMA = "archive"
+
+
+def is_partitioned(table_name: str) -> bool:
+    """table 是否依 Quarter 分區存放"""
+    return (
+        config.PARTITION_BY_QUARTER
+        and config.STORAGE_ENGINE == "sqlite"
+        and table_name in PARTITIONED_TABLES
+    )
+
+
+def partition_name(quarter) -> str:
+    """Quarter 值對應的分區名稱（只允許 QUARTER_LIST 中的值，其餘視為空值）"""
+    return quarter if quarter in QUARTER_LIST else NULL_QUARTER
+
+
+def partition_table(table_name: str, quarter: str) -> str:
+    """分區的 table 名稱（主資料庫與封存資料庫相同）"""
+    return f"{table_name}__{quarter}"
+
+
+def database_uri(path: str) -> str:
+    """SQLite URI 檔名（連線須以 uri=True 開啟，ATTACH 才能使用 ?mode=ro）"""
+    return "file:" + quote(os.path.abspath(path))
+
+
+def archive_path() -> str:
+    """封存資料庫的檔案路徑"""
+    return os.path.join(config.ARCHIVE_DIR, "archive.db")
+
+
+def _partition_quarters(table_names: list, table_name: str) -> list:
+    """由 table 名稱列表取出 table_name 的分區（Quarter 列表）"""
+    prefix = f"{table_name}__"
+    return sorted(name[len(prefix):] for name in table_names if name.startswith(prefix))
+
+
+def hot_partitions(conn, table_name: str) -> list:
+    """主資料庫中的分區（Quarter 列表）"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM main.sqlite_master WHERE type='table'")
+    return _partition_quarters([row[0] for row in cursor.fetchall()], table_name)
+
+
+def archived_partitions(table_name: str) -> list:
+    """封存資料庫中 table_name 的分區（Quarter 列表）"""
+    path = archive_path()
+    if not os.path.exists(path):
+        return []
+    conn = sqlite3.connect(database_uri(path) + "?mode=ro", uri=True)
+    try:
+        names = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    finally:
+        conn.close()
+    return _partition_quarters(names, table_name)
+
+
+def _has_table(conn, schema: str, table_name: str) -> bool:
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=?",
+        (table_name,)
+    )
+    return cursor.fetchone() is not None
+
+
+def _attach_archive(conn):
+    """以唯讀方式 ATTACH 封存資料庫"""
+    uri = database_uri(archive_path()) + "?mode=ro"
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (uri,))
+
+
+@contextmanager
+def _writable_archive(conn):
+    """
+    以可寫入方式 ATTACH 封存資料庫（不存在時建立），結束時 DETACH 並恢復唯讀
+    區塊內的寫入須在區塊結束前提交
+    """
+    os.makedirs(config.ARCHIVE_DIR, exist_ok=True)
+    path = archive_path()
+    if os.path.exists(path):
+        os.chmod(path, 0o644)
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (database_uri(path) + "?mode=rwc",))
+    try:
+        yield
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+        if os.path.exists(path):
+            os.chmod(path, 0o444)
+
+
+def _create_archive_table(conn, table_name: str, quarter: str, source: str,
+                          index_statements=None):
+    """在封存資料庫中由 source 建立分區（已有前次中斷留下的複本時先刪除），並建立索引"""
+    physical = partition_table(table_name, quarter)
+    conn.execute(f"DROP TABLE IF EXISTS {ARCHIVE_SCHEMA}.{physical}")
+    conn.execute(f"CREATE TABLE {ARCHIVE_SCHEMA}.{physical} AS SELECT * FROM {source}")
+    if index_statements:
+        cursor = conn.cursor()
+        cursor.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info({physical})")
+        columns = [row[1] for row in cursor.fetchall()]
+        for sql in index_statements(table_name, physical, columns, ARCHIVE_SCHEMA):
+            conn.execute(sql)
+
+
+def selected_quarters(filters: dict = None) -> list:
+    """
+    篩選條件涵蓋的分區（partition pruning）
+    沒有 Quarter 條件或含萬用字元時回傳 None，代表全部分區
+    """
+    values = (filters or {}).get("Quarter")
+    if not values or any("*" in str(v) or "%" in str(v) for v in values):
+        return None
+    return sorted({partition_name(v) for v in values})
+
+
+def open_view(conn, table_name: str, filters: dict = None) -> list:
+    """
+    在 conn 上建立 TEMP VIEW {table_name}，內容為篩選條件涵蓋的分區
+    回傳 ATTACH 的 schema 列表（交給 close_view 移除）；沒有任何分區時回傳 None
+    """
+    wanted = selected_quarters(filters)
+    hot = hot_partitions(conn, table_name)
+    sources = [
+        f"main.{partition_table(table_name, q)}"
+        for q in hot
+        if wanted is None or q in wanted
+    ]
+    # 主資料庫中已有的 Quarter 不讀取封存資料庫（搬移中斷留下的複本）
+    cold = [
+        q for q in archived_partitions(table_name)
+        if (wanted is None or q in wanted) and q not in hot
+    ]
+    
+    attached = []
+    try:
+        if cold:
+            attached.append(ARCHIVE_SCHEMA)
+            _attach_archive(conn)
+            sources += [f"{ARCHIVE_SCHEMA}.{partition_table(table_name, q)}" for q in cold]
+        
+        if not sources:
+            close_view(conn, table_name, attached)
+            return None
+        
+        # 各分區的欄位可能不同（不同時期上傳的 Excel），以欄位聯集對齊
+        columns = []
+        source_columns = {}
+        for source in sources:
+            schema, name = source.split(".", 1)
+            cursor = conn.cursor()
+            cursor.execute(f"PRAGMA {schema}.table_info({name})")
+            source_columns[source] = [row[1] for row in cursor.fetchall()]
+            columns += [c for c in source_columns[source] if c not in columns]
+        
+        selects = []
+        for source in sources:
+            cols = [
+                f'"{c}"' if c in source_columns[source] else f'NULL AS "{c}"'
+                for c in columns
+            ]
+            selects.append(f"SELECT {', '.join(cols)} FROM {source}")
+        
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table_name}")
+        conn.execute(f"CREATE TEMP VIEW {table_name} AS " + " UNION ALL ".join(selects))
+    except BaseException:
+        # 失敗時移除已 ATTACH 的封存資料庫，連線歸還連線池後仍可使用
+        close_view(conn, table_name, attached)
+        raise
+    return attached
+
+
+def close_view(conn, table_name: str, attached: list):
+    """移除 open_view 建立的 TEMP VIEW 與 ATTACH（只 DETACH 實際已 ATTACH 的 schema）"""
+    conn.execute(f"DROP VIEW IF EXISTS temp.{table_name}")
+    present = {row[1] for row in conn.execute("PRAGMA database_list")}
+    for schema in attached or []:
+        if schema in present:
+            conn.execute(f"DETACH DATABASE {schema}")
+
+
+def restore_partition(conn, quarter: str):
+    """
+    將已封存的分區搬回主資料庫（要寫入已封存的 Quarter 時使用）
+    先提交主資料庫中的複本，再從封存資料庫刪除
+    """
+    tables = [t for t in PARTITIONED_TABLES if quarter in archived_partitions(t)]
+    if not tables:
+        return
+    
+    with _writable_archive(conn):
+        with conn.transaction():
+            for table_name in tables:
+                physical = partition_table(table_name, quarter)
+                # 主資料庫中已有（前次搬移中斷）時以主資料庫為準
+                if quarter not in hot_partitions(conn, table_name):
+                    conn.execute(
+                        f"CREATE TABLE main.{physical} AS SELECT * FROM {ARCHIVE_SCHEMA}.{physical}"
+                    )
+        with conn.transaction():
+            for table_name in tables:
+                conn.execute(f"DROP TABLE {ARCHIVE_SCHEMA}.{partition_table(table_name, quarter)}")
+
+
+def frame_quarters(df) -> list:
+    """DataFrame 中資料所在的分區（Quarter 列表；沒有 Quarter 欄位時為空值分區）"""
+    if "Quarter" in df.columns:
+        return sorted(df["Quarter"].map(partition_name).unique())
+    return [] if df.empty else [NULL_QUARTER]
+
+
+def restore_quarters(conn, frames: list):
+    """
+    要寫入的資料所在的 Quarter 已封存時，先搬回主資料庫
+    搬回時會 ATTACH 並修改封存資料庫，必須在寫入資料的 transaction 之外呼叫
+    """
+    if not config.PARTITION_BY_QUARTER:
+        return
+    quarters = set()
+    for df in frames:
+        quarters.update(frame_quarters(df))
+    for quarter in sorted(quarters):
+        restore_partition(conn, quarter)
+
+
+def archive_partition(conn, quarter: str, index_statements=None) -> list:
+    """
+    將主資料庫中的分區搬到唯讀的封存資料庫
+    index_statements(table_name, physical_name, columns, schema) 回傳要在封存資料庫建立的索引 SQL
+    先提交封存資料庫中的複本，再從主資料庫刪除；回傳搬移的 table 名稱
+    """
+    sources = [
+        (table_name, partition_table(table_name, quarter))
+        for table_name in PARTITIONED_TABLES
+        if quarter in hot_partitions(conn, table_name)
+    ]
+    if not sources:
+        return []
+    
+    with _writable_archive(conn):
+        with conn.transaction():
+            for table_name, source in sources:
+                _create_archive_table(conn, table_name, quarter, f"main.{source}", index_statements)
+    
+    with conn.transaction():
+        for _, source in sources:
+            conn.execute(f"DROP TABLE main.{source}")
+    return [source for _, source in sources]
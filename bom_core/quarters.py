@@ -0,0 +1,64 @@
+"""Quarter 工具函數"""
+from datetime import datetime
+
+import pandas as pd
+
+from .config import QUARTER_LIST, QUARTER_TABLE
+
+
+def date_to_quarter(date_value) -> str:
+    """將日期轉換為 Quarter"""
+    if pd.isna(date_value):
+        return None
+    
+    # 轉換為 datetime
+    if isinstance(date_value, str):
+        try:
+            date_value = pd.to_datetime(date_value)
+        except:
+            return None
+    elif not isinstance(date_value, (datetime, pd.Timestamp)):
+        try:
+            date_value = pd.to_datetime(date_value)
+        except:
+            return None
+    
+    # 查找對應的 Quarter
+    for quarter, start_str, end_str in QUARTER_TABLE:
+        start_date = pd.to_datetime(start_str)
+        end_date = pd.to_datetime(end_str)
+        if start_date <= date_value <= end_date:
+            return quarter
+    
+    return None
+
+
+def get_next_quarter(quarter: str) -> str:
+    """取得下一個 Quarter"""
+    if quarter not in QUARTER_LIST:
+        return None
+    
+    idx = QUARTER_LIST.index(quarter)
+    if idx + 1 < len(QUARTER_LIST):
+        return QUARTER_LIST[idx + 1]
+    return None
+
+
+def get_quarter_distance(q1: str, q2: str) -> int:
+    """
+    計算兩個 Quarter 之間的距離（季數）
+    q1: 起始 Quarter
+    q2: 結束 Quarter
+    回傳：q2 - q1 的季數
+    """
+    if q1 not in QUARTER_LIST or q2 not in QUARTER_LIST:
+        return None
+    
+    idx1 = QUARTER_LIST.index(q1)
+    idx2 = QUARTER_LIST.index(q2)
+    return idx2 - idx1
+
+
+def get_current_quarter() -> str:
+    """取得當前日期對應的 Quarter"""
+    return date_to_quarter(datetime.now())
@@ -0,0 +1,84 @@
+"""
+慢查詢紀錄
+
+執行時間超過 config.SLOW_QUERY_MS 的 SQL（連線池中的 SQLite 連線上執行的所有 SQL，以及 DuckDB 查詢），
+保留最近 SLOW_QUERY_LOG_SIZE 筆（process 內共用），同時寫入 logging（logger: bom_core.slow_query）。
+另外統計等待寫入鎖的次數與時間（其他連線正在寫入，在 DB_BUSY_TIMEOUT 內等到的情況）。
+"""
+import logging
+import re
+import threading
+from collections import deque
+from datetime import datetime
+
+import pandas as pd
+
+from . import config
+
+logger = logging.getLogger("bom_core.slow_query")
+
+_entries = deque(maxlen=config.SLOW_QUERY_LOG_SIZE)
+_lock = threading.Lock()
+_lock_waits = {"Waits": 0, "Total_ms": 0.0, "Max_ms": 0.0}
+
+# SQL 中第一個 table 名稱（FROM / INTO / UPDATE / TABLE / JOIN 之後，或 PRAGMA xxx(table)）
+_TABLE_PATTERN = re.compile(
+    r'(?:\b(?:FROM|INTO|UPDATE|TABLE|JOIN)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?|\bPRAGMA\s+[\w.]+\(\s*)'
+    r'(?:"?\w+"?\.)?"?(\w+)"?',
+    re.IGNORECASE
+)
+
+
+def statement_table(query: str) -> str:
+    """SQL 操作的 table（取第一個 table 名稱，找不到時為空字串）"""
+    match = _TABLE_PATTERN.search(query)
+    return match.group(1) if match else ""
+
+
+def record_query(table_name, query: str, params, elapsed_ms: float, rows: int):
+    """
+    查詢超過門檻時記錄下來
+    table_name 為 None 時由 SQL 取出；params 為 None 時代表 executemany（不記錄參數）
+    """
+    if elapsed_ms < config.SLOW_QUERY_MS:
+        return
+    
+    sql = " ".join(query.split())
+    if table_name is None:
+        table_name = statement_table(sql)
+    with _lock:
+        _entries.append({
+            "Time": datetime.now().isoformat(timespec="seconds"),
+            "Table": table_name,
+            "Elapsed_ms": round(elapsed_ms, 1),
+            "Rows": rows,
+            "SQL": sql,
+            "Params": str(list(params or []))[:200],
+        })
+    logger.warning("slow query (%.0f ms, %d rows) on %s: %s", elapsed_ms, rows, table_name, sql[:500])
+
+
+def get_slow_queries() -> pd.DataFrame:
+    """最近的慢查詢（由新到舊）"""
+    with _lock:
+        entries = list(_entries)
+    return pd.DataFrame(reversed(entries), columns=["Time", "Table", "Elapsed_ms", "Rows", "SQL", "Params"])
+
+
+def clear_slow_queries():
+    with _lock:
+        _entries.clear()
+
+
+def record_lock_wait(elapsed_ms: float):
+    """記錄一次等到寫入鎖的等待"""
+    with _lock:
+        _lock_waits["Waits"] += 1
+        _lock_waits["Total_ms"] += elapsed_ms
+        _lock_waits["Max_ms"] = max(_lock_waits["Max_ms"], elapsed_ms)
+
+
+def get_lock_waits() -> dict:
+    """寫入鎖等待統計：{"Waits": 次數, "Total_ms": 總等待毫秒, "Max_ms": 最長等待毫秒}"""
+    with _lock:
+        return dict(_lock_waits)
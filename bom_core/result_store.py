@@ -0,0 +1,304 @@
+"""
+跨 session 共用的查詢結果
+
+結果以內容 key（名稱、依賴的 table、正規化後的條件、資料版本）識別，整個 process 只存一份，
+各 session 的 st.session_state 只保存 key（handle）。多位使用者查詢相同條件時共用同一份結果，
+記憶體用量與「不同結果的數量」成正比，與 session 數量無關。
+
+- 參照計數：session 持有結果時 acquire_result，改用其他結果時 release_result；
+  結果移除後以同一個 key 重新存入時是新的 entry（entry id 不同），持有舊 entry 的 session 需重新 acquire
+- TTL：沒有 session 持有、閒置超過 RESULT_STORE_TTL_SECONDS 的結果移除；
+  session 關閉（Streamlit 不會通知）留下的參照，閒置超過 RESULT_STORE_HOLD_SECONDS 也會移除
+- 記憶體超過 RESULT_STORE_MAX_MEMORY 時，最久未使用的結果寫到 RESULT_STORE_DIR（Arrow IPC 檔案，
+  寫檔時不持有全域 lock）；再次使用時以 memory map 讀回記憶體，所有 session 共用讀回的同一份，
+  檔案保留，再次超過上限時直接釋放記憶體。未安裝 pyarrow 時改為移除沒有 session 持有的結果
+"""
+import atexit
+import importlib.util
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import pandas as pd
+
+from . import config
+from .db import get_data_versions
+from .export_cache import content_digest, normalize_filters
+
+# {key: {"frame": DataFrame 或 None（只在磁碟上）, "path": 磁碟上的檔案或 None,
+#        "id": entry id（移除後重新存入時不同）,
+#        "rows", "bytes", "refs", "last_used", "spilling": 正在寫到磁碟}}
+_entries = {}
+_lock = threading.RLock()
+# 同一個 key 同時只計算一次，其他 session 等待結果
+_compute_locks = {}
+# 同一個 key 同時只從磁碟讀回一次，其他 session 共用讀回的結果
+_load_locks = {}
+
+
+def result_key(name: str, tables: list, filters: dict, versions: dict = None) -> str:
+    """
+    結果的內容 key
+    name: 結果名稱；tables: 依賴的 table；filters: 產生結果的條件
+    versions: 計算當時的資料版本（get_data_versions），預設為目前版本
+    """
+    versions = versions if versions is not None else get_data_versions(tables)
+    return f"{name}-" + content_digest({
+        "tables": sorted(tables),
+        "filters": normalize_filters(filters),
+        "versions": versions,
+    })
+
+
+def store_result(name: str, tables: list, filters: dict, compute,
+                 versions: dict = None) -> str:
+    """
+    取得結果的 key；尚未計算過（或已被移除）時呼叫 compute() 並存入
+    同樣的條件與資料版本，所有 session 共用同一份結果
+    """
+    versions = versions if versions is not None else get_data_versions(tables)
+    key = result_key(name, tables, filters, versions)
+    
+    with _lock:
+        compute_lock = _compute_locks.setdefault(key, threading.Lock())
+    with compute_lock:
+        if not has_result(key):
+            put_result(key, compute())
+    with _lock:
+        _compute_locks.pop(key, None)
+    evict_results(keep=key)
+    return key
+
+
+def put_result(key: str, df: pd.DataFrame):
+    """存入結果（同一個 key 已存在時取代，保留參照計數）"""
+    with _lock:
+        previous = _entries.get(key)
+        if previous is not None:
+            _remove_file(previous)
+        _entries[key] = {
+            "frame": df,
+            "path": None,
+            "id": previous["id"] if previous else uuid.uuid4().hex,
+            "rows": len(df),
+            "bytes": int(df.memory_usage(deep=True).sum()),
+            "refs": previous["refs"] if previous else 0,
+            "last_used": time.monotonic(),
+            "spilling": False,
+        }
+        evict_results(keep=key)
+
+
+def has_result(key: str) -> bool:
+    with _lock:
+        return key in _entries
+
+
+def get_result(key: str):
+    """
+    取得結果；已被移除時回傳 None（呼叫端重新計算）
+    只在磁碟上的結果讀回記憶體後保留在 store 中，之後所有 session 取得同一份
+    """
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        entry["last_used"] = time.monotonic()
+        if entry["frame"] is not None:
+            return entry["frame"]
+        load_lock = _load_locks.setdefault(key, threading.Lock())
+    
+    with load_lock:
+        with _lock:
+            entry = _entries.get(key)
+            if entry is None:
+                return None
+            if entry["frame"] is not None:
+                return entry["frame"]
+            path = entry["path"]
+        
+        df = _read_spilled(path)
+        if df is None:
+            return None
+        with _lock:
+            if _entries.get(key) is entry:
+                entry["frame"] = df
+    evict_results(keep=key)
+    return df
+
+
+def result_entry_id(key: str):
+    """key 目前對應的 entry id；結果已被移除時回傳 None"""
+    with _lock:
+        entry = _entries.get(key)
+        return entry["id"] if entry is not None else None
+
+
+def acquire_result(key: str):
+    """session 開始持有結果，回傳持有的 entry id（結果已被移除時回傳 None）"""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        entry["refs"] += 1
+        return entry["id"]
+
+
+def release_result(key: str, entry_id: str = None):
+    """
+    session 不再持有結果（沒有 session 持有後，閒置超過 TTL 即移除）
+    entry_id：acquire_result 回傳的 entry id；結果已移除後重新存入時，不會減少新 entry 的參照計數
+    """
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry["refs"] > 0 and entry_id in (None, entry["id"]):
+            entry["refs"] -= 1
+            entry["last_used"] = time.monotonic()
+
+
+def evict_results(keep: str = None):
+    """
+    依 TTL 移除閒置的結果，並將記憶體 / 磁碟用量控制在上限內
+    keep: 不移除的結果（剛存入、呼叫端接著要讀取）
+    """
+    now = time.monotonic()
+    with _lock:
+        for key, entry in list(_entries.items()):
+            idle = now - entry["last_used"]
+            if (entry["refs"] == 0 and idle > config.RESULT_STORE_TTL_SECONDS) \
+                    or idle > config.RESULT_STORE_HOLD_SECONDS:
+                _drop(key)
+        
+        # 記憶體超過上限：最久未使用的結果寫到磁碟（無法寫入時移除沒有 session 持有的結果）
+        in_memory = sorted(
+            (entry["last_used"], key) for key, entry in _entries.items()
+            if entry["frame"] is not None and not entry["spilling"]
+        )
+        memory = sum(_entries[key]["bytes"] for _, key in in_memory)
+        to_spill = []
+        for _, key in in_memory:
+            if memory <= config.RESULT_STORE_MAX_MEMORY:
+                break
+            entry = _entries[key]
+            memory -= entry["bytes"]
+            if entry["path"] is not None:
+                # 由磁碟讀回的結果：檔案內容相同，直接釋放記憶體
+                entry["frame"] = None
+            elif _can_spill():
+                entry["spilling"] = True
+                to_spill.append((key, entry))
+            elif entry["refs"] == 0 and key != keep:
+                _drop(key)
+        
+        # 磁碟超過上限：刪除最久未使用、沒有 session 持有的結果
+        on_disk = sorted(
+            (entry["last_used"], key) for key, entry in _entries.items()
+            if entry["path"] is not None
+        )
+        disk = sum(_entries[key]["bytes"] for _, key in on_disk)
+        for _, key in on_disk:
+            if disk <= config.RESULT_STORE_MAX_DISK:
+                break
+            if _entries[key]["refs"] == 0 and key != keep:
+                disk -= _entries[key]["bytes"]
+                _drop(key)
+    
+    # 寫檔時不持有 _lock，其他 session 可以同時取得結果
+    for key, entry in to_spill:
+        path = _spill(key, entry["frame"])
+        with _lock:
+            entry["spilling"] = False
+            if _entries.get(key) is not entry:
+                # 寫檔期間結果已被取代或移除
+                if path is not None:
+                    os.remove(path)
+            elif path is not None:
+                entry["frame"] = None
+                entry["path"] = path
+            elif entry["refs"] == 0 and key != keep:
+                _drop(key)
+
+
+def clear_result_store():
+    """移除所有結果（包含寫到磁碟的檔案）"""
+    with _lock:
+        for key in list(_entries):
+            _drop(key)
+
+
+def result_store_stats() -> pd.DataFrame:
+    """目前保存的結果：Key, Rows, Size_MB, Refs, Location, Idle_s"""
+    now = time.monotonic()
+    with _lock:
+        rows = [
+            {
+                "Key": key,
+                "Rows": entry["rows"],
+                "Size_MB": entry["bytes"] / 1e6,
+                "Refs": entry["refs"],
+                "Location": "memory" if entry["frame"] is not None else "disk",
+                "Idle_s": round(now - entry["last_used"]),
+            }
+            for key, entry in _entries.items()
+        ]
+    return pd.DataFrame(rows, columns=["Key", "Rows", "Size_MB", "Refs", "Location", "Idle_s"])
+
+
+# =============================================================================
+# 寫到磁碟（Arrow IPC，以 memory map 讀取）
+# =============================================================================
+def _spill_dir() -> str:
+    # 每個 process 各自的目錄（多個 Streamlit process 共用同一個 RESULT_STORE_DIR 時不互相干擾）
+    return os.path.join(config.RESULT_STORE_DIR, str(os.getpid()))
+
+
+def _can_spill() -> bool:
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _spill(key: str, df: pd.DataFrame):
+    """將結果寫到磁碟，回傳檔案路徑；無法轉換為 Arrow 時回傳 None"""
+    import pyarrow as pa
+    
+    try:
+        table = pa.Table.from_pandas(df)
+    except (pa.ArrowException, TypeError, ValueError):
+        # 同一欄混有數字與文字等無法轉為 Arrow 的結果，留在記憶體中
+        return None
+    
+    os.makedirs(_spill_dir(), exist_ok=True)
+    # 同一個 key 寫檔期間可能被取代後再次寫出，檔名加上亂數避免互相覆蓋
+    path = os.path.join(_spill_dir(), f"{key}-{uuid.uuid4().hex[:8]}.arrow")
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return path
+
+
+def _read_spilled(path: str):
+    import pyarrow as pa
+    
+    try:
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all().to_pandas()
+    except FileNotFoundError:
+        return None
+
+
+def _remove_file(entry: dict):
+    if entry["path"] is not None:
+        try:
+            os.remove(entry["path"])
+        except FileNotFoundError:
+            pass
+
+
+def _drop(key: str):
+    _load_locks.pop(key, None)
+    _remove_file(_entries.pop(key))
+
+
+@atexit.register
+def _cleanup_spill_dir():
+    shutil.rmtree(_spill_dir(), ignore_errors=True)
@@ -0,0 +1,111 @@
+"""
+PARENT_DPN 階層成本彙總（rollup）
+
+EE_BOM 的 PARENT_DPN → DPN 形成樹（DPN 本身也可能是其他料件的 PARENT_DPN），
+每個 PARENT_DPN 的階層成本 = 直屬料件的 EXT_COST + 子組件（同時也是 PARENT_DPN 的 DPN）的階層成本。
+
+每個 Quarter 只讀取一次 (PARENT_DPN, DPN) 的 EXT_COST 加總，以由下而上的逐層計算完成，
+共用的子組件只計算一次；形成循環的 PARENT_DPN 無法計算，Rollup_Cost 為空並標記 In_Cycle。
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from . import config
+from .db import aggregate_data, get_data_versions, get_table_columns
+
+ROLLUP_COLUMNS = ["PARENT_DPN", "Direct_Cost", "Rollup_Cost", "Depth", "In_Cycle"]
+
+# 計算階層成本需要的 EE_BOM 欄位
+REQUIRED_COLUMNS = ["Quarter", "PARENT_DPN", "DPN", "EXT_COST"]
+
+# {(DB_PATH, STORAGE_ENGINE, quarter): (EE_BOM 資料版本, rollup DataFrame)}
+# EE_BOM 寫入後版本改變，舊的結果不再使用（不需手動清除）
+_rollup_cache = {}
+_rollup_lock = threading.Lock()
+
+
+def compute_rollup(edges: pd.DataFrame) -> pd.DataFrame:
+    """
+    由 (PARENT_DPN, DPN, EXT_COST) 計算每個 PARENT_DPN 的階層成本
+    回傳欄位：
+    - Direct_Cost：直屬料件的 EXT_COST 加總（與預估頁面的 EM cost 相同）
+    - Rollup_Cost：包含所有下層組件的成本；無法計算（循環）時為空
+    - Depth：下層組件的層數（只有直屬料件為 1）
+    - In_Cycle：是否位於循環上，或下層包含循環
+    """
+    edges = edges.dropna(subset=["PARENT_DPN"])
+    if edges.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS)
+    
+    # 節點為所有 PARENT_DPN，以整數編號
+    parents, names = pd.factorize(edges["PARENT_DPN"])
+    n = len(names)
+    costs = pd.to_numeric(edges["EXT_COST"], errors="coerce").fillna(0).to_numpy(float)
+    direct = np.bincount(parents, weights=costs, minlength=n)
+    
+    # 結構邊：DPN 也是 PARENT_DPN 時，子組件的成本要併入上層
+    children = names.get_indexer(edges["DPN"])
+    structural = children >= 0
+    edge_parent = parents[structural]
+    edge_child = children[structural]
+    # 同一組 (PARENT_DPN, DPN) 可能有多列，結構邊只算一次
+    unique_edges = np.unique(np.stack([edge_parent, edge_child]), axis=1)
+    edge_parent, edge_child = unique_edges[0], unique_edges[1]
+    
+    # 由葉節點逐層往上：子組件都已完成的節點即可計算
+    total = direct.copy()
+    depth = np.ones(n, dtype=int)
+    pending = np.bincount(edge_parent, minlength=n)
+    done = np.zeros(n, dtype=bool)
+    frontier = pending == 0
+    while frontier.any():
+        done |= frontier
+        sel = frontier[edge_child]
+        p, c = edge_parent[sel], edge_child[sel]
+        np.add.at(total, p, total[c])
+        np.maximum.at(depth, p, depth[c] + 1)
+        pending -= np.bincount(p, minlength=n)
+        frontier = (pending == 0) & ~done
+    
+    return pd.DataFrame({
+        "PARENT_DPN": names,
+        "Direct_Cost": direct,
+        "Rollup_Cost": np.where(done, total, np.nan),
+        "Depth": np.where(done, depth, 0),
+        "In_Cycle": ~done,
+    })
+
+
+def get_bom_rollup(quarter: str) -> pd.DataFrame:
+    """
+    取得 quarter 的階層成本（同一個資料庫、同一個 EE_BOM 資料版本的 Quarter 只計算一次）
+    EE_BOM 缺少 REQUIRED_COLUMNS 的欄位時回傳空的結果（呼叫端改用直屬料件的成本）
+    """
+    key = (config.DB_PATH, config.STORAGE_ENGINE, quarter)
+    version = get_data_versions(["EE_BOM"])["EE_BOM"]
+    with _rollup_lock:
+        cached = _rollup_cache.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+    
+    table_columns = get_table_columns("EE_BOM")
+    if any(col not in table_columns for col in REQUIRED_COLUMNS):
+        edges = pd.DataFrame()
+    else:
+        edges = aggregate_data("EE_BOM", ["PARENT_DPN", "DPN"], {"Quarter": [quarter]})
+    if edges.empty:
+        rollup = pd.DataFrame(columns=ROLLUP_COLUMNS)
+    else:
+        rollup = compute_rollup(edges)
+    
+    with _rollup_lock:
+        _rollup_cache[key] = (version, rollup)
+    return rollup
+
+
+def clear_rollup_cache():
+    """清除已計算的階層成本（釋放記憶體；資料變更後的結果會自動重新計算）"""
+    with _rollup_lock:
+        _rollup_cache.clear()
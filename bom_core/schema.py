@@ -0,0 +1,245 @@
+"""資料庫結構：建立 table、索引，以及 Quarter 分區的切分與封存"""
+from . import config, partitions
+from .config import (
+    COMPOSITE_INDEXES,
+    COST_CUBE_TABLE,
+    DATA_VERSIONS_TABLE,
+    INGEST_CHECKPOINT_TABLE,
+    INGEST_JOBS_TABLE,
+    METADATA_COLUMNS,
+    PARTITIONED_TABLES,
+    QUARTER_LIST,
+    SEARCH_INDEX_TABLE,
+    SEARCH_VALUES_TABLE,
+)
+from .cube import rebuild_cost_cube
+from .db import get_db_connection, table_exists
+from .maintenance import configure_database
+from .quarters import get_current_quarter, get_quarter_distance
+from .search import refresh_search_index
+from .storage import is_columnar
+
+
+def init_database():
+    """初始化資料庫"""
+    conn = get_db_connection()
+    # journal mode 與 auto_vacuum（auto_vacuum 只能在建立 table 之前設定）
+    configure_database(conn)
+    cursor = conn.cursor()
+    
+    # 建立 Plant_Generation table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Plant_Generation (
+            Project_Name TEXT,
+            Parent_DPN TEXT,
+            Plant TEXT,
+            Generation TEXT,
+            PRIMARY KEY (Project_Name, Parent_DPN)
+        )
+    """)
+    
+    # 建立 Project_MVA_Info table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS Project_MVA_Info (
+            Project_Name TEXT PRIMARY KEY,
+            Initial_MVA REAL,
+            Initial_Quarter TEXT,
+            Adder REAL
+        )
+    """)
+    
+    # 各資料表的資料版本（匯出快取用）
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {DATA_VERSIONS_TABLE} (
+            Table_Name TEXT PRIMARY KEY,
+            Version INTEGER,
+            updated_at TEXT
+        )
+    """)
+    
+    # 上傳進度：每份 Excel 一筆 job，每段已提交的資料一筆 checkpoint
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {INGEST_JOBS_TABLE} (
+            Upload_ID TEXT PRIMARY KEY,
+            Status TEXT,
+            Chunk_Rows INTEGER,
+            created_at TEXT,
+            finished_at TEXT,
+            Seq INTEGER
+        )
+    """)
+    # 變更紀錄的序號：上傳完成時依提交順序遞增（舊資料庫補上欄位，已完成的上傳依完成時間編號）
+    cursor.execute(f"PRAGMA table_info({INGEST_JOBS_TABLE})")
+    if "Seq" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f"ALTER TABLE {INGEST_JOBS_TABLE} ADD COLUMN Seq INTEGER")
+        cursor.execute(
+            f"SELECT Upload_ID FROM {INGEST_JOBS_TABLE} WHERE Status = 'done' ORDER BY finished_at"
+        )
+        cursor.executemany(
+            f"UPDATE {INGEST_JOBS_TABLE} SET Seq = ? WHERE Upload_ID = ?",
+            [(seq, row[0]) for seq, row in enumerate(cursor.fetchall(), start=1)]
+        )
+    cursor.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{INGEST_JOBS_TABLE}_Seq ON {INGEST_JOBS_TABLE} (Seq)"
+    )
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {INGEST_CHECKPOINT_TABLE} (
+            Upload_ID TEXT,
+            Table_Name TEXT,
+            Chunk INTEGER,
+            Rows INTEGER,
+            PRIMARY KEY (Upload_ID, Table_Name, Chunk)
+        )
+    """)
+    
+    conn.commit()
+    conn.close()
+    
+    # 成本 cube 尚未建立時由 EE_BOM 彙總（建立與寫入在同一個 transaction 中，
+    # 中途失敗時 cube 不存在，下次啟動會重新建立）
+    if not table_exists(COST_CUBE_TABLE):
+        rebuild_cost_cube()
+    
+    # 開啟 Quarter 分區後，既有的單一資料表切分為各 Quarter 分區
+    if config.PARTITION_BY_QUARTER:
+        partition_existing_tables()
+    
+    # 既有資料表補上篩選欄位索引
+    for table_name in METADATA_COLUMNS:
+        ensure_indexes(table_name)
+    
+    # 既有資料庫尚未建立料號搜尋索引（或尚未記錄已建立索引的料號）時補建
+    if not table_exists(SEARCH_INDEX_TABLE) or not table_exists(SEARCH_VALUES_TABLE):
+        refresh_search_index()
+
+
+def index_statements(table_name: str, physical_name: str, table_columns: list,
+                     schema: str = "main") -> list:
+    """
+    table_name 需要的索引 SQL（METADATA_COLUMNS 篩選欄位與 COMPOSITE_INDEXES）
+    physical_name: 實際建立索引的 table（分區存放時為各分區 table）
+    """
+    statements = []
+    for col in METADATA_COLUMNS.get(table_name, []):
+        if col in table_columns:
+            statements.append(
+                f'CREATE INDEX IF NOT EXISTS {schema}."idx_{physical_name}_{col}" '
+                f'ON {physical_name} ({col})'
+            )
+    for index_columns in COMPOSITE_INDEXES.get(table_name, []):
+        if all(col in table_columns for col in index_columns):
+            statements.append(
+                f'CREATE INDEX IF NOT EXISTS {schema}."idx_{physical_name}_{"_".join(index_columns)}" '
+                f'ON {physical_name} ({", ".join(index_columns)})'
+            )
+    return statements
+
+
+def ensure_indexes(table_name: str):
+    """
+    為 METADATA_COLUMNS 中的篩選欄位建立索引
+    報表頁面的 facet 分組計數（GROUP BY）靠這些索引維持在毫秒等級
+    """
+    if table_name not in METADATA_COLUMNS or not table_exists(table_name):
+        return
+    # 欄式儲存沒有索引，改靠 Quarter / Project_Name 分區篩選
+    if is_columnar(table_name):
+        return
+    
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    # 分區存放時，每個主資料庫中的分區各自建立索引（封存檔在封存時已建立）
+    if partitions.is_partitioned(table_name):
+        physical_names = [
+            partitions.partition_table(table_name, q)
+            for q in partitions.hot_partitions(conn, table_name)
+        ]
+    else:
+        physical_names = [table_name]
+    
+    for physical_name in physical_names:
+        cursor.execute(f"PRAGMA table_info({physical_name})")
+        table_columns = [row[1] for row in cursor.fetchall()]
+        for sql in index_statements(table_name, physical_name, table_columns):
+            cursor.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def partition_existing_tables():
+    """
+    將既有的單一資料表（EE_BOM、Cost_Adder_Logistic）切分為各 Quarter 分區
+    只在 PARTITION_BY_QUARTER 開啟後第一次初始化時有實際作用
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    for table_name in PARTITIONED_TABLES:
+        cursor.execute(
+            "SELECT name FROM main.sqlite_master WHERE type='table' AND name=?",
+            (table_name,)
+        )
+        if cursor.fetchone() is None:
+            continue
+        
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        if "Quarter" not in [row[1] for row in cursor.fetchall()]:
+            continue
+        
+        # 不在 QUARTER_LIST 中的值歸入 NULL 分區
+        placeholders = ", ".join(["?" for _ in QUARTER_LIST])
+        cursor.execute(f"SELECT DISTINCT Quarter FROM {table_name}")
+        for quarter in {partitions.partition_name(row[0]) for row in cursor.fetchall()}:
+            if quarter == partitions.NULL_QUARTER:
+                where_sql = f"Quarter IS NULL OR Quarter NOT IN ({placeholders})"
+                params = QUARTER_LIST
+            else:
+                where_sql = "Quarter = ?"
+                params = [quarter]
+            
+            physical = partitions.partition_table(table_name, quarter)
+            if quarter in partitions.hot_partitions(conn, table_name):
+                cursor.execute(
+                    f"INSERT INTO {physical} SELECT * FROM {table_name} WHERE {where_sql}",
+                    params
+                )
+            else:
+                cursor.execute(
+                    f"CREATE TABLE {physical} AS SELECT * FROM {table_name} WHERE {where_sql}",
+                    params
+                )
+        
+        cursor.execute(f"DROP TABLE {table_name}")
+    
+    conn.commit()
+    conn.close()
+
+
+def archive_old_quarters(max_age: int = None) -> list:
+    """
+    將超過 max_age 季（預設 ARCHIVE_AFTER_QUARTERS）的分區搬到唯讀的封存資料庫
+    封存後主資料庫只保留近期 Quarter，查詢涵蓋舊 Quarter 時才會 ATTACH 封存資料庫
+    回傳封存的 Quarter 列表
+    """
+    if not config.PARTITION_BY_QUARTER:
+        return []
+    
+    max_age = config.ARCHIVE_AFTER_QUARTERS if max_age is None else max_age
+    current_quarter = get_current_quarter()
+    
+    conn = get_db_connection()
+    hot = set()
+    for table_name in PARTITIONED_TABLES:
+        hot.update(partitions.hot_partitions(conn, table_name))
+    
+    archived = []
+    for quarter in sorted(hot):
+        age = get_quarter_distance(quarter, current_quarter)
+        if age is None or age <= max_age:
+            continue
+        partitions.archive_partition(conn, quarter, index_statements)
+        archived.append(quarter)
+    
+    conn.close()
+    return archived
@@ -0,0 +1,171 @@
+"""
+料號搜尋索引（SQLite FTS5 trigram）
+
+SEARCH_INDEX_TABLE 為 FTS5 索引，SEARCH_VALUES_TABLE 記錄已建立索引的 (table, column, value)。
+寫入資料時（insert_new_rows，包含上傳的每個分段）在同一個 transaction 中只加入尚未建立索引的料號
+（add_to_search_index），成本與新增的資料量成正比；refresh_search_index 由原始資料表完整重建（初次建立或修復用）。
+"""
+import sqlite3
+
+import pandas as pd
+
+from .config import SEARCH_COLUMNS, SEARCH_INDEX_TABLE, SEARCH_RESULT_LIMIT, SEARCH_VALUES_TABLE
+from .db import get_db_connection, get_table_columns, run_query, table_exists
+
+
+def _create_search_tables(conn) -> bool:
+    """建立搜尋索引的 table；SQLite 不支援 trigram tokenizer 時回傳 False"""
+    try:
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX_TABLE}
+            USING fts5(value, table_name UNINDEXED, column_name UNINDEXED,
+                       tokenize='trigram')
+        """)
+    except sqlite3.OperationalError:
+        return False
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SEARCH_VALUES_TABLE} (
+            table_name TEXT,
+            column_name TEXT,
+            value TEXT,
+            PRIMARY KEY (table_name, column_name, value)
+        ) WITHOUT ROWID
+    """)
+    return True
+
+
+def refresh_search_index():
+    """
+    由原始資料表完整重建料號搜尋索引（SQLite FTS5 trigram）
+    每個 (table, column) 只存不重複的值，搜尋時不必掃描整張 BOM
+    SQLite 不支援 trigram tokenizer 時略過，搜尋改用 LIKE
+    """
+    # 先讀出各欄位的不重複值（由資料表所在的儲存引擎取得），再一次寫入索引，
+    # 避免寫入交易進行中又開新連線讀取而互相鎖住
+    index_values = {}
+    for table_name, columns in SEARCH_COLUMNS.items():
+        if not table_exists(table_name):
+            continue
+        table_columns = get_table_columns(table_name)
+        
+        for col in columns:
+            if col not in table_columns:
+                continue
+            index_values[(table_name, col)] = run_query(table_name, f"""
+                SELECT DISTINCT CAST({col} AS TEXT)
+                FROM {table_name}
+                WHERE {col} IS NOT NULL AND CAST({col} AS TEXT) != ''
+            """)
+    
+    conn = get_db_connection()
+    try:
+        with conn.transaction():
+            if not _create_search_tables(conn):
+                return
+            for (table_name, col), values in index_values.items():
+                rows = [(row[0], table_name, col) for row in values]
+                for table in (SEARCH_INDEX_TABLE, SEARCH_VALUES_TABLE):
+                    conn.execute(
+                        f"DELETE FROM {table} WHERE table_name = ? AND column_name = ?",
+                        (table_name, col)
+                    )
+                    conn.executemany(
+                        f"INSERT INTO {table} (value, table_name, column_name) VALUES (?, ?, ?)",
+                        rows
+                    )
+    finally:
+        conn.close()
+
+
+def add_to_search_index(conn, table_name: str, new_rows: pd.DataFrame):
+    """
+    將新增資料中尚未建立索引的料號加入搜尋索引
+    在呼叫端的連線 / transaction 中寫入，與資料的寫入一起提交或 rollback
+    尚未建立搜尋索引（SQLite 不支援 trigram）時略過
+    """
+    columns = [col for col in SEARCH_COLUMNS.get(table_name, []) if col in new_rows.columns]
+    if new_rows.empty or not columns:
+        return
+    cursor = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (SEARCH_VALUES_TABLE,)
+    )
+    if cursor.fetchone() is None:
+        return
+    
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS search_new_values (value TEXT PRIMARY KEY)")
+    try:
+        for col in columns:
+            values = new_rows[col].dropna().astype(str)
+            values = values[values != ""].unique().tolist()
+            if not values:
+                continue
+            
+            conn.execute("DELETE FROM temp.search_new_values")
+            conn.executemany(
+                "INSERT OR IGNORE INTO temp.search_new_values (value) VALUES (?)",
+                [(value,) for value in values]
+            )
+            # 只加入 SEARCH_VALUES_TABLE 中還沒有的值（以主鍵查詢，不掃描既有索引）
+            conn.execute(f"""
+                INSERT INTO {SEARCH_INDEX_TABLE} (value, table_name, column_name)
+                SELECT n.value, ?, ? FROM temp.search_new_values n
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {SEARCH_VALUES_TABLE} v
+                    WHERE v.table_name = ? AND v.column_name = ? AND v.value = n.value
+                )
+            """, (table_name, col, table_name, col))
+            conn.execute(f"""
+                INSERT OR IGNORE INTO {SEARCH_VALUES_TABLE} (table_name, column_name, value)
+                SELECT ?, ?, value FROM temp.search_new_values
+            """, (table_name, col))
+    finally:
+        conn.execute("DROP TABLE IF EXISTS temp.search_new_values")
+
+
+def _escape_like(text: str) -> str:
+    """LIKE 樣式中的 \\、%、_ 轉為一般字元（搭配 ESCAPE '\\'）"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_part_numbers(table_name: str, column: str, text: str,
+                        limit: int = SEARCH_RESULT_LIMIT) -> list:
+    """
+    以子字串搜尋料號，回傳前 limit 筆符合的值
+    前綴符合的排在前面，其次依長度由短到長
+    少於 3 個字元（trigram 無法比對）或沒有搜尋索引時，改用 LIKE 查詢原始資料表
+    """
+    text = text.strip()
+    if not text or not table_exists(table_name):
+        return []
+    
+    # 篩選條件的萬用字元（* 與 %）在搜尋中不適用，直接移除；料號中常見的 _ 等 LIKE 特殊字元跳脫後比對
+    like_text = text.replace("*", "").replace("%", "")
+    if not like_text:
+        return []
+    escaped = _escape_like(like_text)
+    
+    if len(like_text) >= 3 and table_exists(SEARCH_INDEX_TABLE):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        fts_query = '"' + like_text.replace('"', '""') + '"'
+        cursor.execute(f"""
+            SELECT value FROM {SEARCH_INDEX_TABLE}
+            WHERE {SEARCH_INDEX_TABLE} MATCH ? AND table_name = ? AND column_name = ?
+            ORDER BY CASE WHEN value LIKE ? ESCAPE '\\' THEN 0 ELSE 1 END, length(value), value
+            LIMIT ?
+        """, (fts_query, table_name, column, escaped + "%", limit))
+        results = cursor.fetchall()
+        conn.close()
+    else:
+        # SQLite 與 DuckDB 都能執行的寫法（以 lower() 統一大小寫）
+        pattern = escaped.lower()
+        results = run_query(table_name, f"""
+            SELECT value FROM (
+                SELECT DISTINCT CAST({column} AS TEXT) AS value FROM {table_name}
+                WHERE lower(CAST({column} AS TEXT)) LIKE ? ESCAPE '\\'
+            ) AS matches
+            ORDER BY CASE WHEN lower(value) LIKE ? ESCAPE '\\' THEN 0 ELSE 1 END, length(value), value
+            LIMIT ?
+        """, ["%" + pattern + "%", pattern + "%", limit])
+    
+    return [str(row[0]) for row in results]
@@ -0,0 +1,200 @@
+"""
+欄式儲存引擎（DuckDB over Parquet，選用）
+
+config.STORAGE_ENGINE = "duckdb" 時，COLUMNAR_TABLES 中的資料表改存為 Parquet 檔案，
+依 Quarter / Project_Name 分區：
+
+    {PARQUET_DIR}/{table}/Quarter={quarter}/Project_Name={project}/part-*.parquet
+
+查詢時只讀取篩選條件涵蓋的分區，再交給 DuckDB 執行與 SQLite 相同的 SQL
+（資料表名稱會以 view 對應到這些檔案）。需要另外安裝 duckdb。
+"""
+import glob
+import os
+import uuid
+from datetime import datetime
+from urllib.parse import quote
+
+import pandas as pd
+
+from . import config
+from .config import COLUMNAR_TABLES, METADATA_COLUMNS, PARTITION_COLUMNS
+
+# 分區值為空時使用的目錄名稱
+NULL_PARTITION = "__null__"
+
+
+def is_columnar(table_name: str) -> bool:
+    """table 是否使用欄式儲存引擎"""
+    return config.STORAGE_ENGINE == "duckdb" and table_name in COLUMNAR_TABLES
+
+
+def _connect():
+    """建立 DuckDB 連線（in-memory，只用來查詢 Parquet 檔案）"""
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError(
+            "STORAGE_ENGINE = \"duckdb\" 需要安裝 duckdb：pip install duckdb"
+        ) from e
+    return duckdb.connect()
+
+
+def _partition_value(value) -> str:
+    """分區目錄名稱中的值（空值以 NULL_PARTITION 表示，其餘 URL 編碼）"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return NULL_PARTITION
+    return quote(str(value), safe=" ")
+
+
+def _table_dir(table_name: str) -> str:
+    return os.path.join(config.PARQUET_DIR, table_name)
+
+
+def partition_files(table_name: str, filters: dict = None) -> list:
+    """
+    取得 table 的 Parquet 檔案
+    filters 中的分區欄位（Quarter / Project_Name）若指定了精確值，
+    只回傳這些分區的檔案（partition pruning）
+    """
+    patterns = [[]]
+    for col in PARTITION_COLUMNS:
+        values = (filters or {}).get(col)
+        # 沒有篩選或含萬用字元時，該層分區全部讀取
+        if not values or any("*" in str(v) or "%" in str(v) for v in values):
+            dirs = [f"{col}=*"]
+        else:
+            dirs = [f"{col}={_partition_value(v)}" for v in values]
+        patterns = [p + [d] for p in patterns for d in dirs]
+    
+    files = []
+    for parts in patterns:
+        files.extend(glob.glob(os.path.join(_table_dir(table_name), *parts, "*.parquet")))
+    return sorted(files)
+
+
+def table_exists(table_name: str) -> bool:
+    """table 是否已有任何 Parquet 檔案"""
+    return bool(partition_files(table_name))
+
+
+def _source_sql(files: list) -> str:
+    """組出讀取多個 Parquet 檔案的 SQL（各檔案欄位不同時依欄位名稱合併）"""
+    file_list = ", ".join("'" + f.replace("'", "''") + "'" for f in files)
+    return f"read_parquet([{file_list}], union_by_name = true)"
+
+
+def _execute(table_name: str, query: str, params: list, filters: dict):
+    """在 DuckDB 上執行 query，query 中的 table_name 對應到篩選後的 Parquet 檔案"""
+    files = partition_files(table_name, filters)
+    if not files:
+        return None, None
+    
+    con = _connect()
+    con.execute(f"CREATE VIEW {table_name} AS SELECT * FROM {_source_sql(files)}")
+    return con, con.execute(query, params or [])
+
+
+def fetch_rows(table_name: str, query: str, params: list = None,
+               filters: dict = None) -> list:
+    """執行查詢並回傳所有結果（tuple list）"""
+    con, result = _execute(table_name, query, params, filters)
+    if con is None:
+        return []
+    try:
+        return result.fetchall()
+    finally:
+        con.close()
+
+
+def read_frame(table_name: str, query: str, params: list = None,
+               filters: dict = None) -> pd.DataFrame:
+    """執行查詢並回傳 DataFrame"""
+    con, result = _execute(table_name, query, params, filters)
+    if con is None:
+        return pd.DataFrame()
+    try:
+        return result.df()
+    finally:
+        con.close()
+
+
+def iter_frames(table_name: str, query: str, params: list = None,
+                filters: dict = None, chunksize: int = 50000):
+    """執行查詢並逐批回傳 DataFrame（每批約 chunksize 筆）"""
+    con, result = _execute(table_name, query, params, filters)
+    if con is None:
+        return
+    try:
+        for batch in result.fetch_record_batch(chunksize):
+            yield batch.to_pandas()
+    finally:
+        con.close()
+
+
+def get_columns(table_name: str) -> list:
+    """取得 table 的欄位名稱（所有分區的聯集）"""
+    con, result = _execute(table_name, f"SELECT * FROM {table_name} LIMIT 0", [], None)
+    if con is None:
+        return []
+    try:
+        return [d[0] for d in result.description]
+    finally:
+        con.close()
+
+
+def _partition_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """df 中每一列所屬的分區（缺少分區欄位時視為空值）"""
+    keys = pd.DataFrame(index=df.index)
+    for col in PARTITION_COLUMNS:
+        source = df[col] if col in df.columns else pd.Series(None, index=df.index)
+        keys[col] = source.map(_partition_value)
+    return keys
+
+
+def read_partitions(table_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    """讀取 df 會寫入的那些分區中的現有資料（用於去重）"""
+    files = []
+    for key in _partition_keys(df).drop_duplicates().itertuples(index=False):
+        parts = [f"{col}={value}" for col, value in zip(PARTITION_COLUMNS, key)]
+        files.extend(glob.glob(os.path.join(_table_dir(table_name), *parts, "*.parquet")))
+    if not files:
+        return pd.DataFrame()
+    
+    con = _connect()
+    try:
+        return con.execute(f"SELECT * FROM {_source_sql(files)}").df()
+    finally:
+        con.close()
+
+
+def write_partitions(table_name: str, df: pd.DataFrame):
+    """將 df 依分區各寫成一個新的 Parquet 檔案"""
+    if df.empty:
+        return
+    
+    df = df.copy()
+    # 篩選欄位一律存為字串，避免不同上傳檔案推斷出不同型別；
+    # 其他混合型別的欄位也轉為字串，Parquet 每欄只能有一種型別
+    string_cols = set(METADATA_COLUMNS.get(table_name, []))
+    for col in df.columns:
+        if col in string_cols or df[col].dtype == object:
+            df[col] = df[col].astype("string")
+    
+    keys = _partition_keys(df)
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    con = _connect()
+    try:
+        for key, part_df in df.groupby([keys[c] for c in PARTITION_COLUMNS], dropna=False):
+            parts = [f"{col}={value}" for col, value in zip(PARTITION_COLUMNS, key)]
+            part_dir = os.path.join(_table_dir(table_name), *parts)
+            os.makedirs(part_dir, exist_ok=True)
+            
+            path = os.path.join(part_dir, f"part-{timestamp}-{uuid.uuid4().hex[:8]}.parquet")
+            con.register("part_df", part_df.reset_index(drop=True))
+            con.execute(
+                "COPY part_df TO '" + path.replace("'", "''") + "' (FORMAT PARQUET)"
+            )
+            con.unregister("part_df")
+    finally:
+        con.close()
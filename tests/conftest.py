@@ -0,0 +1,63 @@
+"""
+測試共用的 fixture
+
+每個測試使用 tmp_path 下的新資料庫（DB_PATH 為絕對路徑，連線池與各種快取都以 DB_PATH 區分），
+匯出快取、封存、Parquet 與共用查詢結果的目錄也都在 tmp_path 下。
+合成資料使用 benchmarks/synthetic.py。
+"""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import bom_core  # noqa: E402
+from bom_core import config  # noqa: E402
+
+QUARTER = config.QUARTER_LIST[8]
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """未初始化的資料庫路徑（工作目錄切換到 tmp_path）"""
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "database.db")
+    monkeypatch.setattr(config, "DB_PATH", path)
+    monkeypatch.setattr(config, "METADATA_PATH", str(tmp_path / "metadata.json"))
+    monkeypatch.setattr(config, "STORAGE_ENGINE", "sqlite")
+    monkeypatch.setattr(config, "PARTITION_BY_QUARTER", False)
+    return path
+
+
+@pytest.fixture
+def db(db_path):
+    """已初始化的空資料庫"""
+    bom_core.init_database()
+    return db_path
+
+
+def ee_bom_rows(rows: list, project: str = "PRJ", quarter: str = QUARTER) -> pd.DataFrame:
+    """
+    由 (PARENT_DPN, DPN, EXT_COST) 建立 EE_BOM 資料
+    其他欄位填固定值，方便在測試中直接寫出預期結果
+    """
+    return pd.DataFrame([
+        {
+            "Project_Name": project,
+            "PARENT_DPN": parent,
+            "COMMODITY_CODE": "CAP",
+            "SUB_COMMODITY": "MLCC",
+            "DPN": dpn,
+            "ODM_PN": f"ODM-{dpn}",
+            "MANUFACTURER": "Murata",
+            "MPN": f"GRM-{dpn}",
+            "EM_DM": "EM",
+            "EXT_COST": cost,
+            "Quarter": quarter,
+        }
+        for parent, dpn, cost in rows
+    ])
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+import bom_core
+from bom_core import config, cube
+
+from conftest import ee_bom_rows
+
+
+def _create_ee_bom(path: str, sql: str):
+    conn = sqlite3.connect(path)
+    conn.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def test_init_database_without_ext_cost(db_path):
+    """EE_BOM 沒有 EXT_COST 的既有資料庫仍可啟動，cube 成本為 0、筆數正確"""
+    _create_ee_bom(db_path, "CREATE TABLE EE_BOM (Quarter TEXT, Project_Name TEXT, DPN TEXT)")
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO EE_BOM VALUES (?, ?, ?)", [("FY26Q1", "A", "D1"), ("FY26Q1", "A", "D2")])
+    conn.commit()
+    conn.close()
+    
+    bom_core.init_database()
+    
+    total = bom_core.query_cost_cube([])
+    assert total["Rows"].iloc[0] == 2
+    assert total["EXT_COST"].iloc[0] == 0
+
+
+def test_failed_rebuild_leaves_no_cube(db_path, monkeypatch):
+    """建立 cube 失敗時不留下空的 cube，下次啟動重新建立"""
+    bom_core.init_database()
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("P1", "D1", 1.5), ("P1", "D2", 2.0)]))
+    conn = bom_core.get_db_connection()
+    conn.execute(f"DROP TABLE {config.COST_CUBE_TABLE}")
+    conn.commit()
+    conn.close()
+    
+    def fail(conn, cells):
+        raise RuntimeError("interrupted")
+    
+    monkeypatch.setattr(cube, "_write_cells", fail)
+    with pytest.raises(RuntimeError):
+        bom_core.init_database()
+    assert not bom_core.table_exists(config.COST_CUBE_TABLE)
+    
+    monkeypatch.undo()
+    monkeypatch.setattr(config, "DB_PATH", db_path)
+    bom_core.init_database()
+    assert bom_core.query_cost_cube([])["EXT_COST"].iloc[0] == pytest.approx(3.5)
+
+
+def test_cube_matches_ee_bom_after_inserts(db):
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("P1", "D1", 1.0), ("P1", "D2", 2.0)]))
+    bom_core.ingest_workbook(ee_bom_rows([("P2", "D3", 4.0)], project="B"),
+                             ee_bom_rows([]).iloc[:0])
+    
+    raw = bom_core.aggregate_data("EE_BOM", ["Project_Name"])
+    from_cube = bom_core.query_cost_cube(["Project_Name"])
+    assert raw["EXT_COST"].sum() == pytest.approx(from_cube["EXT_COST"].sum())
+    assert raw["Rows"].sum() == from_cube["Rows"].sum()
@@ -0,0 +1,46 @@
+import pytest
+
+import bom_core
+from bom_core import config, db as bom_db
+
+from conftest import QUARTER, ee_bom_rows
+
+NEXT_QUARTER = config.QUARTER_LIST[9]
+
+
+@pytest.fixture
+def two_quarters(db):
+    bom_core.insert_data("EE_BOM", ee_bom_rows(
+        [("TOP", "KEEP", 1.0), ("TOP", "CHANGE", 2.0), ("TOP", "GONE", 3.0)]))
+    bom_core.insert_data("EE_BOM", ee_bom_rows(
+        [("TOP", "KEEP", 1.0), ("TOP", "CHANGE", 2.5), ("TOP", "NEW", 4.0)],
+        quarter=NEXT_QUARTER))
+    return {"Quarter": [QUARTER]}, {"Quarter": [NEXT_QUARTER]}
+
+
+def _pooled_temp_tables() -> list:
+    """連線池中的連線上殘留的暫存表"""
+    conn = bom_db.get_db_connection()
+    try:
+        return [row[0] for row in conn.execute("SELECT name FROM temp.sqlite_master")]
+    finally:
+        conn.close()
+
+
+def test_bom_diff(two_quarters):
+    diff = bom_core.calculate_bom_diff(*two_quarters).set_index("DPN")
+    
+    assert diff["Change_Type"].to_dict() == {"NEW": "added", "GONE": "removed", "CHANGE": "changed"}
+    assert diff.loc["CHANGE", "Cost_Delta"] == pytest.approx(0.5)
+    assert diff.loc["GONE", "Cost_Delta"] == pytest.approx(-3.0)
+    assert _pooled_temp_tables() == []
+
+
+def test_abandoned_diff_drops_temp_tables(two_quarters):
+    """只讀取第一批就停止時，暫存表同樣在連線歸還前刪除"""
+    chunks = bom_core.iter_bom_diff(*two_quarters, chunksize=1)
+    next(chunks)
+    chunks.close()
+    
+    assert _pooled_temp_tables() == []
+    assert len(bom_core.calculate_bom_diff(*two_quarters)) == 3
@@ -0,0 +1,53 @@
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import bom_core
+
+
+def _workbook() -> bytes:
+    """EE_BOM 含錯誤儲存格（#DIV/0!）與內容相同的文字儲存格，另有 Cost_Adder_Logistic"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "EE_BOM"
+    sheet.append(["DPN", "Note", "EXT_COST", "Qty"])
+    sheet.append(["D1", "ok", 1.5, 2.0])
+    sheet.append(["D2", "#DIV/0!", "#DIV/0!", 3.0])
+    sheet["B3"].data_type = "s"  # 文字儲存格
+    sheet.append(["D3", None, 2.25, None])
+    workbook.create_sheet("Cost_Adder_Logistic").append(["PARENT_DPN", "Cost"])
+    
+    output = io.BytesIO()
+    workbook.save(output)
+    return output.getvalue()
+
+
+def test_openpyxl_reader_matches_read_excel():
+    data = _workbook()
+    sheets = bom_core.read_sheets(data, ["EE_BOM", "Cost_Adder_Logistic"], engine="openpyxl")
+    expected = pd.read_excel(io.BytesIO(data), sheet_name=["EE_BOM", "Cost_Adder_Logistic"],
+                             engine="openpyxl")
+    
+    for name, df in sheets.items():
+        pd.testing.assert_frame_equal(df, expected[name])
+    ee_bom = sheets["EE_BOM"].set_index("DPN")
+    assert ee_bom.loc["D2", "Note"] == "#DIV/0!"
+    assert pd.isna(ee_bom.loc["D2", "EXT_COST"])
+
+
+def test_missing_sheet():
+    with pytest.raises(bom_core.MissingSheetsError) as excinfo:
+        bom_core.read_sheets(_workbook(), ["EE_BOM", "Plant"], engine="openpyxl")
+    assert excinfo.value.missing_sheets == ["Plant"]
+
+
+def test_calamine_reader_matches_openpyxl():
+    pytest.importorskip("python_calamine")
+    data = _workbook()
+    names = ["EE_BOM", "Cost_Adder_Logistic"]
+    calamine = bom_core.read_sheets(data, names, engine="calamine")
+    openpyxl_sheets = bom_core.read_sheets(data, names, engine="openpyxl")
+    for name in names:
+        pd.testing.assert_frame_equal(calamine[name], openpyxl_sheets[name])
@@ -0,0 +1,59 @@
+import importlib.util
+
+import pytest
+
+import bom_core
+from bom_core import config
+from synthetic import make_ee_bom
+
+from conftest import QUARTER
+
+NEXT_QUARTER = config.QUARTER_LIST[9]
+MODES = ["sqlite", "partitioned"] + (["duckdb"] if importlib.util.find_spec("duckdb") else [])
+
+FILTERS = [
+    {},
+    {"Quarter": [QUARTER]},
+    {"Quarter": [NEXT_QUARTER], "EM_DM": ["EM"], "MANUFACTURER": ["TI", "ADI"]},
+    {"COMMODITY_CODE": ["IND"], "MPN": ["tps*"]},
+    {"MANUFACTURER": ["T*"]},
+]
+
+
+@pytest.fixture(params=MODES)
+def facet_db(request, db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "STORAGE_ENGINE", "duckdb" if request.param == "duckdb" else "sqlite")
+    monkeypatch.setattr(config, "PARTITION_BY_QUARTER", request.param == "partitioned")
+    monkeypatch.setattr(config, "PARQUET_DIR", str(tmp_path / "parquet"))
+    monkeypatch.setattr(config, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    bom_core.init_database()
+    bom_core.insert_data("EE_BOM", make_ee_bom(400, "P1", QUARTER, seed=1))
+    bom_core.insert_data("EE_BOM", make_ee_bom(300, "P2", NEXT_QUARTER, seed=2))
+    return request.param
+
+
+def _all_counts(filters: dict) -> dict:
+    columns = config.FACET_COLUMNS["EE_BOM"]
+    return {col: bom_core.get_facet_counts("EE_BOM", col, filters) for col in columns}
+
+
+def _direct_counts(filters: dict, monkeypatch) -> dict:
+    """不使用 facet 彙總，每個欄位直接查詢"""
+    columns = config.FACET_COLUMNS["EE_BOM"]
+    with monkeypatch.context() as m:
+        m.setattr(config, "FACET_COLUMNS", {**config.FACET_COLUMNS, "EE_BOM": []})
+        return {col: bom_core.get_facet_counts("EE_BOM", col, filters) for col in columns}
+
+
+def test_facet_cube_matches_direct_queries(facet_db, monkeypatch):
+    columns = config.FACET_COLUMNS["EE_BOM"]
+    for filters in FILTERS:
+        direct = _direct_counts(filters, monkeypatch)
+        assert _all_counts(filters) == direct
+        assert set(direct) == set(columns)
+    
+    # 寫入新資料後，快取的彙總跟著資料版本失效
+    bom_core.insert_data("EE_BOM", make_ee_bom(50, "P3", NEXT_QUARTER, seed=3))
+    for filters in FILTERS:
+        assert _all_counts(filters) == _direct_counts(filters, monkeypatch)
+    assert dict(bom_core.get_facet_counts("EE_BOM", "Project_Name", {}))["P3"] == 50
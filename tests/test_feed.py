@@ -0,0 +1,57 @@
+import json
+import os
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+import bom_core
+from bom_core import config, feed
+
+from conftest import ee_bom_rows
+
+
+def _run_feed(monkeypatch, *args):
+    """執行命令列匯出（main 會切換為唯讀連線，結束後恢復，測試接著還要寫入）"""
+    monkeypatch.setattr(config, "DB_READ_ONLY", False)
+    monkeypatch.setattr(sys, "argv", ["bom_core.feed", *args])
+    try:
+        feed.main()
+    finally:
+        config.DB_READ_ONLY = False
+
+
+def test_watermark_exports_only_new_batches(db, tmp_path, monkeypatch):
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "A", 1.0)]))
+    state = str(tmp_path / "state.json")
+    _run_feed(monkeypatch, "--db", db, "--out", str(tmp_path / "feed1"), "--state", state)
+    assert json.load(open(state)) == {"watermark": 1}
+    
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "A", 1.0), ("TOP", "B", 2.0)]))
+    _run_feed(monkeypatch, "--db", db, "--out", str(tmp_path / "feed2"), "--state", state)
+    assert json.load(open(state)) == {"watermark": 2}
+    
+    manifest = json.load(open(tmp_path / "feed2" / "manifest_1-2.json"))
+    assert manifest["rows"]["EE_BOM"] == 1
+    exported = pd.concat(pd.read_csv(tmp_path / "feed2" / name)
+                         for name in manifest["files"] if name.startswith("EE_BOM"))
+    assert exported[["Feed_Seq", "DPN"]].values.tolist() == [[2, "B"]]
+
+
+def test_feed_does_not_initialize_database(db_path, tmp_path, monkeypatch):
+    """匯出只讀取資料庫：舊版資料庫（沒有 Seq 欄位）直接報錯，不建立或修改 table"""
+    with pytest.raises(SystemExit):
+        _run_feed(monkeypatch, "--db", db_path, "--out", str(tmp_path / "feed"))
+    assert not os.path.exists(db_path)
+    
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE Ingest_Jobs (Upload_ID TEXT, created_at TEXT)")
+    conn.close()
+    with pytest.raises(SystemExit, match="Seq"):
+        _run_feed(monkeypatch, "--db", db_path, "--out", str(tmp_path / "feed"))
+    
+    conn = sqlite3.connect(db_path)
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+    conn.close()
+    assert tables == ["Ingest_Jobs"]
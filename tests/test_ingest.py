@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+import bom_core
+from bom_core import config, ingest
+from synthetic import make_cost_adder, make_ee_bom
+
+from conftest import QUARTER
+
+
+@pytest.fixture
+def workbook():
+    """含重複列的 EE_BOM / Cost_Adder_Logistic（重複的列分散在整份資料中）"""
+    ee_bom = make_ee_bom(300, "CHUNK", QUARTER, parents=20, seed=1)
+    ee_bom = pd.concat([ee_bom, ee_bom.iloc[::7]]).sample(frac=1, random_state=1).reset_index(drop=True)
+    return ee_bom, make_cost_adder(ee_bom, seed=1)
+
+
+def _contents(table_name: str) -> pd.DataFrame:
+    df = bom_core.query_data(table_name, {}).drop(columns="created_at", errors="ignore").astype(str)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+def _ingest_into(path: str, frames: tuple, chunk_rows: int) -> tuple:
+    config.DB_PATH = path
+    bom_core.init_database()
+    inserted = bom_core.ingest_workbook(*frames, chunk_rows=chunk_rows)
+    return inserted, _contents("EE_BOM")
+
+
+@pytest.mark.parametrize("chunk_rows", [50, 7])
+def test_chunked_ingest_matches_whole(db, tmp_path, workbook, chunk_rows):
+    """分段寫入與整份一次寫入的結果相同，同一份 Excel 中重複的列都保留"""
+    whole, whole_rows = _ingest_into(str(tmp_path / "whole.db"), workbook, 100000)
+    chunked, chunked_rows = _ingest_into(str(tmp_path / "chunked.db"), workbook, chunk_rows)
+    
+    assert whole == {"EE_BOM": len(workbook[0]), "Cost_Adder_Logistic": len(workbook[1])}
+    assert chunked == whole
+    assert chunked_rows.equals(whole_rows)
+
+
+def test_reupload_and_existing_rows(db, workbook):
+    first = bom_core.ingest_workbook(*workbook, chunk_rows=50)
+    assert bom_core.ingest_workbook(*workbook, chunk_rows=50) == {"EE_BOM": 0, "Cost_Adder_Logistic": 0}
+    
+    # 另一份 Excel 中與既有資料相同的列不寫入
+    ee_bom, cost_adder = workbook
+    extra = make_ee_bom(10, "CHUNK", QUARTER, parents=20, seed=2)
+    second = bom_core.ingest_workbook(pd.concat([ee_bom.iloc[:30], extra]), cost_adder.iloc[:0])
+    assert second["EE_BOM"] == 10
+    assert len(bom_core.query_data("EE_BOM", {})) == first["EE_BOM"] + 10
+
+
+def test_interrupted_ingest_resumes(db, tmp_path, workbook, monkeypatch):
+    """中斷後重新上傳同一份 Excel，從最後提交的分段繼續，結果與一次完成相同"""
+    commit_chunks = ingest._commit_chunks
+    calls = []
+    
+    def interrupted(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 3:
+            raise RuntimeError("interrupted")
+        return commit_chunks(*args, **kwargs)
+    
+    monkeypatch.setattr(ingest, "_commit_chunks", interrupted)
+    with pytest.raises(RuntimeError):
+        bom_core.ingest_workbook(*workbook, chunk_rows=50)
+    assert len(bom_core.get_interrupted_uploads()) == 1
+    monkeypatch.setattr(ingest, "_commit_chunks", commit_chunks)
+    
+    resumed = bom_core.ingest_workbook(*workbook, chunk_rows=50)
+    assert bom_core.get_interrupted_uploads().empty
+    resumed_rows = _contents("EE_BOM")
+    
+    whole, whole_rows = _ingest_into(str(tmp_path / "whole.db"), workbook, 100000)
+    assert resumed == whole
+    assert resumed_rows.equals(whole_rows)
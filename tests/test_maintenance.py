@@ -0,0 +1,28 @@
+import bom_core
+from bom_core import maintenance
+
+from conftest import ee_bom_rows
+
+
+def test_storage_stats_cached_until_database_changes(db, monkeypatch):
+    page_usage = maintenance._page_usage
+    scans = []
+    
+    def counting(conn):
+        scans.append(1)
+        return page_usage(conn)
+    
+    monkeypatch.setattr(maintenance, "_page_usage", counting)
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", f"C{i}", 1.0) for i in range(200)]))
+    
+    first = bom_core.storage_stats()
+    assert "EE_BOM" in set(first["Name"])
+    assert bom_core.storage_stats().equals(first)
+    assert len(scans) == 1
+    
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", f"D{i}", 1.0) for i in range(200)]))
+    bom_core.storage_stats()
+    assert len(scans) == 2
+    
+    bom_core.storage_stats(refresh=True)
+    assert len(scans) == 3
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+import bom_core
+from bom_core import config, partitions
+from synthetic import make_cost_adder
+
+from conftest import QUARTER, ee_bom_rows
+
+OLD_QUARTER = config.QUARTER_LIST[2]
+
+
+@pytest.fixture
+def partitioned(db_path, tmp_path, monkeypatch):
+    """依 Quarter 分區、OLD_QUARTER 已封存的資料庫"""
+    monkeypatch.setattr(config, "PARTITION_BY_QUARTER", True)
+    monkeypatch.setattr(config, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    bom_core.init_database()
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "OLD", 1.0)], quarter=OLD_QUARTER))
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "NEW", 2.0)]))
+    
+    max_age = bom_core.get_quarter_distance(QUARTER, bom_core.get_current_quarter()) + 1
+    assert bom_core.archive_old_quarters(max_age) == [OLD_QUARTER]
+    return db_path
+
+
+def _quarter_rows(quarter: str) -> list:
+    return sorted(bom_core.query_data("EE_BOM", {"Quarter": [quarter]})["DPN"])
+
+
+def test_archived_quarter_is_queried_from_archive(partitioned):
+    assert partitions.archived_partitions("EE_BOM") == [OLD_QUARTER]
+    assert os.stat(partitions.archive_path()).st_mode & 0o222 == 0
+    assert _quarter_rows(OLD_QUARTER) == ["OLD"]
+    assert bom_core.count_rows("EE_BOM", {}) == 2
+
+
+def test_insert_into_archived_quarter_restores_it(partitioned):
+    assert bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "OLD", 1.0), ("TOP", "OLD2", 3.0)],
+                                                      quarter=OLD_QUARTER)) == 1
+    assert partitions.archived_partitions("EE_BOM") == []
+    assert _quarter_rows(OLD_QUARTER) == ["OLD", "OLD2"]
+
+
+def test_ingest_into_archived_quarter(partitioned):
+    ee_bom = ee_bom_rows([("TOP", "OLD2", 3.0)], quarter=OLD_QUARTER)
+    assert bom_core.ingest_workbook(ee_bom, make_cost_adder(ee_bom))["EE_BOM"] == 1
+    assert _quarter_rows(OLD_QUARTER) == ["OLD", "OLD2"]
+
+
+def test_insert_into_archived_quarter_inside_transaction(partitioned):
+    """呼叫端的 transaction 中無法搬回封存分區：直接報錯，不會 ATTACH 而回滾呼叫端已寫入的資料"""
+    conn = bom_core.get_db_connection()
+    try:
+        with conn.transaction():
+            bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "NEW2", 4.0)]), conn=conn)
+            with pytest.raises(ValueError):
+                bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "OLD2", 3.0)], quarter=OLD_QUARTER),
+                                     conn=conn)
+            assert conn.in_transaction
+    finally:
+        conn.close()
+    
+    assert _quarter_rows(QUARTER) == ["NEW", "NEW2"]
+    assert partitions.archived_partitions("EE_BOM") == [OLD_QUARTER]
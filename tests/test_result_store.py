@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+import bom_core
+from bom_core import config
+
+
+@pytest.fixture
+def store(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "RESULT_STORE_DIR", str(tmp_path / "result_store"))
+    bom_core.clear_result_store()
+    yield
+    bom_core.clear_result_store()
+
+
+def _frame(n: int) -> pd.DataFrame:
+    return pd.DataFrame({"DPN": [f"DPN-{i}" for i in range(n)], "EXT_COST": [float(i) for i in range(n)]})
+
+
+def _refs(key: str) -> int:
+    stats = bom_core.result_store_stats().set_index("Key")
+    return int(stats.loc[key, "Refs"])
+
+
+def test_shared_result_and_refcount(store, monkeypatch):
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        return _frame(3)
+    
+    key = bom_core.store_result("R", ["EE_BOM"], {"Quarter": ["A"]}, compute)
+    assert bom_core.store_result("R", ["EE_BOM"], {"Quarter": ["A"]}, compute) == key
+    assert len(calls) == 1
+    
+    entry_id = bom_core.acquire_result(key)
+    assert entry_id == bom_core.result_entry_id(key)
+    assert _refs(key) == 1
+    
+    # 有 session 持有的結果不會因 TTL 移除
+    monkeypatch.setattr(config, "RESULT_STORE_TTL_SECONDS", -1)
+    bom_core.evict_results()
+    assert bom_core.get_result(key) is not None
+    
+    bom_core.release_result(key, entry_id)
+    bom_core.evict_results()
+    assert bom_core.get_result(key) is None
+
+
+def test_recreated_entry_keeps_its_own_refs(store):
+    """結果被移除後以同一個 key 重新存入：舊 entry 的 release 不會減少新 entry 的參照計數"""
+    key = bom_core.store_result("R", ["EE_BOM"], {}, lambda: _frame(3))
+    stale_id = bom_core.acquire_result(key)
+    bom_core.clear_result_store()
+    
+    assert bom_core.store_result("R", ["EE_BOM"], {}, lambda: _frame(3)) == key
+    assert bom_core.result_entry_id(key) != stale_id
+    fresh_id = bom_core.acquire_result(key)
+    bom_core.release_result(key, stale_id)
+    assert _refs(key) == 1
+    bom_core.release_result(key, fresh_id)
+    assert _refs(key) == 0
+
+
+def test_spilled_result_is_shared(store, monkeypatch):
+    pytest.importorskip("pyarrow")
+    first = bom_core.store_result("R", ["EE_BOM"], {"n": [1]}, lambda: _frame(2000))
+    monkeypatch.setattr(config, "RESULT_STORE_MAX_MEMORY", 1)
+    bom_core.store_result("R", ["EE_BOM"], {"n": [2]}, lambda: _frame(2000))
+    
+    stats = bom_core.result_store_stats().set_index("Key")
+    assert stats.loc[first, "Location"] == "disk"
+    
+    monkeypatch.setattr(config, "RESULT_STORE_MAX_MEMORY", 10 ** 9)
+    reloaded = bom_core.get_result(first)
+    assert reloaded.equals(_frame(2000))
+    assert bom_core.get_result(first) is reloaded
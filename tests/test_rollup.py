@@ -0,0 +1,60 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import bom_core
+from bom_core import config
+
+from conftest import QUARTER, ee_bom_rows
+
+
+def test_compute_rollup_nested_and_cycle():
+    edges = pd.DataFrame(
+        [("TOP", "SUB", 1.0), ("TOP", "R1", 2.0), ("SUB", "C1", 3.0),
+         ("A", "B", 1.0), ("B", "A", 1.0)],
+        columns=["PARENT_DPN", "DPN", "EXT_COST"],
+    )
+    rollup = bom_core.compute_rollup(edges).set_index("PARENT_DPN")
+    
+    assert rollup.loc["SUB", "Rollup_Cost"] == pytest.approx(3.0)
+    assert rollup.loc["TOP", "Direct_Cost"] == pytest.approx(3.0)
+    assert rollup.loc["TOP", "Rollup_Cost"] == pytest.approx(6.0)
+    assert rollup.loc["TOP", "Depth"] == 2
+    assert rollup.loc[["A", "B"], "In_Cycle"].all()
+    assert rollup.loc[["A", "B"], "Rollup_Cost"].isna().all()
+    assert not rollup.loc["TOP", "In_Cycle"]
+
+
+def test_rollup_follows_data_version_and_database(db, tmp_path, monkeypatch):
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "SUB", 1.0), ("SUB", "C1", 2.0)]))
+    first = bom_core.get_bom_rollup(QUARTER).set_index("PARENT_DPN")
+    assert first.loc["TOP", "Rollup_Cost"] == pytest.approx(3.0)
+    
+    # insert_data 之後不需手動清除快取
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("SUB", "C2", 5.0)]))
+    second = bom_core.get_bom_rollup(QUARTER).set_index("PARENT_DPN")
+    assert second.loc["TOP", "Rollup_Cost"] == pytest.approx(8.0)
+    
+    # 另一個資料庫不會取得前一個資料庫的結果
+    monkeypatch.setattr(config, "DB_PATH", str(tmp_path / "other.db"))
+    bom_core.init_database()
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "X", 7.0)]))
+    other = bom_core.get_bom_rollup(QUARTER).set_index("PARENT_DPN")
+    assert other.loc["TOP", "Rollup_Cost"] == pytest.approx(7.0)
+
+
+def test_estimate_without_ext_cost(db_path):
+    """EE_BOM 沒有 EXT_COST 時預估報表照常產生，成本為 0"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE EE_BOM (Project_Name TEXT, PARENT_DPN TEXT, DPN TEXT, Quarter TEXT)")
+    conn.executemany("INSERT INTO EE_BOM VALUES (?, ?, ?, ?)",
+                     [("PRJ", "TOP", "SUB", QUARTER), ("PRJ", "SUB", "C1", QUARTER)])
+    conn.commit()
+    conn.close()
+    bom_core.init_database()
+    
+    assert bom_core.get_bom_rollup(QUARTER).empty
+    estimate = bom_core.calculate_em_mva(QUARTER)
+    assert list(estimate["PARENT_DPN"]) == ["TOP", "SUB"]
+    assert (estimate[f"{QUARTER} EM rollup cost"] == 0).all()
@@ -0,0 +1,37 @@
+import importlib.util
+
+import pytest
+
+import bom_core
+from bom_core import config
+
+from conftest import ee_bom_rows
+
+ENGINES = ["sqlite"] + (["duckdb"] if importlib.util.find_spec("duckdb") else [])
+
+
+@pytest.fixture(params=ENGINES)
+def engine_db(request, db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "STORAGE_ENGINE", request.param)
+    monkeypatch.setattr(config, "PARQUET_DIR", str(tmp_path / "parquet"))
+    bom_core.init_database()
+    return request.param
+
+
+def test_insert_data_updates_search_index(engine_db):
+    """不經過上傳、直接 insert_data 寫入的料號也能由搜尋索引找到"""
+    assert bom_core.search_part_numbers("EE_BOM", "DPN", "XYZ") == []
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "XYZ-100", 1.0), ("TOP", "AXYZ", 2.0)]))
+    assert bom_core.search_part_numbers("EE_BOM", "DPN", "XYZ") == ["XYZ-100", "AXYZ"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("_1", ["AB_12"]),
+    ("b_", ["AB_12"]),
+    ("AB_", ["AB_12"]),
+    ("B%1", ["AB12"]),
+])
+def test_like_characters_are_literal(engine_db, text, expected):
+    bom_core.insert_data("EE_BOM", ee_bom_rows([("TOP", "AB_12", 1.0), ("TOP", "ABX12", 2.0),
+                                                 ("TOP", "AB12", 3.0)]))
+    assert bom_core.search_part_numbers("EE_BOM", "DPN", text) == expected
@@ -0,0 +1,29 @@
+import pytest
+
+import bom_core
+from bom_core import config
+
+from conftest import ee_bom_rows
+
+pytest.importorskip("duckdb")
+
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def engine_db(request, db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "STORAGE_ENGINE", request.param)
+    monkeypatch.setattr(config, "PARQUET_DIR", str(tmp_path / "parquet"))
+    bom_core.init_database()
+    bom_core.insert_data("EE_BOM", ee_bom_rows(
+        [("TOP", "A1", 1.0), ("TOP", "A2", 2.0), ("TOP", "B1", 3.0), ("TOP", "b2", 4.0)]))
+    return request.param
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ({"MPN": ["grm-a*"]}, ["A1", "A2"]),
+    ({"MPN": ["GRM-B%", "GRM-A1"]}, ["A1", "B1", "b2"]),
+    ({"MANUFACTURER": ["mura*"], "DPN": ["A2"]}, ["A2"]),
+])
+def test_wildcard_filters_ignore_case(engine_db, filters, expected):
+    """萬用字元篩選在 SQLite 與 DuckDB 上結果相同（不分大小寫）"""
+    assert sorted(bom_core.query_data("EE_BOM", filters)["DPN"]) == expected
+    assert bom_core.count_rows("EE_BOM", filters) == len(expected)